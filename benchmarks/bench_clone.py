@@ -0,0 +1,64 @@
+"""Compares the cost of copying a game with `Game.clone`, `copy.deepcopy` and `model_copy(deep=True)`.
+
+Usage:
+    python benchmarks/bench_clone.py [--steps 30] [--repeats 2000]
+
+The game is copied after `--steps` actions of random players, so that it holds rolled dice,
+tiles, leg bets and hidden game bets.
+"""
+
+import argparse
+import copy
+import time
+
+import numpy as np
+
+from camelgo.domain.environment.action import Action, ActionInt
+from camelgo.domain.environment.dice import DiceRoller
+from camelgo.domain.environment.game import Game
+
+
+def time_calls(fn, repeats: int) -> float:
+    """Returns the mean seconds per call after a short warm-up."""
+    for _ in range(min(repeats, 20)):
+        fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=30, help="Actions played before the game is copied.")
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+
+    game = Game.start_game(["A", "B", "C", "D"], dice_roller=DiceRoller(seed=0))
+    rng = np.random.default_rng(0)
+    for _ in range(args.steps):
+        player = game.current_leg.next_player
+        action_int = int(rng.choice(np.flatnonzero(game.get_action_mask(player))))
+        action = Action.from_int(action_int, player)
+        if action_int == ActionInt.ROLL_DICE.value:
+            action.dice_rolled = game.roll_dice()
+        game.play_action(action)
+
+    timings = [
+        ("Game.clone()", time_calls(game.clone, args.repeats)),
+        ("Game.clone(seed=0)", time_calls(lambda: game.clone(seed=0), args.repeats)),
+        ("Game.clone(hidden_bets=False)", time_calls(lambda: game.clone(hidden_bets=False, viewer="A"), args.repeats)),
+        ("copy.deepcopy", time_calls(lambda: copy.deepcopy(game), args.repeats)),
+        ("model_copy(deep=True)", time_calls(lambda: game.model_copy(deep=True), args.repeats)),
+    ]
+    deepcopy_seconds = timings[3][1]
+
+    print("-" * 60)
+    print(f"{'Copy':<32} {'us/copy':>10} {'vs deepcopy':>12}")
+    for name, seconds in timings:
+        print(f"{name:<32} {seconds * 1e6:>10.1f} {deepcopy_seconds / seconds:>11.1f}x")
+    print("-" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Compares PPO training throughput (frames/second) across collector layouts.
+
+Usage:
+    python benchmarks/bench_collection_layouts.py --frames 4000 --layouts 1x1 2x1 2x2:async 4x1:async
+
+A layout is written as `<collectors>x<envs per collector>`, with an optional `:async` suffix.
+"""
+
+import argparse
+import os
+
+from camelgo.domain.training.single_agent_ppo import train
+
+
+def parse_layout(layout: str):
+    shape, _, mode = layout.partition(":")
+    num_collectors, num_workers = (int(v) for v in shape.split("x"))
+    return num_collectors, num_workers, mode == "async"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=4_000)
+    parser.add_argument("--frames-per-batch", type=int, default=500)
+    parser.add_argument("--layouts", nargs="+", default=["1x1", "1x2", "2x1", "2x1:async", "4x1:async"])
+    args = parser.parse_args()
+
+    results = []
+    for layout in args.layouts:
+        num_collectors, num_workers, async_collection = parse_layout(layout)
+        logs = train(
+            total_frames=args.frames,
+            frames_per_batch=args.frames_per_batch,
+            num_workers=num_workers,
+            num_collectors=num_collectors,
+            async_collection=async_collection,
+        )
+        results.append((layout, logs["total_fps"], max(logs["policy_lag"], default=0)))
+
+    print("-" * 50)
+    print(f"CPU cores: {os.cpu_count()}")
+    print(f"{'Layout':<12} {'Frames/s':>10} {'Max Lag':>8}")
+    for layout, fps, lag in sorted(results, key=lambda r: -r[1]):
+        print(f"{layout:<12} {fps:>10.0f} {lag:>8d}")
+
+
+if __name__ == "__main__":
+    main()
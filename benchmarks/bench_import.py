@@ -0,0 +1,71 @@
+"""Measures the cold import time of the camelgo entry points and the heavy packages they load.
+
+Usage:
+    python benchmarks/bench_import.py [--repeats 3]
+
+Every module is imported in a fresh interpreter, `--repeats` times, and the best wall time of the
+import is reported along with the heavy packages (torch, torchrl, gymnasium, dash) it pulled in.
+The engine, the simulate command and the Dash app should not load torch nor gymnasium.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+ENTRY_POINTS = [
+    "camelgo",
+    "camelgo.domain.environment.game",
+    "camelgo.application.simulate",
+    "camelgo.application.dash_app",
+    "camelgo.domain.analysis.best_response",
+    "camelgo.domain.environment.gym_env",
+    "camelgo.run_agent",
+    "camelgo.domain.training.single_agent_ppo",
+]
+HEAVY_PACKAGES = ["torch", "torchrl", "gymnasium", "dash"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [p for p in {packages!r} if p in sys.modules]}}))
+"""
+
+
+def cold_import(module: str) -> dict:
+    """Imports a module in a fresh interpreter and returns its import time and the heavy packages loaded."""
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [src, os.environ.get("PYTHONPATH")])))
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, packages=HEAVY_PACKAGES)],
+        capture_output=True, text=True, env=env,
+    )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh interpreters per module, the best time is kept.")
+    args = parser.parse_args()
+
+    print("-" * 78)
+    print(f"{'Module':45s} {'Import (s)':>10s}  Heavy packages")
+    print("-" * 78)
+    for module in ENTRY_POINTS:
+        runs = [cold_import(module) for _ in range(args.repeats)]
+        if "error" in runs[0]:
+            print(f"{module:45s} {'-':>10s}  {runs[0]['error']}")
+            continue
+        seconds = min(run["seconds"] for run in runs)
+        print(f"{module:45s} {seconds:10.3f}  {', '.join(runs[0]['loaded']) or '-'}")
+    print("-" * 78)
+
+
+if __name__ == "__main__":
+    main()
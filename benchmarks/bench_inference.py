@@ -0,0 +1,75 @@
+"""Measures action-selection latency and throughput of the exported policies against the torchrl actor.
+
+Usage:
+    python benchmarks/bench_inference.py [--actor models/actor.pt] [--batch-size 256]
+
+Without a trained actor, randomly initialised weights are used (timings do not depend on them).
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import torch
+from tensordict import TensorDict
+from torchrl.envs.utils import ExplorationType, set_exploration_type
+
+from camelgo.domain.environment.gym_env import CamelGoEnv
+from camelgo.domain.training.export import build_inference_policy
+from camelgo.domain.training.single_agent_ppo import create_ppo_modules
+
+
+def time_calls(fn, repeats: int) -> float:
+    """Returns the mean seconds per call after a short warm-up."""
+    for _ in range(min(repeats, 20)):
+        fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--actor", type=str, default="models/actor.pt")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--repeats", type=int, default=500)
+    args = parser.parse_args()
+    torch.set_num_threads(1)
+
+    actor, _ = create_ppo_modules()
+    actor_path = args.actor
+    if not os.path.exists(actor_path):
+        actor_path = os.path.join(tempfile.mkdtemp(), "actor.pt")
+        torch.save(actor.state_dict(), actor_path)
+    actor.load_state_dict(torch.load(actor_path))
+    actor.eval()
+
+    candidates = {
+        "torchrl actor": None,
+        "eager": build_inference_policy(actor_path, method="eager"),
+        "script": build_inference_policy(actor_path, method="script"),
+        "script + int8": build_inference_policy(actor_path, method="script", quantize=True),
+        "compile": build_inference_policy(actor_path, method="compile"),
+    }
+
+    print(f"{'Path':<16} {'Latency (us)':>14} {'Throughput (actions/s)':>24}")
+    for name, policy in candidates.items():
+        results = []
+        for batch_size in (1, args.batch_size):
+            observation = torch.rand(batch_size, CamelGoEnv.OBSERVATION_DIM)
+            mask = torch.ones(batch_size, CamelGoEnv.ACTION_DIM, dtype=torch.bool)
+            if policy is None:
+                td = TensorDict({"observation": observation, "mask": mask}, batch_size=[batch_size])
+                fn = lambda: actor(td.clone(False))
+            else:
+                fn = lambda: policy(observation, mask)
+            with torch.no_grad(), set_exploration_type(ExplorationType.DETERMINISTIC):
+                results.append(time_calls(fn, args.repeats))
+        latency, batch_time = results
+        print(f"{name:<16} {latency * 1e6:>14.1f} {args.batch_size / batch_time:>24.0f}")
+
+
+if __name__ == "__main__":
+    main()
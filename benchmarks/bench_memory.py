@@ -0,0 +1,98 @@
+"""Measures the memory held by live games and the memory allocated by the engine per step.
+
+Usage:
+    python benchmarks/bench_memory.py [--games 200] [--steps 40]
+
+Games are played by random players. Memory is traced with `tracemalloc`: the bytes and blocks a
+game holds once `--steps` actions were played, and the peak of the bytes allocated during a step
+of a game recycled with `Game.reset`.
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from camelgo.domain.agents.random_player import RandomPlayerAgent
+from camelgo.domain.environment.action import ActionInt
+from camelgo.domain.environment.dice import DiceRoller
+from camelgo.domain.environment.game import Game
+
+
+def play(game: Game, agents: dict, steps: int) -> int:
+    """Plays up to `steps` actions and returns the number played."""
+    played = 0
+    while played < steps and not game.finished:
+        action = agents[game.current_leg.next_player].play(game)
+        if action.to_int() == ActionInt.ROLL_DICE.value:
+            action.dice_rolled = game.roll_dice()
+        game.play_action(action)
+        played += 1
+    return played
+
+
+def traced_blocks() -> int:
+    return sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=40, help="Actions played in every game.")
+    args = parser.parse_args()
+
+    names = ["A", "B", "C", "D"]
+    agents = {name: RandomPlayerAgent(name=name) for name in names}
+    # warm up the caches of the engine (start layouts, enum lookups, validators)
+    np.random.seed(0)
+    play(Game.start_game(names, dice_roller=DiceRoller(seed=0)), agents, args.steps)
+
+    # memory held by live games
+    np.random.seed(0)
+    tracemalloc.start()
+    start_bytes, start_blocks = tracemalloc.get_traced_memory()[0], traced_blocks()
+    games = []
+    for seed in range(args.games):
+        game = Game.start_game(names, dice_roller=DiceRoller(seed=seed))
+        play(game, agents, args.steps)
+        games.append(game)
+    game_bytes = (tracemalloc.get_traced_memory()[0] - start_bytes) / args.games
+    game_blocks = (traced_blocks() - start_blocks) / args.games
+    dice = {id(d) for game in games for d in game.dice_roller.dices_rolled}
+    del games
+
+    # memory allocated per step
+    np.random.seed(1)
+    game = Game.start_game(names, dice_roller=DiceRoller(seed=1))
+    steps = peak = 0
+    for _ in range(args.games):
+        game.reset()
+        for _ in range(args.steps):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            if not play(game, agents, 1):
+                break
+            steps += 1
+            peak += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    # speed, without tracing
+    np.random.seed(1)
+    start = time.perf_counter()
+    timed_steps = 0
+    for _ in range(args.games):
+        game.reset()
+        timed_steps += play(game, agents, args.steps)
+    seconds = time.perf_counter() - start
+
+    print("-" * 50)
+    print(f"Memory per game after {args.steps} steps: {game_bytes / 1024:.1f} KiB in {game_blocks:.0f} blocks")
+    print(f"Distinct dice objects held by the games: {len(dice)}")
+    print(f"Peak allocation per step: {peak / steps:.0f} bytes")
+    print(f"Time per step: {seconds / timed_steps * 1e6:.1f} us")
+    print("-" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""CamelGo: the CamelUp board game, its agents and their training."""
+
+
+def main(argv=None):
+    """Entry point of the `camelgo` command."""
+    # commands are imported when run, so that importing the package stays cheap
+    import argparse
+
+    from camelgo.application import simulate
+
+    parser = argparse.ArgumentParser(prog="camelgo")
+    commands = parser.add_subparsers(dest="command", required=True)
+    simulate_parser = commands.add_parser("simulate", help="Play many games between agents without a user interface.")
+    simulate.add_arguments(simulate_parser)
+    simulate_parser.set_defaults(run=simulate.run)
+    args = parser.parse_args(argv)
+    args.run(args)
@@ -11,14 +11,19 @@ import dash
 from dash import html, dcc, Input, Output, State
 import dash_bootstrap_components as dbc
 
-from camelgo.domain.environment.action import Action
-from camelgo.domain.environment.game_config import Color
+from camelgo.domain.analysis.endgame import EndgameSolver, is_endgame
+from camelgo.domain.analysis.odds_table import LegOddsTable
+from camelgo.domain.environment.action import Action, ActionInt
+from camelgo.domain.environment.game_config import Color, GameConfig
 from camelgo.domain.environment.dice import Dice, DiceRoller
 from camelgo.domain.environment.game import Game
 
 
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 server = app.server
+# memory-mapped if it was built, computed on the fly otherwise
+odds_table = LegOddsTable()
+endgame_solver = EndgameSolver()
 
 
 app.layout = dbc.Container([
@@ -142,6 +147,42 @@ def render_game_state(gs):
             ])
         ])
     ], className="mb-2", style=card_style)
+    if gs.finished:
+        leg_odds_items = html.P("The game is over.", style=card_style)
+    else:
+        odds = odds_table.game_odds(gs)
+        leg_odds_items = html.Ul([
+            html.Li(
+                f"{color.title()}: 1st {odds.rank[i, 0]:.1%}, 2nd {odds.rank[i, 1]:.1%}" + (
+                    f", next ticket ({camel.available_bets[0]}) worth {odds.leg_bet_value(i, camel.available_bets[0]):+.2f}"
+                    if camel.available_bets else ""
+                ),
+                style=card_style,
+            )
+            for i, (color, camel) in enumerate((c, gs.current_leg.camel_states[c]) for c in GameConfig.CAMEL_COLORS)
+        ] + [html.Li(f"Race finishes this leg: {odds.finish:.1%}", style=card_style)])
+    leg_odds_section = dbc.Card([
+        dbc.CardHeader("Leg Odds", style=card_style),
+        dbc.CardBody([leg_odds_items])
+    ], className="mb-2", style=card_style)
+    endgame_section = None
+    if is_endgame(gs):
+        solution = endgame_solver.solve(gs)
+        endgame_section = dbc.Card([
+            dbc.CardHeader("Endgame (exact)", style=card_style),
+            dbc.CardBody([html.Ul([
+                html.Li(
+                    f"{color.title()}: wins {solution.winner_probabilities[color]:.1%}, "
+                    f"last {solution.loser_probabilities[color]:.1%}",
+                    style=card_style,
+                )
+                for color in GameConfig.CAMEL_COLORS
+            ] + [html.Li(
+                f"Best action of {solution.player}: {ActionInt(solution.best_action).name.replace('_', ' ').title()} "
+                f"({solution.action_values[solution.best_action]:.2f} expected points)",
+                style=card_style,
+            )])])
+        ], className="mb-2", style=card_style)
     winner_bets_section = dbc.Card([
         dbc.CardHeader("Game Winner Bets So Far", style=card_style),
         dbc.CardBody([
@@ -167,6 +208,8 @@ def render_game_state(gs):
         tiles_section,
         leg_bets_section,
         points_section,
+        leg_odds_section,
+        *([endgame_section] if endgame_section is not None else []),
         winner_bets_section,
         loser_bets_section
     ])
@@ -239,7 +282,7 @@ def unified_callback(start_n,
         if not finish_leg_n or not game_data:
             return (dash.no_update, "", dash.no_update) + reset_values
         
-        gs = Game.model_validate(game_data)
+        gs = Game.from_trusted(game_data)
         try:
             gs.move_to_next_leg()
             feedback = "Moved to next leg."
@@ -250,7 +293,7 @@ def unified_callback(start_n,
         if not action_n or not game_data:
             return (dash.no_update, "", dash.no_update) + reset_values
         
-        gs = Game.model_validate(game_data)
+        gs = Game.from_trusted(game_data)
         
         action_kwargs = {"player": player}
         if dice_color and dice_number:
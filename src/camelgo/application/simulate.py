@@ -0,0 +1,205 @@
+"""Headless simulation of many games between agents, the entry point for load-testing the engine.
+
+    camelgo simulate --agents RANDOM_PLAYER RANDOM_PLAYER --games 10000 --processes 4 --output games.jsonl
+
+Games are played in a process pool, every game is streamed to the output file as one JSON line as
+soon as its chunk is done, and the run ends with its throughput and the win rate of every seat.
+"""
+
+import argparse
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor
+import json
+import math
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel
+
+from camelgo.domain.agents.agent import Agent
+from camelgo.domain.agents.agent_types import AgentFactory, AgentType
+from camelgo.domain.environment.action import ActionInt
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.game_config import GameConfig
+
+
+class SimulationReport(BaseModel):
+    """Throughput and outcomes of a simulation run."""
+    players: List[str]  # player names in seat order, seat 0 plays first
+    num_games: int
+    num_processes: int
+    seconds: float  # wall-clock time, process pool start-up included
+    games_per_second: float
+    steps_per_second: float  # actions played per second
+    mean_steps: float  # actions per game
+    win_rates: Dict[str, float]  # player name -> share of the games won
+
+
+def player_names(agent_types: Sequence[AgentType]) -> List[str]:
+    """Names of the players by seat, e.g. `P1_RANDOM_PLAYER`."""
+    return [f"P{seat + 1}_{AgentType(agent_type).value}" for seat, agent_type in enumerate(agent_types)]
+
+
+def play_game(game: Game, agents: Dict[str, Agent], seed: int) -> dict:
+    """
+    Plays one seeded game to the end and returns its outcome.
+
+    The seed fixes the dice and the random choices of the agents; the game is reset in place.
+    """
+    np.random.seed(seed)
+    game.reset(seed=seed)
+    start = time.perf_counter()
+    steps = 0
+    while not game.finished:
+        action = agents[game.current_leg.next_player].play(game)
+        if action.to_int() == ActionInt.ROLL_DICE.value:
+            # the dice is rolled by the game, not by the agent
+            action.dice_rolled = game.roll_dice()
+        game.play_action(action)
+        steps += 1
+    return {
+        "seed": seed,
+        "winner": game.winner_player().name,
+        "points": {name: player.points for name, player in game.players.items()},
+        "steps": steps,
+        "legs": game.legs_played,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+# per-process state of the simulation workers
+_worker_game: Optional[Game] = None
+_worker_agents: Optional[Dict[str, Agent]] = None
+
+
+def _init_worker(agent_types: List[str], agent_kwargs: Dict[str, dict]):
+    global _worker_game, _worker_agents
+    if AgentType.PPO.value in agent_types:
+        import torch
+
+        torch.set_num_threads(1)
+    names = player_names(agent_types)
+    _worker_agents = {
+        name: AgentFactory.create_agent(AgentType(agent_type), name=name, **agent_kwargs.get(agent_type, {}))
+        for name, agent_type in zip(names, agent_types)
+    }
+    _worker_game = Game.start_game(names)
+
+
+def _play_seeds(seeds: List[int]) -> List[dict]:
+    return [play_game(_worker_game, _worker_agents, seed) for seed in seeds]
+
+
+def simulate(
+    agent_types: Sequence[AgentType],
+    seeds: Sequence[int],
+    num_processes: int = os.cpu_count() or 1,
+    output_path: Optional[str] = None,
+    agent_kwargs: Optional[Dict[str, dict]] = None,
+) -> SimulationReport:
+    """
+    Plays one game per seed between the given agents.
+
+    Args:
+        agent_types (Sequence[AgentType]): Agent of every seat, seat 0 plays first.
+        seeds (Sequence[int]): One game per seed.
+        num_processes (int): Size of the process pool.
+        output_path (str, optional): JSON lines file the games are streamed to.
+        agent_kwargs (Dict[str, dict], optional): Extra arguments by agent type, e.g.
+            `{"PPO": {"actor_path": "models/actor.pt"}}`.
+
+    Returns:
+        SimulationReport: Throughput and win rates.
+    """
+    agent_types = [AgentType(agent_type).value for agent_type in agent_types]
+    if not GameConfig.MIN_PLAYERS <= len(agent_types) <= GameConfig.MAX_PLAYERS:
+        raise ValueError(f"A game has {GameConfig.MIN_PLAYERS} to {GameConfig.MAX_PLAYERS} players, got {len(agent_types)}.")
+    seeds = list(seeds)
+    names = player_names(agent_types)
+    init_args = (agent_types, agent_kwargs or {})
+    num_processes = max(1, min(num_processes, len(seeds)))
+    # a few chunks per process balances the load without much IPC
+    chunk_size = max(1, math.ceil(len(seeds) / (num_processes * 4)))
+    chunks = [seeds[i:i + chunk_size] for i in range(0, len(seeds), chunk_size)]
+
+    wins = dict.fromkeys(names, 0)
+    num_games = steps = 0
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        output = stack.enter_context(open(output_path, "w")) if output_path else None
+        if num_processes == 1:
+            _init_worker(*init_args)
+            chunk_results = map(_play_seeds, chunks)
+        else:
+            pool = stack.enter_context(
+                ProcessPoolExecutor(num_processes, initializer=_init_worker, initargs=init_args)
+            )
+            chunk_results = pool.map(_play_seeds, chunks)
+        # chunks come back in order, each is written as soon as it is done
+        for results in chunk_results:
+            for result in results:
+                wins[result["winner"]] += 1
+                num_games += 1
+                steps += result["steps"]
+                if output:
+                    output.write(json.dumps(result) + "\n")
+            if output:
+                output.flush()
+    seconds = time.perf_counter() - start
+
+    return SimulationReport(
+        players=names,
+        num_games=num_games,
+        num_processes=num_processes,
+        seconds=seconds,
+        games_per_second=num_games / seconds,
+        steps_per_second=steps / seconds,
+        mean_steps=steps / num_games if num_games else 0.0,
+        win_rates={name: count / num_games if num_games else 0.0 for name, count in wins.items()},
+    )
+
+
+def print_report(report: SimulationReport):
+    print("-" * 50)
+    print(f"{report.num_games} games in {report.seconds:.2f}s on {report.num_processes} process(es)")
+    print("-" * 50)
+    print(f"Games/second: {report.games_per_second:.1f}")
+    print(f"Steps/second: {report.steps_per_second:.1f}")
+    print(f"Steps/game:   {report.mean_steps:.1f}")
+    print("Win Rate:")
+    for name, win_rate in report.win_rates.items():
+        print(f"  {name}: {win_rate:.1%}")
+    print("-" * 50)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--agents", type=str, nargs="+", default=[AgentType.RANDOM_PLAYER.value] * 2,
+                        choices=[t.value for t in AgentType], help="Agent of every seat, seat 0 plays first.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed-start", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", type=str, default=None, help="JSON lines file the games are streamed to.")
+    parser.add_argument("--actor", type=str, default="models/actor.pt", help="Actor of the PPO agents.")
+
+
+def run(args: argparse.Namespace):
+    report = simulate(
+        agent_types=[AgentType(agent_type) for agent_type in args.agents],
+        seeds=range(args.seed_start, args.seed_start + args.games),
+        num_processes=args.processes,
+        output_path=args.output,
+        agent_kwargs={AgentType.PPO.value: {"actor_path": args.actor}},
+    )
+    print_report(report)
+
+
+def run_cli(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Play many games between agents without a user interface.")
+    add_arguments(parser)
+    run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    run_cli()
@@ -19,4 +19,15 @@ class Agent(ABC):
         Returns:
             Action: The action chosen by the agent.
         """
-        pass
\ No newline at end of file
+        pass
+
+    async def aplay(self, game: Game) -> Action:
+        """Async variant of `play`, for agents that wait on a shared resource such as a batched model.
+
+        Args:
+            game (Game): The current state of the game.
+
+        Returns:
+            Action: The action chosen by the agent.
+        """
+        return self.play(game)
@@ -3,7 +3,7 @@
 from enum import Enum
 
 from camelgo.domain.agents.agent import Agent
-from src.camelgo.domain.agents.random_player import RandomPlayerAgent
+from camelgo.domain.agents.random_player import RandomPlayerAgent
 
 
 class AgentType(Enum):
@@ -29,5 +29,17 @@ class AgentFactory:
         """
         if agent_type == AgentType.RANDOM_PLAYER:
             return RandomPlayerAgent(**kwargs)
+        elif agent_type == AgentType.EXPECTED_VALUE_MAX:
+            # the analysis modules are only imported when an expected value agent is asked for
+            from camelgo.domain.agents.expected_value import ExpectedValueAgent
+
+            return ExpectedValueAgent(**kwargs)
+        elif agent_type == AgentType.PPO:
+            # torch is only imported when a policy agent is asked for
+            from camelgo.domain.agents.policy_agent import PolicyAgent
+
+            if "policy" in kwargs or "dispatcher" in kwargs:
+                return PolicyAgent(**kwargs)
+            return PolicyAgent.from_actor(**kwargs)
         else:
             raise ValueError(f"Unsupported agent type: {agent_type}")
\ No newline at end of file
@@ -0,0 +1,126 @@
+"""Implements batched policy inference for many games played concurrently.
+
+Games running as asyncio tasks on the same event loop submit their decision requests to a
+`BatchingDispatcher`, which groups them into micro-batches and runs one forward pass per batch.
+A batch is flushed when it is full or when its deadline expires; with no deadline it is flushed on
+the next loop iteration, after every game that was ready to move has submitted its request.
+"""
+
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from camelgo.domain.agents.agent import Agent
+from camelgo.domain.environment.action import Action
+from camelgo.domain.environment.game import Game
+
+
+class BatchingDispatcher:
+    """
+    Groups decision requests into micro-batches for a policy `policy(observations, masks) -> actions`,
+    such as the modules of `camelgo.domain.training.export`.
+
+    A dispatcher serves the event loop it is first used on.
+    """
+
+    def __init__(self, policy: Callable, max_batch_size: int = 256, max_delay: float = 0.0):
+        """
+        Args:
+            policy (Callable): Maps (B, OBSERVATION_DIM) observations and (B, ACTION_DIM) masks to B actions.
+            max_batch_size (int): A batch is flushed as soon as it holds this many requests.
+            max_delay (float): Seconds the first request of a batch waits for others. 0 flushes on
+                the next loop iteration, enough when all requests come from tasks of the same loop.
+        """
+        self.policy = policy
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._pending: List[Tuple[np.ndarray, np.ndarray, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self.num_requests = 0
+        self.num_batches = 0
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.num_requests / self.num_batches if self.num_batches else 0.0
+
+    async def decide(self, observation: np.ndarray, mask: np.ndarray) -> int:
+        """
+        Submits one decision request and waits for its batch.
+
+        Args:
+            observation (np.ndarray): The observation, left untouched until the action is returned.
+            mask (np.ndarray): The legal-action mask.
+
+        Returns:
+            int: The action.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((observation, mask, future))
+        if len(self._pending) >= self.max_batch_size:
+            self.flush()
+        elif self._flush_handle is None:
+            if self.max_delay > 0:
+                self._flush_handle = loop.call_later(self.max_delay, self.flush)
+            else:
+                self._flush_handle = loop.call_soon(self.flush)
+        return await future
+
+    def flush(self) -> None:
+        """Runs the policy on the pending requests and resolves them."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        observations, masks, futures = zip(*batch)
+        try:
+            with torch.inference_mode():
+                actions = self.policy(torch.from_numpy(np.stack(observations)), torch.from_numpy(np.stack(masks)))
+            actions = actions.tolist()
+        except Exception as exc:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        self.num_requests += len(batch)
+        self.num_batches += 1
+        for future, action in zip(futures, actions):
+            # a request whose game was cancelled meanwhile is dropped
+            if not future.done():
+                future.set_result(action)
+
+
+async def play_game(game: Game, agents: Dict[str, Agent]) -> Game:
+    """
+    Plays a game to the end with `Agent.aplay`, so that games played concurrently share batches.
+
+    Args:
+        game (Game): The game, played in place.
+        agents (Dict[str, Agent]): Agent of every player.
+
+    Returns:
+        Game: The finished game.
+    """
+    while not game.finished:
+        player = game.current_leg.next_player
+        action = await agents[player].aplay(game)
+        if _is_roll(action):
+            # the dice is rolled by the game, not by the agent
+            action.dice_rolled = game.roll_dice()
+        game.play_action(action)
+    return game
+
+
+def _is_roll(action: Action) -> bool:
+    return (
+        action.dice_rolled is None
+        and action.leg_bet is None
+        and action.game_winner_bet is None
+        and action.game_loser_bet is None
+        and action.cheering_tile_placed is None
+        and action.booing_tile_placed is None
+    )
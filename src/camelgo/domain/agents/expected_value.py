@@ -0,0 +1,60 @@
+"""Implements a player agent that maximizes the expected points of its next action."""
+
+from functools import lru_cache
+from typing import Optional
+
+from camelgo.domain.agents.agent import Agent
+from camelgo.domain.analysis.endgame import EndgameSolver, is_endgame
+from camelgo.domain.analysis.odds_table import DEFAULT_ODDS_TABLE_PATH, LegOddsTable
+from camelgo.domain.analysis.opening_book import OpeningBook, shared_opening_book
+from camelgo.domain.environment.action import Action, ActionInt
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.game_config import GameConfig
+
+
+ROLL_DICE_POINTS = 1
+
+
+@lru_cache(maxsize=None)
+def shared_odds_table(path: str = DEFAULT_ODDS_TABLE_PATH) -> LegOddsTable:
+    """One table per file and process, so that the agents of a process share its fallback memo."""
+    return LegOddsTable(path)
+
+
+class ExpectedValueAgent(Agent):
+    """
+    A player agent that takes the leg bet ticket with the highest expected points, read from the
+    leg odds table, and rolls the dice when no ticket is worth more than the point a roll earns.
+    Tiles and game bets are never played, except by the opening book, which is read first, and in
+    the endgame, where the action is the best one of `EndgameSolver`.
+    """
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        odds_table: Optional[LegOddsTable] = None,
+        opening_book: Optional[OpeningBook] = None,
+        endgame_solver: Optional[EndgameSolver] = None,
+    ):
+        self.name = name or "ExpectedValuePlayer"
+        self.odds_table = odds_table if odds_table is not None else shared_odds_table()
+        self.opening_book = opening_book if opening_book is not None else shared_opening_book()
+        self.endgame_solver = endgame_solver if endgame_solver is not None else EndgameSolver()
+
+    def play(self, game: Game) -> Action:
+        action = self.opening_book.play(game, self.name)
+        if action is not None:
+            return action
+        if is_endgame(game):
+            return Action.from_int(self.endgame_solver.solve(game, self.name).best_action, self.name)
+        mask = game.get_action_mask(self.name)
+        odds = self.odds_table.game_odds(game)
+        best_action, best_value = ActionInt.ROLL_DICE.value, float(ROLL_DICE_POINTS)
+        for i, color in enumerate(GameConfig.CAMEL_COLORS):
+            action = ActionInt.LEG_BET_BLUE.value + i
+            if not mask[action]:
+                continue
+            value = odds.leg_bet_value(i, game.current_leg.camel_states[color].available_bets[0])
+            if value > best_value:
+                best_action, best_value = action, value
+        return Action.from_int(best_action, self.name)
@@ -0,0 +1,65 @@
+"""Implements a player agent that plays with a trained policy."""
+
+from typing import Callable, Optional
+
+import torch
+
+from camelgo.domain.agents.agent import Agent
+from camelgo.domain.agents.batching import BatchingDispatcher
+from camelgo.domain.analysis.opening_book import OpeningBook
+from camelgo.domain.environment.action import Action
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.observation import build_observation
+
+
+class PolicyAgent(Agent):
+    """
+    A player agent that picks moves with a policy `policy(observation, mask) -> action`.
+
+    `play` runs one forward pass per move. `aplay` goes through a `BatchingDispatcher` when one is
+    given, so that agents of concurrent games share forward passes. With an `OpeningBook`, the
+    first move of a game is read from the book instead.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[Callable] = None,
+        name: Optional[str] = None,
+        dispatcher: Optional[BatchingDispatcher] = None,
+        opening_book: Optional[OpeningBook] = None,
+    ):
+        if policy is None and dispatcher is None:
+            raise ValueError("A policy or a dispatcher is required.")
+        self.name = name or "PolicyPlayer"
+        self.policy = policy if policy is not None else dispatcher.policy
+        self.dispatcher = dispatcher
+        self.opening_book = opening_book
+
+    @classmethod
+    def from_actor(cls, actor_path: str = "models/actor.pt", name: Optional[str] = None, method: str = "eager", **kwargs) -> 'PolicyAgent':
+        """Builds the agent from the actor state dict saved by training, see `build_inference_policy`."""
+        from camelgo.domain.training.export import build_inference_policy
+
+        return cls(build_inference_policy(actor_path, method=method), name=name, **kwargs)
+
+    def _book_action(self, game: Game) -> Optional[Action]:
+        return self.opening_book.play(game, self.name) if self.opening_book is not None else None
+
+    def play(self, game: Game) -> Action:
+        action = self._book_action(game)
+        if action is not None:
+            return action
+        observation = build_observation(game, self.name)
+        mask = game.get_action_mask(self.name)
+        with torch.inference_mode():
+            action = self.policy(torch.from_numpy(observation), torch.from_numpy(mask))
+        return Action.from_int(int(action), self.name)
+
+    async def aplay(self, game: Game) -> Action:
+        action = self._book_action(game)
+        if action is not None:
+            return action
+        if self.dispatcher is None:
+            return self.play(game)
+        action = await self.dispatcher.decide(build_observation(game, self.name), game.get_action_mask(self.name))
+        return Action.from_int(action, self.name)
@@ -0,0 +1,485 @@
+"""Estimates how much an agent leaves on the table against fixed opponents.
+
+At a decision of the agent every legal action is scored by Monte-Carlo rollouts: the action is
+played on a copy of the game without the game bets the agent cannot see, then the opponents keep
+their fixed policy and the player rolls until the leg ends, and the player's open bets on the
+winner and loser of the race are settled by playing the race out with dice rolls only. Rollout n
+of every action uses seed n, so the actions are compared on the same dice. The best action under
+these values is a best response over the current leg; the gap between its value and the value of
+the agent's action is what the agent leaves on the table. The gap of a noisy maximum is biased
+upwards, more rollouts shrink the bias.
+
+The values only depend on the position and the opponents, not on the agent, so they are kept in a
+`PositionCache` that is saved between runs: evaluating successive checkpoints of a training run
+revisits the positions of the previous ones and tops their estimates up instead of starting over.
+Positions are keyed without the points, unless the opponents read the score like policies do.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import math
+import os
+import pickle
+import random
+from typing import TYPE_CHECKING, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from camelgo.domain.agents.agent import Agent
+from camelgo.domain.agents.agent_types import AgentFactory, AgentType
+from camelgo.domain.environment.action import Action, ActionInt
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.game_config import GameConfig
+from camelgo.domain.environment.transitions import (
+    Board, CAMEL_INDEX, CRAZY_INDICES, LegState, RACING_INDICES, TILE_BOO, TILE_CHEER, apply_roll, is_finished
+)
+
+# gymnasium is only needed by the analysis workers, the rollouts run on the engine alone
+if TYPE_CHECKING:
+    from camelgo.domain.environment.gym_env import CamelGoEnv
+
+
+CACHE_VERSION = 2  # bump when the rollouts change, so that stale caches are dropped
+DEFAULT_CACHE_PATH = "models/best_response_cache.pkl"
+_CRAZY = tuple(sorted(CRAZY_INDICES))
+_SUM, _SQUARES, _COUNT = range(3)
+# opponents whose play depends on the score, policies read the points in their observation
+SCORE_AWARE_OPPONENTS = frozenset({AgentType.PPO.value})
+
+
+def position_key(game: Game, player: str, with_points: bool = False) -> tuple:
+    """
+    Simplified state of a game seen from the player about to move, everything the rollouts depend on.
+    The game bets of the other players are hidden from the player, and from the rollouts.
+    Players are numbered by seat from `player`, so that the position shares its values across games
+    and seats, and points are left out unless `with_points`, for opponents that look at the score.
+    """
+    names = list(game.players)
+    seat = names.index(player)
+    order = names[seat:] + names[:seat]
+    relative = {name: i for i, name in enumerate(order)}
+    leg = game.current_leg
+    state = LegState.from_game(game)
+    tiles = tuple(sorted(
+        [(pos, TILE_CHEER, relative[owner]) for pos, owner in leg.cheering_tiles]
+        + [(pos, TILE_BOO, relative[owner]) for pos, owner in leg.booing_tiles]
+    ))
+    leg_bets = tuple(
+        tuple(tuple(leg.player_bets.get(name, {}).get(color, ())) for color in GameConfig.CAMEL_COLORS)
+        for name in order
+    )
+    # the rollouts only see the game bets of the player, and how many bets were placed before theirs
+    game_bets = tuple(
+        tuple(
+            bets[color].index(player) if player in bets.get(color, ()) else -1
+            for color in GameConfig.CAMEL_COLORS
+        )
+        for bets in (game.hidden_game_winner_bets, game.hidden_game_loser_bets)
+    )
+    key = state.board, state.racing_dice, state.grey_dice, tiles, leg_bets, game_bets
+    if with_points:
+        key += (tuple(game.players[name].points for name in order),)
+    return key
+
+
+def sample_race(board: Board, rng: random.Random) -> Tuple[int, int]:
+    """
+    Plays a race out with dice rolls only, from the start of a leg.
+
+    Args:
+        board (Board): The board at the start of a leg.
+        rng (random.Random): Draws the dice.
+
+    Returns:
+        Tuple[int, int]: Camel indices of the winner and the loser of the race.
+    """
+    dice = list(RACING_INDICES) + [None]  # None is the grey dice
+    while True:
+        rng.shuffle(dice)
+        # the last dice of the pyramid is not rolled
+        for camel in dice[:-1]:
+            if camel is None:
+                camel = rng.choice(_CRAZY)
+            board, _ = apply_roll(board, camel, rng.choice(GameConfig.DICE_VALUES))
+            if is_finished(board):
+                return (
+                    max(RACING_INDICES, key=lambda i: board[i]),
+                    min(RACING_INDICES, key=lambda i: board[i]),
+                )
+
+
+def game_bets_value(game: Game, player: str, winner: int, loser: int) -> int:
+    """Points the game bets of a player pay if the race ends with the given camels first and last."""
+    value = 0
+    for bets, camel in ((game.hidden_game_winner_bets, winner), (game.hidden_game_loser_bets, loser)):
+        for color in GameConfig.CAMEL_COLORS:
+            bettors = bets.get(color, ())
+            if player not in bettors:
+                continue
+            if CAMEL_INDEX[color] != camel:
+                value -= GameConfig.INCORRECT_GAME_BET_PENALTY
+                continue
+            rank = bettors.index(player)
+            if rank < len(GameConfig.CORRECT_GAME_BET_POINTS):
+                value += GameConfig.CORRECT_GAME_BET_POINTS[rank]
+    return value
+
+
+class PositionCache:
+    """
+    Rollout statistics by position: a (3, NUM_ACTIONS) array of value sums, sums of squares and
+    rollout counts per action.
+
+    Rollout n of an action always uses seed n, so two copies of an entry agree on the rollouts they
+    have in common and merging keeps, for every action, the copy with more of them.
+    """
+
+    def __init__(self, config: Hashable = None, positions: Optional[Dict[Hashable, np.ndarray]] = None):
+        """
+        Args:
+            config (Hashable): What the values depend on besides the position, i.e. the opponents.
+            positions (dict, optional): Initial entries by position key.
+        """
+        self.config = config
+        self.positions: Dict[Hashable, np.ndarray] = positions if positions is not None else {}
+        self._updated = set()
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def get(self, key: Hashable) -> np.ndarray:
+        entry = self.positions.get(key)
+        return np.zeros((3, Game.NUM_ACTIONS)) if entry is None else entry.copy()
+
+    def put(self, key: Hashable, entry: np.ndarray) -> None:
+        self.positions[key] = entry
+        self._updated.add(key)
+
+    def merge(self, positions: Dict[Hashable, np.ndarray]) -> None:
+        for key, entry in positions.items():
+            current = self.positions.get(key)
+            if current is None:
+                self.positions[key] = entry
+            else:
+                more = entry[_COUNT] > current[_COUNT]
+                current[:, more] = entry[:, more]
+            self._updated.add(key)
+
+    def take_updates(self) -> Dict[Hashable, np.ndarray]:
+        """The entries written since the last call."""
+        updates = {key: self.positions[key] for key in self._updated}
+        self._updated = set()
+        return updates
+
+    @classmethod
+    def load(cls, path: str, config: Hashable = None) -> 'PositionCache':
+        """Loads the cache saved at `path`, or starts an empty one if there is none for this config."""
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                saved = pickle.load(f)
+            if saved["version"] == CACHE_VERSION and saved["config"] == config:
+                return cls(config, saved["positions"])
+        return cls(config)
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # written aside first, so that an interrupted run leaves the previous cache intact
+        with open(f"{path}.tmp", "wb") as f:
+            pickle.dump({"version": CACHE_VERSION, "config": self.config, "positions": self.positions}, f)
+        os.replace(f"{path}.tmp", path)
+
+
+class BestResponse:
+    """Scores the actions of a player by rollouts against fixed opponents, see the module docstring."""
+
+    def __init__(
+        self,
+        opponents: Dict[str, Agent],
+        rollouts: int = 16,
+        cache: Optional[PositionCache] = None,
+        score_aware: bool = False,
+    ):
+        """
+        Args:
+            opponents (Dict[str, Agent]): The fixed policy of every other player, by name.
+            rollouts (int): Rollouts per action; cached actions with fewer are topped up.
+            cache (PositionCache, optional): Values of the positions seen before.
+            score_aware (bool): The opponents look at the score, positions are then keyed with the points.
+        """
+        self.opponents = opponents
+        self.rollouts = rollouts
+        self.cache = cache if cache is not None else PositionCache()
+        self.score_aware = score_aware
+        self.cache_hits = 0
+
+    def action_values(self, game: Game, player: str) -> np.ndarray:
+        """
+        Expected points of every action of the player about to move, until the end of the leg plus
+        the expected payoff of the game bets.
+
+        Args:
+            game (Game): The game, left untouched.
+            player (str): The player about to move.
+
+        Returns:
+            np.ndarray: Value per action, NaN for illegal actions.
+        """
+        key = position_key(game, player, with_points=self.score_aware)
+        mask = game.get_action_mask(player)
+        entry = self.cache.get(key)
+        missing = np.flatnonzero(mask & (entry[_COUNT] < self.rollouts))
+        if not len(missing):
+            self.cache_hits += 1
+        else:
+            # rollouts reseed the opponents' random choices, the game they were asked for goes on as before
+            random_state = np.random.get_state()
+            for action in missing:
+                for n in range(int(entry[_COUNT, action]), self.rollouts):
+                    value = self.rollout(game, player, int(action), n)
+                    entry[:, action] += (value, value * value, 1)
+            np.random.set_state(random_state)
+            self.cache.put(key, entry)
+        values = np.full(Game.NUM_ACTIONS, np.nan)
+        values[mask] = entry[_SUM, mask] / entry[_COUNT, mask]
+        return values
+
+    def rollout(self, game: Game, player: str, action: int, seed: int) -> float:
+        """Points the player gains over one rollout of an action, see the module docstring."""
+        # the player cannot see the game bets of the others
+        clone = game.clone(hidden_bets=False, viewer=player, seed=seed)
+        np.random.seed(seed)
+
+        start = clone.current_player_points(player)
+        legs_played = clone.legs_played
+        move = Action.from_int(action, player)
+        while True:
+            if move.to_int() == ActionInt.ROLL_DICE.value:
+                move.dice_rolled = clone.roll_dice()
+            clone.play_action(move)
+            if clone.finished or clone.legs_played != legs_played:
+                break
+            next_player = clone.current_leg.next_player
+            move = Action(player=player) if next_player == player else self.opponents[next_player].play(clone)
+
+        value = clone.current_player_points(player) - start
+        if not clone.finished:
+            winner, loser = sample_race(LegState.from_game(clone).board, random.Random(seed))
+            value += game_bets_value(clone, player, winner, loser)
+        return float(value)
+
+
+class ExploitabilityReport(BaseModel):
+    """How many points an agent leaves on the table against fixed opponents."""
+    agent_type: str
+    opponent_type: str
+    num_opponents: int
+    agent_seat: int
+    num_games: int
+    num_decisions: int  # decisions analysed
+    agent_value: float  # mean value of the agent's actions
+    best_response_value: float  # mean value of the best actions
+    mean_gap: float  # mean of best response value - agent value per decision
+    gap_stderr: float
+    gap_per_game: float  # points left on the table over a whole game
+    best_action_rate: float  # share of the decisions where the agent picked a best action
+    cache_hits: int  # decisions whose values were all cached
+    cache_size: int
+
+
+def analyze_game(env: "CamelGoEnv", agent: Agent, best_response: BestResponse, seed: int, sample_rate: float = 1.0) -> dict:
+    """
+    Plays one seeded game with the agent and scores a share of its decisions.
+
+    The seed fixes the dice (through the environment), the opponents' random choices and which
+    decisions are scored; cached values do not change how the game goes.
+    """
+    np.random.seed(seed)
+    env.reset(seed=seed)
+    sampler = random.Random(seed)
+    values = []
+    num_decisions = 0
+    while not env.game.finished:
+        action = agent.play(env.game).to_int()
+        num_decisions += 1
+        if sampler.random() < sample_rate:
+            action_values = best_response.action_values(env.game, env.agent_name)
+            values.append((float(action_values[action]), float(np.nanmax(action_values))))
+        env.step(action)
+    return {"seed": seed, "num_decisions": num_decisions, "values": values}
+
+
+def summarize(results: List[dict], sample_rate: float, **report_fields) -> ExploitabilityReport:
+    values = np.array([v for r in results for v in r["values"]]).reshape(-1, 2)
+    gaps = values[:, 1] - values[:, 0]
+    n = len(gaps)
+    return ExploitabilityReport(
+        num_games=len(results),
+        num_decisions=n,
+        agent_value=float(values[:, 0].mean()) if n else 0.0,
+        best_response_value=float(values[:, 1].mean()) if n else 0.0,
+        mean_gap=float(gaps.mean()) if n else 0.0,
+        gap_stderr=float(gaps.std(ddof=1) / math.sqrt(n)) if n > 1 else 0.0,
+        # every decision is scored with probability sample_rate
+        gap_per_game=float(gaps.sum() / sample_rate / len(results)) if results else 0.0,
+        best_action_rate=float(np.mean(gaps <= 1e-9)) if n else 0.0,
+        **report_fields,
+    )
+
+
+# per-process state of the analysis workers
+_worker_env: Optional["CamelGoEnv"] = None
+_worker_agent: Optional[Agent] = None
+_worker_best_response: Optional[BestResponse] = None
+
+
+def _init_worker(agent_type: str, agent_kwargs: dict, opponent_type: str, opponent_kwargs: dict,
+                 num_opponents: int, agent_seat: int, rollouts: int, cache: PositionCache):
+    from camelgo.domain.environment.gym_env import CamelGoEnv
+
+    global _worker_env, _worker_agent, _worker_best_response
+    if AgentType.PPO.value in (agent_type, opponent_type):
+        import torch
+
+        torch.set_num_threads(1)
+    _worker_env = CamelGoEnv(
+        opponent_type=AgentType(opponent_type), num_opponents=num_opponents, agent_seat=agent_seat,
+        opponent_kwargs=opponent_kwargs,
+    )
+    _worker_agent = AgentFactory.create_agent(AgentType(agent_type), name=_worker_env.agent_name, **agent_kwargs)
+    _worker_best_response = BestResponse(
+        _worker_env.opponents, rollouts, cache, score_aware=opponent_type in SCORE_AWARE_OPPONENTS
+    )
+
+
+def _analyze_seeds(seeds: List[int], sample_rate: float) -> Tuple[List[dict], Dict[Hashable, np.ndarray], int]:
+    hits = _worker_best_response.cache_hits
+    results = [analyze_game(_worker_env, _worker_agent, _worker_best_response, seed, sample_rate) for seed in seeds]
+    return results, _worker_best_response.cache.take_updates(), _worker_best_response.cache_hits - hits
+
+
+def exploitability(
+    agent_type: AgentType = AgentType.PPO,
+    agent_kwargs: Optional[dict] = None,
+    opponent_type: AgentType = AgentType.RANDOM_PLAYER,
+    opponent_kwargs: Optional[dict] = None,
+    num_opponents: int = 1,
+    agent_seat: int = 0,
+    seeds: Optional[List[int]] = None,
+    rollouts: int = 16,
+    sample_rate: float = 1.0,
+    num_processes: int = os.cpu_count() or 1,
+    cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+) -> ExploitabilityReport:
+    """
+    Estimates how many points an agent leaves on the table against fixed opponents.
+
+    Args:
+        agent_type (AgentType): Type of the agent, e.g. PPO with `agent_kwargs={"actor_path": ...}`.
+        agent_kwargs (dict, optional): Extra arguments of the agent.
+        opponent_type (AgentType): Type of all opponents, whose policy must not change between runs
+            sharing a cache.
+        opponent_kwargs (dict, optional): Extra arguments of the opponents.
+        num_opponents (int): Number of opponents.
+        agent_seat (int): Seat of the agent; seat 0 plays first.
+        seeds (list[int]): One game per seed. Defaults to seeds 0..99.
+        rollouts (int): Rollouts per action.
+        sample_rate (float): Share of the agent's decisions that are scored.
+        num_processes (int): Size of the process pool.
+        cache_path (str, optional): Position cache, loaded before and saved after the run. Set to
+            None to disable caching.
+
+    Returns:
+        ExploitabilityReport: The aggregated results.
+    """
+    seeds = list(range(100)) if seeds is None else list(seeds)
+    agent = AgentType(agent_type).value
+    opponent = AgentType(opponent_type).value
+    opponent_kwargs = opponent_kwargs or {}
+    config = (opponent, tuple(sorted(opponent_kwargs.items())), num_opponents)
+    cache = PositionCache.load(cache_path, config) if cache_path is not None else PositionCache(config)
+
+    init_args = (agent, agent_kwargs or {}, opponent, opponent_kwargs, num_opponents, agent_seat, rollouts, cache)
+    analyze = partial(_analyze_seeds, sample_rate=sample_rate)
+    num_processes = max(1, min(num_processes, len(seeds)))
+    # a few chunks per process balances the load without much IPC
+    chunk_size = max(1, math.ceil(len(seeds) / (num_processes * 4)))
+    chunks = [seeds[i:i + chunk_size] for i in range(0, len(seeds), chunk_size)]
+    if num_processes == 1:
+        _init_worker(*init_args)
+        outputs = [analyze(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(num_processes, initializer=_init_worker, initargs=init_args) as pool:
+            outputs = list(pool.map(analyze, chunks))
+
+    results = []
+    cache_hits = 0
+    for chunk_results, updates, hits in outputs:
+        results.extend(chunk_results)
+        cache.merge(updates)
+        cache_hits += hits
+    if cache_path is not None:
+        cache.save(cache_path)
+
+    return summarize(
+        results,
+        sample_rate,
+        agent_type=agent,
+        opponent_type=opponent,
+        num_opponents=num_opponents,
+        agent_seat=agent_seat,
+        cache_hits=cache_hits,
+        cache_size=len(cache),
+    )
+
+
+def print_report(report: ExploitabilityReport):
+    print("-" * 50)
+    print(f"Best response of {report.num_games} games against {report.num_opponents} "
+          f"{report.opponent_type} opponent(s), agent in seat {report.agent_seat}")
+    print("-" * 50)
+    print(f"Decisions scored:   {report.num_decisions} ({report.cache_hits} from cache)")
+    print(f"Agent value:        {report.agent_value:.3f}")
+    print(f"Best response:      {report.best_response_value:.3f}")
+    print(f"Gap per decision:   {report.mean_gap:.3f} ± {1.96 * report.gap_stderr:.3f}")
+    print(f"Gap per game:       {report.gap_per_game:.3f}")
+    print(f"Best action rate:   {report.best_action_rate:.1%}")
+    print("-" * 50)
+
+
+def run_cli():
+    parser = argparse.ArgumentParser(description="Estimate how much a trained actor leaves on the table.")
+    parser.add_argument("--actor", type=str, default="models/actor.pt")
+    parser.add_argument("--opponent", type=str, default=AgentType.RANDOM_PLAYER.value,
+                        choices=[t.value for t in AgentType])
+    parser.add_argument("--opponents", type=int, default=1, help="Number of opponents.")
+    parser.add_argument("--seat", type=int, default=0, help="Seat of the agent, 0 plays first.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed-start", type=int, default=0)
+    parser.add_argument("--rollouts", type=int, default=16, help="Rollouts per action.")
+    parser.add_argument("--sample-rate", type=float, default=1.0, help="Share of the decisions scored.")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--cache", type=str, default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    report = exploitability(
+        agent_type=AgentType.PPO,
+        agent_kwargs={"actor_path": args.actor},
+        opponent_type=AgentType(args.opponent),
+        num_opponents=args.opponents,
+        agent_seat=args.seat,
+        seeds=range(args.seed_start, args.seed_start + args.games),
+        rollouts=args.rollouts,
+        sample_rate=args.sample_rate,
+        num_processes=args.processes,
+        cache_path=None if args.no_cache else args.cache,
+    )
+    print_report(report)
+
+
+if __name__ == "__main__":
+    run_cli()
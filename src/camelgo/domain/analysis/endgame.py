@@ -0,0 +1,282 @@
+"""Implements an exact solver for the last turns of a race.
+
+Once the race is sure to end with the dice left in the pyramid, only a handful of dice rolls are
+left, so the rest of the race is expanded completely instead of sampled: every chance node (which
+dice leaves the pyramid and the value it shows) is enumerated with `enumerate_leg`, and the
+searches of the current leg and of every later leg are memoized. `is_endgame` flags these states.
+
+The solver assumes every remaining turn is a dice roll, so the only randomness left is the dice.
+Branches are followed for at most `max_legs` legs and layouts less likely than `min_probability`
+at the end of a leg are not followed; the probability of both is reported as `unresolved`. A later
+leg costs a full enumeration per board, so searching past the current leg takes seconds. A search
+that stops before the race ends cannot value game bets, which can then be valued with the
+winner and loser probabilities of a `RaceForecaster` instead.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from camelgo.domain.analysis.forecast import LegForecast, RaceForecaster
+from camelgo.domain.analysis.leg_distribution import NUM_RACING as _NUM_RACING, LegDistribution, enumerate_leg
+from camelgo.domain.environment.action import ActionInt
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.game_config import Color, GameConfig
+from camelgo.domain.environment.symmetry import CanonicalCache, Symmetry, canonicalize
+from camelgo.domain.environment.transitions import (
+    Board, CAMEL_INDEX, LegState, RACING_INDICES, TILE_BOO, TILE_CHEER
+)
+
+
+# a racing camel this close to the finish line (or closer) can cross it with a single dice
+ENDGAME_DISTANCE = max(GameConfig.DICE_VALUES)
+# probability that the race outlasts the current leg, up to which a state counts as an endgame
+ENDGAME_TOLERANCE = 1e-3
+
+
+class RaceDistribution(NamedTuple):
+    """Outcome probabilities of a leg state, indexed like the racing camels of its board."""
+    winner: Tuple[float, ...]
+    loser: Tuple[float, ...]
+    leg_first: Tuple[float, ...]  # first at the end of the current leg (or of the race)
+    leg_second: Tuple[float, ...]
+    tile_hits: Tuple[float, ...]  # expected number of camels landing on each tile in the current leg
+    landings: frozenset  # tiles a camel can land on in the current leg
+    unresolved: float
+
+
+class EndgameSolution(BaseModel):
+    """Exact outcome probabilities and action values of a position near the finish line."""
+    player: str
+    winner_probabilities: Dict[Color, float]
+    loser_probabilities: Dict[Color, float]
+    leg_first_probabilities: Dict[Color, float]
+    leg_second_probabilities: Dict[Color, float]
+    unresolved: float  # probability of the branches left out of the search
+    action_values: Dict[int, float]  # legal action -> expected final score of the player
+    best_action: int
+
+
+def is_endgame(game: Game, distance: int = ENDGAME_DISTANCE, tolerance: float = ENDGAME_TOLERANCE) -> bool:
+    """
+    True if the game is running, a racing camel is within `distance` tiles of crossing the finish
+    line and the race ends in the current leg with probability at least `1 - tolerance`, so that
+    `EndgameSolver` leaves at most `tolerance` unresolved.
+    """
+    if game.finished:
+        return False
+    leader = max(game.current_leg.camel_states[c].track_pos for c in GameConfig.CAMEL_COLORS)
+    if GameConfig.BOARD_SIZE - leader >= distance:
+        return False
+    # the current leg alone takes milliseconds to enumerate
+    return enumerate_leg(LegState.from_game(game)).finish_probability() >= 1 - tolerance
+
+
+class EndgameSolver:
+    """
+    Expands the rest of the race from a game state and values every legal action.
+
+    The current leg is enumerated from the leg state; every later leg starts with all the dice in
+    the pyramid and no tiles, so its outcome only depends on the board and is memoized per board.
+    Both are keyed on canonical forms (camels relabelled from the last to the leading one), so the
+    tile actions and later turns of the same game mostly hit the caches.
+    """
+
+    def __init__(self, max_legs: int = 1, min_probability: float = 1e-9, forecaster: Optional[RaceForecaster] = None):
+        """
+        Args:
+            max_legs (int): Number of legs searched, the current one included.
+            min_probability (float): Layouts less likely than this at the end of a leg are not searched further.
+            forecaster (RaceForecaster, optional): Values the game bets with its forecast of the race
+                instead of the search, which leaves unresolved every race going on after `max_legs`.
+        """
+        self.max_legs = max_legs
+        self.min_probability = min_probability
+        self.forecaster = forecaster
+        # (canonical board at the start of a leg, legs searched) -> winner, loser, unresolved
+        self._continuations: Dict[Tuple[Board, int], Tuple[Tuple[float, ...], Tuple[float, ...], float]] = {}
+        # translating the board would change how far the camels are from the finish line
+        self.cache: CanonicalCache[RaceDistribution] = CanonicalCache(self._expand, translate=False)
+
+    def _search(self, leg: LegDistribution, legs: int) -> Tuple[List[float], List[float], float]:
+        """Winner, loser and unresolved probabilities of a leg followed by `legs` more legs."""
+        winner, loser = (values.tolist() for values in leg.race_outcomes())
+        unresolved = 0.0
+        for (board, q), finished in zip(leg.boards(), leg.finished.tolist()):
+            if finished:
+                continue
+            if legs == 0 or q < self.min_probability:
+                unresolved += q
+                continue
+            next_winner, next_loser, next_unresolved = self._continuation(board, legs)
+            for i in RACING_INDICES:
+                winner[i] += q * next_winner[i]
+                loser[i] += q * next_loser[i]
+            unresolved += q * next_unresolved
+        return winner, loser, unresolved
+
+    def _continuation(self, board: Board, legs: int) -> Tuple[Tuple[float, ...], Tuple[float, ...], float]:
+        """
+        Winner and loser probabilities, and unresolved probability, of a race that starts a new leg
+        on `board` and is searched for `legs` legs.
+        """
+        state = LegState(board, (True,) * _NUM_RACING, True, (0,) * _NUM_RACING)
+        canonical, symmetry = canonicalize(state, translate=False)
+        key = (canonical.board, legs)
+        result = self._continuations.get(key)
+        if result is None:
+            winner, loser, unresolved = self._search(enumerate_leg(canonical), legs - 1)
+            result = self._continuations[key] = (tuple(winner), tuple(loser), unresolved)
+        winner, loser, unresolved = result
+        return (
+            tuple(winner[symmetry.camel(i)] for i in RACING_INDICES),
+            tuple(loser[symmetry.camel(i)] for i in RACING_INDICES),
+            unresolved,
+        )
+
+    def _expand(self, state: LegState) -> RaceDistribution:
+        leg = enumerate_leg(state)
+        winner, loser, unresolved = self._search(leg, self.max_legs - 1)
+        ranks = leg.rank_probabilities()
+        return RaceDistribution(
+            winner=tuple(winner),
+            loser=tuple(loser),
+            leg_first=tuple(ranks[:, 0].tolist()),
+            leg_second=tuple(ranks[:, 1].tolist()),
+            tile_hits=tuple(leg.tile_hits[pos] for pos, _ in state.tiles),
+            landings=leg.landings,
+            unresolved=unresolved,
+        )
+
+    def distribution(self, state: LegState) -> RaceDistribution:
+        """
+        Outcome probabilities of a leg state.
+
+        Args:
+            state (LegState): The state, leg bet tickets are ignored.
+
+        Returns:
+            RaceDistribution: Indexed like the racing camels of `state.board`.
+        """
+        result, symmetry = self.cache.lookup(state._replace(bets_taken=(0,) * _NUM_RACING))
+        return _map_back(result, symmetry)
+
+    def solve(self, game: Game, player: Optional[str] = None) -> EndgameSolution:
+        """
+        Computes the outcome probabilities and the value of every legal action of a player.
+
+        The value of an action is the expected final score of the player if every later turn is
+        a dice roll. Points from later rolls of the player are not counted, and neither is the
+        rule that penalties cannot take a player below zero points. With a forecaster, every game
+        bet is valued with the forecast of the position before the action.
+
+        Args:
+            game (Game): The game, hidden game bets included.
+            player (str): The player to move, defaults to the player whose turn it is.
+
+        Returns:
+            EndgameSolution: The probabilities and action values.
+        """
+        player = player or game.current_leg.next_player
+        state = LegState.from_game(game)
+        base = self.distribution(state)
+        race = self.forecaster.forecast_state(state) if self.forecaster is not None else base
+        base_score = _expected_score(game, player, state, base, race)
+        mask = game.get_action_mask(player)
+
+        values = {}
+        if mask[ActionInt.ROLL_DICE.value]:
+            # rolling does not change the expectation of any bet, it only earns a point
+            values[ActionInt.ROLL_DICE.value] = base_score + 1
+        for i, color in enumerate(GameConfig.CAMEL_COLORS):
+            camel = CAMEL_INDEX[color]
+            action = ActionInt.LEG_BET_BLUE.value + i
+            if mask[action]:
+                ticket = GameConfig.BET_VALUES[state.bets_taken[camel]]
+                values[action] = base_score + _leg_bet_value(ticket, base, camel)
+            action = ActionInt.GAME_WINNER_BET_BLUE.value + i
+            if mask[action]:
+                payout = _game_bet_payout(len(game.hidden_game_winner_bets[color]))
+                values[action] = base_score + _game_bet_value(payout, race.winner[camel], race.unresolved)
+            action = ActionInt.GAME_LOSER_BET_BLUE.value + i
+            if mask[action]:
+                payout = _game_bet_payout(len(game.hidden_game_loser_bets[color]))
+                values[action] = base_score + _game_bet_value(payout, race.loser[camel], race.unresolved)
+        for pos in range(1, GameConfig.BOARD_SIZE + 1):
+            for effect, first_action in ((TILE_CHEER, ActionInt.CHEERING_TILE_POS_1), (TILE_BOO, ActionInt.BOOING_TILE_POS_1)):
+                action = first_action.value + pos - 1
+                if not mask[action]:
+                    continue
+                if pos not in base.landings:
+                    # no camel can land on the tile before the end of the leg
+                    values[action] = base_score
+                    continue
+                tiled_state = state._replace(tiles=tuple(sorted(state.tiles + ((pos, effect),))))
+                tiled = self.distribution(tiled_state)
+                hits = tiled.tile_hits[tiled_state.tiles.index((pos, effect))]
+                values[action] = _expected_score(game, player, tiled_state, tiled, race) + hits
+
+        return EndgameSolution(
+            player=player,
+            winner_probabilities=_by_color(base.winner),
+            loser_probabilities=_by_color(base.loser),
+            leg_first_probabilities=_by_color(base.leg_first),
+            leg_second_probabilities=_by_color(base.leg_second),
+            unresolved=base.unresolved,
+            action_values=values,
+            best_action=max(values, key=values.get),
+        )
+
+
+def _map_back(result: RaceDistribution, symmetry: Symmetry) -> RaceDistribution:
+    def original(values):
+        return tuple(values[symmetry.camel(i)] for i in RACING_INDICES)
+
+    return result._replace(
+        winner=original(result.winner),
+        loser=original(result.loser),
+        leg_first=original(result.leg_first),
+        leg_second=original(result.leg_second),
+    )
+
+
+def _by_color(values: Tuple[float, ...]) -> Dict[Color, float]:
+    return {color: values[CAMEL_INDEX[color]] for color in GameConfig.CAMEL_COLORS}
+
+
+def _leg_bet_value(ticket: int, distribution: RaceDistribution, camel: int) -> float:
+    first = distribution.leg_first[camel]
+    second = distribution.leg_second[camel]
+    return ticket * first + second - (1 - first - second)
+
+
+def _game_bet_payout(earlier_bets: int) -> int:
+    points = GameConfig.CORRECT_GAME_BET_POINTS
+    return points[earlier_bets] if earlier_bets < len(points) else 0
+
+
+def _game_bet_value(payout: int, probability: float, unresolved: float) -> float:
+    # branches left out of the search count neither as a win nor as a loss
+    return payout * probability - GameConfig.INCORRECT_GAME_BET_PENALTY * (1 - unresolved - probability)
+
+
+def _expected_score(
+    game: Game, player: str, state: LegState, distribution: RaceDistribution, race: Union[RaceDistribution, LegForecast],
+) -> float:
+    """Expected final score of a player from the bets and tiles already on the table, game bets valued with `race`."""
+    leg = game.current_leg
+    score = game.players[player].points + leg.leg_points[player]
+    owned = {(pos, TILE_CHEER) for pos, owner in leg.cheering_tiles if owner == player}
+    owned |= {(pos, TILE_BOO) for pos, owner in leg.booing_tiles if owner == player}
+    for t, tile in enumerate(state.tiles):
+        if tile in owned:
+            score += distribution.tile_hits[t]
+    for color, tickets in leg.player_bets[player].items():
+        for ticket in tickets:
+            score += _leg_bet_value(ticket, distribution, CAMEL_INDEX[color])
+    for bets, probabilities in ((game.hidden_game_winner_bets, race.winner), (game.hidden_game_loser_bets, race.loser)):
+        for color, names in bets.items():
+            if player in names:
+                payout = _game_bet_payout(names.index(player))
+                score += _game_bet_value(payout, probabilities[CAMEL_INDEX[color]], race.unresolved)
+    return score
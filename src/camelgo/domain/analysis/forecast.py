@@ -0,0 +1,236 @@
+"""Implements a multi-leg forecast of the final winner and loser of the race.
+
+Every leg is a transition from the camel stack configurations at its start to the configurations
+at its end (or to a finished race). The current leg is enumerated exactly with `enumerate_leg`.
+The rest of the race from a board at the start of a leg, its continuation, only depends on that
+board, so it is memoized per canonical board and reused by every later forecast whose leg can end
+on it. Boards without a memoized continuation run the later legs together on the whole
+distribution of configurations: boards are packed into int64 codes, every roll of the leg is
+applied to all boards with `apply_roll_batch`, and identical configurations are merged after each
+roll. Propagating a board on its own costs about as much as propagating all of them together, so
+only forecasts of a state at the start of a leg add continuations.
+
+Far from the finish line the configurations spread over millions of boards within a couple of
+legs. Configurations less likely than a pruning threshold are resampled instead of dropped, which
+keeps the forecast unbiased while bounding its size; close to the finish line nothing falls below
+the threshold and the forecast is exact.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from camelgo.domain.analysis.leg_distribution import (
+    FULL_MASK, MASK_BITS, NUM_RACING, dice_mask, enumerate_leg, leg_over, merge, ranking_keys, roll_all
+)
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.game_config import Color, GameConfig
+from camelgo.domain.environment.symmetry import CanonicalCache
+from camelgo.domain.environment.transitions import (
+    CAMEL_INDEX, LegState, RACING_INDICES, decode_boards, encode_board, encode_boards
+)
+
+
+class LegForecast(NamedTuple):
+    """Forecast of a leg state, indexed like the racing camels of its board."""
+    winner: Tuple[float, ...]
+    loser: Tuple[float, ...]
+    unresolved: float  # probability that the race goes on after max_legs
+    legs: Tuple[float, ...]  # probability that the race ends in the current leg, the next one, ...
+
+
+class RaceForecast(BaseModel):
+    """
+    Final winner and loser probabilities of a game.
+
+    The probabilities are over every race, so each set sums to one minus `unresolved`, the
+    probability that the race goes on after the legs searched.
+    """
+    winner_probabilities: Dict[Color, float]
+    loser_probabilities: Dict[Color, float]
+    unresolved: float
+    leg_probabilities: Tuple[float, ...]  # probability that the race ends in the current leg, the next one, ...
+
+
+class RaceForecaster:
+    """
+    Forecasts the end of the race from leg states, memoized on their canonical form (camels
+    relabelled from the last to the leading one).
+    """
+
+    def __init__(self, min_probability: float = 1e-4, max_legs: Optional[int] = None, seed: int = 0):
+        """
+        Args:
+            min_probability (float): Pruning threshold, configurations less likely than this after a
+                roll of a later leg are resampled. The number of configurations stays below about
+                1 / min_probability, and the forecast is exact when none falls below it.
+            max_legs (int): Stop after this many legs, the current one included; the probability of
+                the race going on is reported as unresolved. None runs until the race finished.
+            seed (int): Seed of the pruning, so forecasts are reproducible.
+        """
+        self.min_probability = min_probability
+        self.max_legs = max_legs
+        self.seed = seed
+        # (code of the canonical board at the start of a leg, legs searched) -> forecast of the rest of the race
+        self._continuations: Dict[Tuple[int, Optional[int]], LegForecast] = {}
+        # translating the board would change how far the camels are from the finish line
+        self.cache: CanonicalCache[LegForecast] = CanonicalCache(self._forecast, translate=False)
+
+    def _prune(self, codes: np.ndarray, probabilities: np.ndarray, rng: np.random.Generator):
+        """
+        Systematic resampling of the unlikely configurations: they are lined up, grouped by their
+        leading and trailing racing camel, and every configuration reached by a comb of teeth
+        `min_probability` apart is kept with probability `min_probability`. Every configuration
+        keeps its probability in expectation and the total probability is preserved up to one tooth.
+        """
+        unlikely = np.flatnonzero(probabilities < self.min_probability)
+        if not len(unlikely):
+            return codes, probabilities
+        tracks, stacks = decode_boards(codes[unlikely] >> MASK_BITS)
+        order = ranking_keys(tracks, stacks)
+        unlikely = unlikely[np.lexsort((order.argmin(axis=1), order.argmax(axis=1)))]
+        teeth = (np.cumsum(probabilities[unlikely]) + rng.random() * self.min_probability) // self.min_probability
+        kept = np.diff(teeth, prepend=0) > 0
+        probabilities[unlikely] = np.where(kept, self.min_probability, 0.0)
+        nonzero = probabilities > 0
+        return codes[nonzero], probabilities[nonzero]
+
+    def _propagate(self, tracks: np.ndarray, stacks: np.ndarray, probabilities: np.ndarray, legs: Optional[int]) -> LegForecast:
+        """
+        Forecast of races that start a new leg on the given boards, weighted by their probabilities
+        and searched for `legs` legs (None until they finished).
+        """
+        winner = np.zeros(NUM_RACING)
+        loser = np.zeros(NUM_RACING)
+        finished_in_legs = []
+        unresolved = 0.0
+        rng = np.random.default_rng(self.seed)
+
+        masks = np.full(len(probabilities), FULL_MASK, dtype=np.int64)
+        finished_in_leg = 0.0
+        while len(probabilities):
+            # tiles go back to their owners at the end of the leg
+            tracks, stacks, masks, probabilities, _ = roll_all(tracks, stacks, masks, probabilities)
+
+            finished = (tracks[:, :NUM_RACING] > GameConfig.BOARD_SIZE).any(axis=1)
+            if finished.any():
+                keys = ranking_keys(tracks[finished], stacks[finished])
+                p = probabilities[finished]
+                winner += np.bincount(keys.argmax(axis=1), weights=p, minlength=NUM_RACING)
+                loser += np.bincount(keys.argmin(axis=1), weights=p, minlength=NUM_RACING)
+                finished_in_leg += float(p.sum())
+                tracks, stacks, masks, probabilities = (
+                    tracks[~finished], stacks[~finished], masks[~finished], probabilities[~finished]
+                )
+
+            # every configuration holds the same number of dice, so they all end the leg together
+            ended = len(masks) and leg_over(int(masks[0]))
+            if ended:
+                masks[:] = FULL_MASK
+            codes, probabilities = merge(encode_boards(tracks, stacks) << MASK_BITS | masks, probabilities)
+            codes, probabilities = self._prune(codes, probabilities, rng)
+
+            if ended or not len(probabilities):
+                finished_in_legs.append(finished_in_leg)
+                finished_in_leg = 0.0
+                if legs is not None and len(finished_in_legs) >= legs:
+                    unresolved += float(probabilities.sum())
+                    break
+            masks = codes & FULL_MASK
+            tracks, stacks = decode_boards(codes >> MASK_BITS)
+        return LegForecast(tuple(winner.tolist()), tuple(loser.tolist()), unresolved, tuple(finished_in_legs))
+
+    def _continuation(self, code: int, legs: Optional[int]) -> LegForecast:
+        """Forecast of a race that starts a new leg on the canonical board `code`, searched for `legs` legs."""
+        key = (code, legs)
+        if key not in self._continuations:
+            tracks, stacks = decode_boards(np.array([code], dtype=np.int64))
+            board = tuple(zip(tracks[0].tolist(), stacks[0].tolist()))
+            state = LegState(board, (True,) * NUM_RACING, True, (0,) * NUM_RACING)
+            self._continuations[key] = self._expand(state, legs)
+        return self._continuations[key]
+
+    def _expand(self, state: LegState, legs: Optional[int]) -> LegForecast:
+        """Forecast of a leg state searched for `legs` legs, the current one included."""
+        leg = enumerate_leg(state)
+        winner, loser = (values.astype(float) for values in leg.race_outcomes())
+        later = [leg.finish_probability()]
+        unfinished = ~leg.finished
+        tracks, stacks, probabilities = leg.tracks[unfinished], leg.stacks[unfinished], leg.probabilities[unfinished]
+        if legs == 1 or not len(probabilities):
+            return LegForecast(tuple(winner.tolist()), tuple(loser.tolist()), float(probabilities.sum()), tuple(later))
+
+        next_legs = None if legs is None else legs - 1
+        order = _canonical_order(tracks, stacks)
+        rows = np.arange(len(order))[:, None]
+        codes = encode_boards(tracks[rows, order], stacks[rows, order]).tolist()
+        known = np.array([(code, next_legs) in self._continuations for code in codes], dtype=bool)
+        parts = [(self._continuation(codes[i], next_legs), float(probabilities[i]), order[i]) for i in np.flatnonzero(known)]
+        rest = self._propagate(tracks[~known], stacks[~known], probabilities[~known].copy(), next_legs)
+        parts.append((rest, 1.0, np.arange(NUM_RACING)))
+
+        unresolved = 0.0
+        for forecast, q, camels in parts:
+            # canonical racing camel j is camel camels[j] of this board
+            winner[camels[:NUM_RACING]] += q * np.array(forecast.winner)
+            loser[camels[:NUM_RACING]] += q * np.array(forecast.loser)
+            unresolved += q * forecast.unresolved
+            later = _add(later, [0.0] + [q * p for p in forecast.legs])
+        return LegForecast(tuple(winner.tolist()), tuple(loser.tolist()), unresolved, tuple(later))
+
+    def _forecast(self, state: LegState) -> LegForecast:
+        if dice_mask(state) == FULL_MASK and not state.tiles:
+            return self._continuation(encode_board(state.board), self.max_legs)
+        return self._expand(state, self.max_legs)
+
+    def forecast_state(self, state: LegState) -> LegForecast:
+        """
+        Forecast of a leg state.
+
+        Args:
+            state (LegState): The state, leg bet tickets are ignored.
+
+        Returns:
+            LegForecast: Indexed like the racing camels of `state.board`.
+        """
+        result, symmetry = self.cache.lookup(state._replace(bets_taken=(0,) * NUM_RACING))
+        return result._replace(
+            winner=tuple(result.winner[symmetry.camel(i)] for i in RACING_INDICES),
+            loser=tuple(result.loser[symmetry.camel(i)] for i in RACING_INDICES),
+        )
+
+    def forecast(self, game: Game) -> RaceForecast:
+        """
+        Forecasts the final winner and loser of a game, assuming every remaining turn is a dice roll.
+
+        Args:
+            game (Game): The game.
+
+        Returns:
+            RaceForecast: The forecast.
+        """
+        result = self.forecast_state(LegState.from_game(game))
+        return RaceForecast(
+            winner_probabilities={c: result.winner[CAMEL_INDEX[c]] for c in GameConfig.CAMEL_COLORS},
+            loser_probabilities={c: result.loser[CAMEL_INDEX[c]] for c in GameConfig.CAMEL_COLORS},
+            unresolved=result.unresolved,
+            leg_probabilities=result.legs,
+        )
+
+
+def _canonical_order(tracks: np.ndarray, stacks: np.ndarray) -> np.ndarray:
+    """
+    (N, NUM_CAMELS) camels of every board in the order of their canonical slots: the racing camels,
+    then the crazy camels, each from the last to the leading one (see `canonicalize`).
+    """
+    keys = tracks.astype(np.int64) * GameConfig.NUM_CAMELS + stacks
+    return np.concatenate(
+        [np.argsort(keys[:, :NUM_RACING], axis=1), NUM_RACING + np.argsort(keys[:, NUM_RACING:], axis=1)], axis=1
+    )
+
+
+def _add(a: List[float], b: List[float]) -> List[float]:
+    if len(a) < len(b):
+        a, b = b, a
+    return [x + (b[k] if k < len(b) else 0.0) for k, x in enumerate(a)]
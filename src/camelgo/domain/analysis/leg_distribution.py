@@ -0,0 +1,203 @@
+"""Implements the exact distribution of the camel layouts at the end of a leg.
+
+The rest of a leg is enumerated in a single batched pass: every possible roll is applied to every
+layout reached so far with `apply_roll_batch`, and identical layouts are merged after each roll.
+The layouts at the end of the leg are kept in a sparse form (sorted int64 board codes with their
+probabilities), from which the per-camel marginals, the leg rankings and the winner of a race that
+finishes during the leg are all read.
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from camelgo.domain.environment.dice import Dice
+from camelgo.domain.environment.game_config import GameConfig
+from camelgo.domain.environment.leg import Leg
+from camelgo.domain.environment.transitions import (
+    Board, CRAZY_INDICES, LegState, MAX_TRACK_POS, RACING_INDICES, TILE_NONE, apply_roll_batch,
+    decode_boards, encode_board, encode_boards, tile_effects
+)
+
+
+NUM_RACING = len(RACING_INDICES)
+# bit i of a dice mask is set while the dice of racing camel i is in the pyramid, the last bit for the grey dice
+GREY_BIT = 1 << NUM_RACING
+FULL_MASK = (1 << (NUM_RACING + 1)) - 1
+MASK_BITS = NUM_RACING + 1
+
+
+def dice_mask(state: LegState) -> int:
+    mask = sum(1 << i for i in RACING_INDICES if state.racing_dice[i])
+    return mask | (GREY_BIT if state.grey_dice else 0)
+
+
+def leg_over(mask: int) -> bool:
+    """The leg ends when at most one dice is left in the pyramid."""
+    return bin(mask).count("1") <= 1
+
+
+def ranking_keys(tracks: np.ndarray, stacks: np.ndarray) -> np.ndarray:
+    """(N, NUM_RACING) keys ordering the racing camels of every layout, the highest one leads."""
+    return tracks[:, :NUM_RACING].astype(np.int64) * GameConfig.NUM_CAMELS + stacks[:, :NUM_RACING]
+
+
+def roll_all(
+    tracks: np.ndarray, stacks: np.ndarray, masks: np.ndarray, probabilities: np.ndarray,
+    effects: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Applies every possible roll to every layout.
+
+    All layouts must hold the same number of dice.
+
+    Returns:
+        The tracks, stacks, dice masks and probabilities after each roll, and the position the
+        moving camel reached before any tile effect.
+    """
+    num_dice = bin(int(masks[0])).count("1")
+    results = []
+    for camel in range(GameConfig.NUM_CAMELS):
+        bit = GREY_BIT if camel in CRAZY_INDICES else 1 << camel
+        rows = (masks & bit) != 0
+        if not rows.any():
+            continue
+        # the grey dice moves either crazy camel
+        weight = 1 / (num_dice * len(GameConfig.DICE_VALUES) * (2 if camel in CRAZY_INDICES else 1))
+        for value in GameConfig.DICE_VALUES:
+            new_tracks, new_stacks, landings = apply_roll_batch(tracks[rows], stacks[rows], camel, value, effects)
+            results.append((new_tracks, new_stacks, masks[rows] & ~bit, probabilities[rows] * weight, landings))
+    return tuple(np.concatenate(column) for column in zip(*results))
+
+
+def merge(codes: np.ndarray, probabilities: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sums the probabilities of identical codes, returned sorted."""
+    codes, inverse = np.unique(codes, return_inverse=True)
+    return codes, np.bincount(inverse.ravel(), weights=probabilities, minlength=len(codes))
+
+
+class LegDistribution:
+    """
+    Joint distribution of the camel layouts at the end of a leg, or when the race finishes during it.
+
+    Layouts are board codes (see `encode_boards`) sorted in increasing order, so a layout is looked
+    up by binary search.
+    """
+
+    def __init__(self, codes: np.ndarray, probabilities: np.ndarray, tile_hits: Dict[int, float], landings: frozenset):
+        self.codes = codes
+        self.probabilities = probabilities
+        self.tile_hits = tile_hits  # tile position -> expected number of camels landing on it
+        self.landings = landings  # positions a camel can land on before the end of the leg
+        self.tracks, self.stacks = decode_boards(codes)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def probability(self, board: Board) -> float:
+        code = encode_board(board)
+        i = np.searchsorted(self.codes, code)
+        return float(self.probabilities[i]) if i < len(self.codes) and self.codes[i] == code else 0.0
+
+    def boards(self) -> Iterable[Tuple[Board, float]]:
+        """Yields (board, probability) of every layout."""
+        for tracks, stacks, p in zip(self.tracks.tolist(), self.stacks.tolist(), self.probabilities.tolist()):
+            yield tuple(zip(tracks, stacks)), p
+
+    def most_likely(self, n: int) -> Iterable[Tuple[Board, float]]:
+        order = np.argsort(-self.probabilities, kind="stable")[:n]
+        for i in order:
+            yield tuple(zip(self.tracks[i].tolist(), self.stacks[i].tolist())), float(self.probabilities[i])
+
+    @property
+    def finished(self) -> np.ndarray:
+        """Per layout, True if the race finished during the leg."""
+        return (self.tracks[:, :NUM_RACING] > GameConfig.BOARD_SIZE).any(axis=1)
+
+    def finish_probability(self) -> float:
+        return float(self.probabilities[self.finished].sum())
+
+    def track_marginals(self) -> np.ndarray:
+        """(NUM_CAMELS, MAX_TRACK_POS + 1) probabilities of every camel ending on every track position."""
+        return self._marginals(self.tracks, MAX_TRACK_POS + 1)
+
+    def stack_marginals(self) -> np.ndarray:
+        """(NUM_CAMELS, NUM_CAMELS) probabilities of every camel ending at every stack position."""
+        return self._marginals(self.stacks, GameConfig.NUM_CAMELS)
+
+    def _marginals(self, values: np.ndarray, size: int) -> np.ndarray:
+        num_camels = values.shape[1]
+        index = (np.arange(num_camels) * size + values).ravel()
+        weights = np.repeat(self.probabilities, num_camels)
+        return np.bincount(index, weights=weights, minlength=num_camels * size).reshape(num_camels, size)
+
+    def rank_probabilities(self) -> np.ndarray:
+        """(NUM_RACING, NUM_RACING) probabilities of every racing camel ending the leg at every rank, first rank first."""
+        ranks = np.argsort(np.argsort(-ranking_keys(self.tracks, self.stacks), axis=1), axis=1)
+        index = (np.arange(NUM_RACING) * NUM_RACING + ranks).ravel()
+        weights = np.repeat(self.probabilities, NUM_RACING)
+        return np.bincount(index, weights=weights, minlength=NUM_RACING ** 2).reshape(NUM_RACING, NUM_RACING)
+
+    def race_outcomes(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Probabilities of every racing camel winning and losing the race during the leg."""
+        finished = self.finished
+        keys = ranking_keys(self.tracks[finished], self.stacks[finished])
+        p = self.probabilities[finished]
+        return (
+            np.bincount(keys.argmax(axis=1), weights=p, minlength=NUM_RACING),
+            np.bincount(keys.argmin(axis=1), weights=p, minlength=NUM_RACING),
+        )
+
+
+def enumerate_leg(state: LegState) -> LegDistribution:
+    """
+    Enumerates the rest of a leg in a single pass.
+
+    Args:
+        state (LegState): The state of the leg.
+
+    Returns:
+        LegDistribution: The layouts at the end of the leg. Layouts on which the race finished
+        are the layouts at that moment.
+    """
+    tracks, stacks = (a[None] for a in np.array(state.board, dtype=np.int8).T)
+    masks = np.array([dice_mask(state)], dtype=np.int64)
+    probabilities = np.ones(1)
+    effects = tile_effects(state.tiles) if state.tiles else None
+    tile_hits = {pos: 0.0 for pos, _ in state.tiles}
+    landings = set()
+    ended_codes, ended_probabilities = [], []
+    while len(probabilities) and not leg_over(int(masks[0])):
+        tracks, stacks, masks, probabilities, reached = roll_all(tracks, stacks, masks, probabilities, effects)
+        landings.update(np.unique(reached).tolist())
+        if effects is not None:
+            hit = effects[np.clip(reached, 0, MAX_TRACK_POS)] != TILE_NONE
+            for pos, p in zip(*merge(reached[hit].astype(np.int64), probabilities[hit])):
+                tile_hits[int(pos)] += float(p)
+        codes = encode_boards(tracks, stacks)
+        ended = (tracks[:, :NUM_RACING] > GameConfig.BOARD_SIZE).any(axis=1)
+        if ended.any():
+            ended_codes.append(codes[ended])
+            ended_probabilities.append(probabilities[ended])
+        codes, probabilities = merge(codes[~ended] << MASK_BITS | masks[~ended], probabilities[~ended])
+        masks = codes & FULL_MASK
+        tracks, stacks = decode_boards(codes >> MASK_BITS)
+    codes, probabilities = merge(
+        np.concatenate(ended_codes + [encode_boards(tracks, stacks)]),
+        np.concatenate(ended_probabilities + [probabilities]),
+    )
+    return LegDistribution(codes, probabilities, tile_hits, frozenset(landings))
+
+
+def leg_distribution(leg: Leg, dice_rolled: Iterable[Dice] = ()) -> LegDistribution:
+    """
+    Distribution of the camel layouts at the end of a leg.
+
+    Args:
+        leg (Leg): The leg.
+        dice_rolled (Iterable[Dice]): The dice already rolled in the leg.
+
+    Returns:
+        LegDistribution: The layouts at the end of the leg.
+    """
+    return enumerate_leg(LegState.from_leg(leg, dice_rolled))
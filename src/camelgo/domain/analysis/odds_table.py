@@ -0,0 +1,287 @@
+"""Implements a precomputed, memory-mapped table of exact leg odds.
+
+The table maps canonical leg states (camels relabelled and translated, see `canonicalize`) to the
+probabilities of every racing camel ending the leg at every rank, and of the race finishing during
+the leg. It is an open-addressing hash table stored as a structured `.npy` file and opened with
+`mmap_mode="r"`: a lookup reads one or two slots of the file, and all the processes of a machine
+share its pages through the page cache.
+
+The builder enumerates the canonical states of the opening leg, every starting layout with every
+sequence of rolls, and adds the most common canonical states of the camel and tile configurations
+seen in simulated games, each expanded to all its remaining-dice sets. The odds of every state are
+computed exactly with `enumerate_leg`. States missing from the table are computed on the fly and
+memoized in memory, up to a bounded number of the most recently used ones.
+
+    python -m camelgo.domain.analysis.odds_table --opening-depth 4 --games 200 --max-entries 200000
+"""
+
+import argparse
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import itertools
+import os
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+from camelgo.domain.analysis.leg_distribution import NUM_RACING, enumerate_leg
+from camelgo.domain.environment.action import Action, ActionInt
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.game_config import GameConfig
+from camelgo.domain.environment.start_positions import start_position_table
+from camelgo.domain.environment.symmetry import canonicalize
+from camelgo.domain.environment.transitions import (
+    CRAZY_INDICES, LegState, RACING_INDICES, apply_roll, board_from_camels, tiles_from_leg
+)
+
+
+DEFAULT_ODDS_TABLE_PATH = "models/leg_odds.npy"
+DEFAULT_MAX_COMPUTED = 20000  # odds computed on the fly and kept in memory, about 1 KB each
+ODDS_TABLE_VERSION = b"leg-odds-v1"  # salts the keys, a table of another version only misses
+ODDS_DTYPE = np.dtype([
+    ("key", "<u8"),  # 0 marks an empty slot
+    ("rank", "<f4", (NUM_RACING, NUM_RACING)),
+    ("finish", "<f4"),
+])
+
+
+class LegOdds(NamedTuple):
+    """Odds of a leg, indexed like the racing camels of its board."""
+    rank: np.ndarray  # (NUM_RACING, NUM_RACING) probabilities of every racing camel ending the leg at every rank
+    finish: float  # probability that the race finishes during the leg
+
+    def leg_bet_value(self, camel: int, ticket: int) -> float:
+        """Expected points of a leg bet ticket on a racing camel."""
+        first, second = float(self.rank[camel, 0]), float(self.rank[camel, 1])
+        return ticket * first + second - (1 - first - second)
+
+
+def odds_key(canonical: LegState) -> int:
+    """Key of a canonical state in the table; leg bet tickets do not change the odds and are ignored."""
+    material = repr((canonical.board, canonical.racing_dice, canonical.grey_dice, canonical.tiles)).encode()
+    digest = hashlib.blake2b(material, digest_size=8, person=ODDS_TABLE_VERSION).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+def compute_leg_odds(state: LegState) -> LegOdds:
+    """Exact odds of a leg state by enumeration."""
+    distribution = enumerate_leg(state)
+    return LegOdds(distribution.rank_probabilities(), distribution.finish_probability())
+
+
+def canonical_state(state: LegState) -> LegState:
+    return canonicalize(state._replace(bets_taken=(0,) * NUM_RACING))[0]
+
+
+class LegOddsTable:
+    """
+    Leg odds from a table built by `build_odds_table`, computed on the fly for states it misses.
+
+    Without a table file every lookup is computed on the fly.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_ODDS_TABLE_PATH, max_computed: int = DEFAULT_MAX_COMPUTED):
+        """
+        Args:
+            path (str, optional): The table file, memory-mapped if it exists.
+            max_computed (int): States missing from the table whose odds are kept in memory, the
+                least recently used ones are dropped first.
+        """
+        self.path = path
+        self.records = np.load(path, mmap_mode="r") if path and os.path.exists(path) else None
+        self._keys = self.records["key"] if self.records is not None else None
+        self.max_computed = max_computed
+        self._computed: OrderedDict[LegState, LegOdds] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _find(self, key: int) -> Optional[int]:
+        # linear probing from the home slot until the key or an empty slot
+        mask = len(self._keys) - 1
+        slot = key & mask
+        while True:
+            found = int(self._keys[slot])
+            if found == key:
+                return slot
+            if found == 0:
+                return None
+            slot = (slot + 1) & mask
+
+    def canonical_odds(self, canonical: LegState) -> LegOdds:
+        """Odds of a canonical state."""
+        slot = self._find(odds_key(canonical)) if self._keys is not None else None
+        if slot is not None:
+            self.hits += 1
+            record = self.records[slot]
+            return LegOdds(np.array(record["rank"], dtype=np.float64), float(record["finish"]))
+        self.misses += 1
+        odds = self._computed.get(canonical)
+        if odds is None:
+            odds = self._computed[canonical] = compute_leg_odds(canonical)
+            if len(self._computed) > self.max_computed:
+                self._computed.popitem(last=False)
+        else:
+            self._computed.move_to_end(canonical)
+        return odds
+
+    def odds(self, state: LegState) -> LegOdds:
+        """
+        Odds of a leg state.
+
+        Args:
+            state (LegState): The state.
+
+        Returns:
+            LegOdds: Indexed like the racing camels of `state.board`.
+        """
+        canonical, symmetry = canonicalize(state._replace(bets_taken=(0,) * NUM_RACING))
+        odds = self.canonical_odds(canonical)
+        return odds._replace(rank=odds.rank[[symmetry.camel(i) for i in RACING_INDICES]])
+
+    def game_odds(self, game: Game) -> LegOdds:
+        return self.odds(LegState.from_game(game))
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def dice_sets(min_dice: int = 2):
+    """Every (racing dice, grey dice) left in the pyramid with at least `min_dice` dice."""
+    for racing_dice in itertools.product((False, True), repeat=NUM_RACING):
+        for grey_dice in (False, True):
+            if sum(racing_dice) + grey_dice >= min_dice:
+                yield racing_dice, grey_dice
+
+
+def _successors(state: LegState):
+    for camel in range(len(state.board)):
+        crazy = camel in CRAZY_INDICES
+        if not (state.grey_dice if crazy else state.racing_dice[camel]):
+            continue
+        racing_dice = state.racing_dice if crazy else tuple(d and i != camel for i, d in enumerate(state.racing_dice))
+        for value in GameConfig.DICE_VALUES:
+            board, _ = apply_roll(state.board, camel, value, state.tiles)
+            yield LegState(board, racing_dice, state.grey_dice and not crazy, state.bets_taken, state.tiles)
+
+
+def opening_states(depth: int) -> List[LegState]:
+    """The canonical states of the opening leg after up to `depth` rolls, fewer rolls first."""
+    table = start_position_table()
+    level = {
+        canonical_state(LegState(tuple(map(tuple, layout)), (True,) * NUM_RACING, True, (0,) * NUM_RACING))
+        for layout in table.layouts.tolist()
+    }
+    states = sorted(level)
+    for _ in range(depth):
+        level = {canonical_state(successor) for state in level for successor in _successors(state)}
+        states.extend(sorted(level))
+    return states
+
+
+def collect_states(num_games: int, seed: int = 0) -> Counter:
+    """
+    Counts the canonical states of the camel and tile configurations seen in simulated games between
+    random players, every configuration expanded to all its remaining-dice sets.
+    """
+    configurations = Counter()
+    rng = np.random.default_rng(seed)
+    game = Game.start_game(["A", "B", "C", "D"])
+    for game_seed in range(seed, seed + num_games):
+        game.reset(seed=game_seed)
+        while not game.finished:
+            leg = game.current_leg
+            configurations[board_from_camels(leg.camel_states), tiles_from_leg(leg.cheering_tiles, leg.booing_tiles)] += 1
+            player = leg.next_player
+            action_int = int(rng.choice(np.flatnonzero(game.get_action_mask(player))))
+            action = Action.from_int(action_int, player)
+            if action_int == ActionInt.ROLL_DICE.value:
+                action.dice_rolled = game.roll_dice()
+            game.play_action(action)
+
+    states = Counter()
+    for (board, tiles), count in configurations.items():
+        for racing_dice, grey_dice in dice_sets():
+            states[canonical_state(LegState(board, racing_dice, grey_dice, (0,) * NUM_RACING, tiles))] += count
+    return states
+
+
+def write_odds_table(path: str, states: List[LegState], odds: List[LegOdds]) -> None:
+    """Writes canonical states and their odds as an open-addressing table, at most half full."""
+    capacity = 1 << max(1, (2 * len(states)).bit_length())
+    records = np.zeros(capacity, dtype=ODDS_DTYPE)
+    mask = capacity - 1
+    for state, state_odds in zip(states, odds):
+        key = odds_key(state)
+        slot = key & mask
+        while records["key"][slot] not in (0, key):
+            slot = (slot + 1) & mask
+        records[slot] = (key, state_odds.rank, state_odds.finish)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # written aside first, processes that mapped the previous table keep reading it
+    with open(f"{path}.tmp", "wb") as f:
+        np.save(f, records)
+    os.replace(f"{path}.tmp", path)
+
+
+def build_odds_table(
+    path: str = DEFAULT_ODDS_TABLE_PATH,
+    opening_depth: Optional[int] = 4,
+    num_games: int = 200,
+    max_entries: int = 200_000,
+    seed: int = 0,
+    num_processes: int = os.cpu_count() or 1,
+) -> int:
+    """
+    Builds the table of the opening leg and of the most common leg states of simulated games.
+
+    Args:
+        path (str): The table file.
+        opening_depth (int, optional): Rolls of the opening leg enumerated, 4 covers the whole leg.
+            None leaves the opening out.
+        num_games (int): Simulated games the common states are collected from.
+        max_entries (int): Number of canonical states kept, the opening ones first.
+        seed (int): Seed of the simulated games.
+        num_processes (int): Size of the process pool computing the odds.
+
+    Returns:
+        int: Number of states in the table.
+    """
+    states = opening_states(opening_depth)[:max_entries] if opening_depth is not None else []
+    known = set(states)
+    for state, _ in collect_states(num_games, seed).most_common():
+        if len(states) >= max_entries:
+            break
+        if state not in known:
+            states.append(state)
+            known.add(state)
+    if num_processes > 1:
+        with ProcessPoolExecutor(num_processes) as pool:
+            odds = list(pool.map(compute_leg_odds, states, chunksize=64))
+    else:
+        odds = [compute_leg_odds(state) for state in states]
+    write_odds_table(path, states, odds)
+    return len(states)
+
+
+def run_cli():
+    parser = argparse.ArgumentParser(description="Build the memory-mapped table of leg odds.")
+    parser.add_argument("--output", type=str, default=DEFAULT_ODDS_TABLE_PATH)
+    parser.add_argument("--opening-depth", type=int, default=4, help="Rolls of the opening leg enumerated.")
+    parser.add_argument("--games", type=int, default=200, help="Simulated games the states are collected from.")
+    parser.add_argument("--max-entries", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    num_entries = build_odds_table(
+        args.output, args.opening_depth, args.games, args.max_entries, args.seed, args.processes
+    )
+    print(f"Wrote the odds of {num_entries} leg states to {args.output}")
+
+
+if __name__ == "__main__":
+    run_cli()
@@ -0,0 +1,192 @@
+"""Implements an opening book of the first decision of a game, precomputed for every starting layout.
+
+Until somebody rolls, bets on a leg or places a tile, the position a player faces in the first leg
+is the starting layout itself, whatever their seat. There are 30240 starting layouts but only 126
+up to a relabelling of the camels (see `canonicalize`), so the book stores the best action of each
+canonical layout, valued exactly by `EndgameSolver` over the whole first leg, and a lookup is a
+canonicalization and a dictionary read. The race cannot end in the first leg, so the game bets are
+valued with the winner and loser probabilities of a `RaceForecaster`.
+
+The book is a small `.npz` file of the canonical boards, their action values and best actions. No
+book is shipped; building one takes about 5 s per layout, some ten minutes in all:
+
+    python -m camelgo.domain.analysis.opening_book --output models/opening_book.npz
+"""
+
+import argparse
+from functools import lru_cache
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from camelgo.domain.analysis.endgame import EndgameSolver
+from camelgo.domain.analysis.forecast import RaceForecaster
+from camelgo.domain.environment.action import Action, ActionInt
+from camelgo.domain.environment.camel import Camel
+from camelgo.domain.environment.dice import DiceRoller
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.game_config import GameConfig
+from camelgo.domain.environment.leg import Leg
+from camelgo.domain.environment.player import Player
+from camelgo.domain.environment.start_positions import start_position_table
+from camelgo.domain.environment.symmetry import Symmetry, canonicalize
+from camelgo.domain.environment.transitions import Board, LegState, RACING_INDICES
+
+
+DEFAULT_OPENING_BOOK_PATH = "models/opening_book.npz"
+
+# first action of every group of actions taking a racing camel, in GameConfig.CAMEL_COLORS order
+_CAMEL_ACTIONS = (ActionInt.LEG_BET_BLUE, ActionInt.GAME_WINNER_BET_BLUE, ActionInt.GAME_LOSER_BET_BLUE)
+
+
+def is_opening(game: Game, player: str) -> bool:
+    """True if the player faces the starting layout: first leg, no roll, leg bet or tile yet, and no game bet of their own."""
+    leg = game.current_leg
+    if game.finished or game.legs_played or game.dice_roller.dices_rolled or leg.cheering_tiles or leg.booing_tiles:
+        return False
+    if any(player in names for bets in (game.hidden_game_winner_bets, game.hidden_game_loser_bets) for names in bets.values()):
+        return False
+    return all(len(leg.camel_states[color].available_bets) == len(GameConfig.BET_VALUES) for color in GameConfig.CAMEL_COLORS)
+
+
+def opening_board(game: Game) -> Tuple[Board, Symmetry]:
+    """Canonical starting layout of a game and the symmetry mapping the game's camels to it."""
+    canonical, symmetry = canonicalize(LegState.from_game(game), translate=False)
+    return canonical.board, symmetry
+
+
+def map_action(action: int, permute) -> int:
+    """Maps an action through a relabelling of the racing camels, `permute(camel) -> camel`."""
+    for first in _CAMEL_ACTIONS:
+        if first.value <= action < first.value + len(RACING_INDICES):
+            return first.value + permute(action - first.value)
+    # rolls and tiles do not depend on the labels, canonical layouts are not translated
+    return action
+
+
+def opening_game(board: Board, player_names: List[str]) -> Game:
+    """A new game on a given starting layout, first player first."""
+    players = {name: Player(name=name) for name in player_names}
+    # bottom camels first on each tile, like the camels of a new game
+    camels = sorted(
+        (Camel(color=color, track_pos=track_pos, stack_pos=stack_pos)
+         for color, (track_pos, stack_pos) in zip(GameConfig.ALL_CAMEL_COLORS, board)),
+        key=lambda camel: (camel.track_pos, camel.stack_pos),
+    )
+    return Game(
+        dice_roller=DiceRoller(),
+        players=players,
+        current_leg=Leg(players=players, camel_states={camel.color: camel for camel in camels}, next_player=player_names[0]),
+        next_leg_starting_player=player_names[0],
+    )
+
+
+def opening_values(solver: EndgameSolver, board: Board) -> np.ndarray:
+    """Values of every action on a starting layout, NaN for the illegal ones."""
+    game = opening_game(board, [f"Player_{seat + 1}" for seat in range(GameConfig.MIN_PLAYERS)])
+    values = np.full(Game.NUM_ACTIONS, np.nan)
+    for action, value in solver.solve(game).action_values.items():
+        values[action] = value
+    return values
+
+
+class OpeningBook:
+    """
+    Best first actions by canonical starting layout, read from a book built by `build_opening_book`.
+
+    Without a book file every lookup misses and agents decide as usual.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_OPENING_BOOK_PATH):
+        """
+        Args:
+            path (str, optional): The book file, loaded if it exists.
+        """
+        self.path = path
+        self.entries: Dict[Board, Tuple[int, np.ndarray]] = {}
+        if path and os.path.exists(path):
+            with np.load(path) as book:
+                for board, action, values in zip(book["boards"].tolist(), book["actions"].tolist(), book["values"]):
+                    self.entries[tuple(map(tuple, board))] = (action, values)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def best_action(self, game: Game, player: str) -> Optional[int]:
+        """
+        The book action of a player, or None if the game is past its opening or the book misses it.
+
+        Args:
+            game (Game): The game.
+            player (str): The player to move.
+
+        Returns:
+            int, optional: The action, for the camels of `game`.
+        """
+        if not self.entries or not is_opening(game, player):
+            return None
+        board, symmetry = opening_board(game)
+        entry = self.entries.get(board)
+        if entry is None:
+            return None
+        return map_action(entry[0], symmetry.original_camel)
+
+    def play(self, game: Game, player: str) -> Optional[Action]:
+        action = self.best_action(game, player)
+        return Action.from_int(action, player) if action is not None else None
+
+
+@lru_cache(maxsize=None)
+def shared_opening_book(path: str = DEFAULT_OPENING_BOOK_PATH) -> OpeningBook:
+    """One book per file and process."""
+    return OpeningBook(path)
+
+
+def opening_boards() -> List[Board]:
+    """The canonical starting layouts, sorted."""
+    return sorted({
+        canonicalize(LegState(tuple(map(tuple, layout)), (True,) * len(RACING_INDICES), True, (0,) * len(RACING_INDICES)), translate=False)[0].board
+        for layout in start_position_table().layouts.tolist()
+    })
+
+
+def build_opening_book(
+    path: str = DEFAULT_OPENING_BOOK_PATH, max_boards: Optional[int] = None, forecaster: Optional[RaceForecaster] = None,
+) -> int:
+    """
+    Values every action of every canonical starting layout and writes the book.
+
+    Args:
+        path (str): The book file.
+        max_boards (int, optional): Only the first boards, for tests.
+        forecaster (RaceForecaster, optional): Values the game bets, defaults to a `RaceForecaster()`.
+
+    Returns:
+        int: Number of layouts in the book.
+    """
+    boards = opening_boards()[:max_boards]
+    # the race cannot finish in the first leg, the forecast values the game bets instead of a deeper search
+    solver = EndgameSolver(max_legs=1, forecaster=forecaster if forecaster is not None else RaceForecaster())
+    values = np.array([opening_values(solver, board) for board in boards], dtype=np.float32)
+    actions = np.nanargmax(values, axis=1).astype(np.uint8)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.tmp", "wb") as f:
+        np.savez_compressed(f, boards=np.array(boards, dtype=np.int8), actions=actions, values=values)
+    os.replace(f"{path}.tmp", path)
+    return len(boards)
+
+
+def run_cli():
+    parser = argparse.ArgumentParser(description="Build the opening book of first decisions.")
+    parser.add_argument("--output", type=str, default=DEFAULT_OPENING_BOOK_PATH)
+    args = parser.parse_args()
+
+    num_boards = build_opening_book(args.output)
+    print(f"Wrote the best first actions of {num_boards} starting layouts to {args.output}")
+
+
+if __name__ == "__main__":
+    run_cli()
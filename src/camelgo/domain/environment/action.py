@@ -75,9 +75,8 @@ class Action(BaseModel):
 	game_winner_bet: Optional[Color] = None # color of the camel the player bets to win the game
 	game_loser_bet: Optional[Color] = None # color of the camel the player bets to lose the game
 
-	@classmethod
-	def to_int(cls, self) -> int:
-		"""Convert the action to its corresponding integer representation."""
+	def to_int(self) -> int:
+		"""Convert the action to its corresponding integer representation, the inverse of `from_int`."""
 		if self.dice_rolled is not None:
 			return ActionInt.ROLL_DICE.value
 		if self.leg_bet is not None:
@@ -108,61 +107,34 @@ class Action(BaseModel):
 			}
 			return color_to_action[self.game_loser_bet].value
 		if self.cheering_tile_placed is not None:
-			return ActionInt(f'CHEERING_TILE_POS_{self.cheering_tile_placed}').value
+			return ActionInt[f'CHEERING_TILE_POS_{self.cheering_tile_placed}'].value
 		if self.booing_tile_placed is not None:
-			return ActionInt(f'BOOING_TILE_POS_{self.booing_tile_placed}').value
-		raise ValueError("Invalid action: No valid action found.")
+			return ActionInt[f'BOOING_TILE_POS_{self.booing_tile_placed}'].value
+		# a roll chosen by a player carries no dice yet, see `from_int`
+		return ActionInt.ROLL_DICE.value
 	
 	@classmethod
 	def from_int(cls, action_int: int, player: str) -> 'Action':
 		"""Create an Action instance from its integer representation."""
-		action_enum = ActionInt(action_int)
-		if action_enum == ActionInt.ROLL_DICE:
-			# TODO: Update to include dice rolled information when actual dice is moved out from action
-			return Action(player=player)
-		elif action_enum in {
-			ActionInt.LEG_BET_BLUE, ActionInt.LEG_BET_YELLOW, ActionInt.LEG_BET_GREEN,
-			ActionInt.LEG_BET_PURPLE, ActionInt.LEG_BET_RED
-		}:
-			color_map = {
-				ActionInt.LEG_BET_BLUE: Color.BLUE,
-				ActionInt.LEG_BET_YELLOW: Color.YELLOW,
-				ActionInt.LEG_BET_GREEN: Color.GREEN,
-				ActionInt.LEG_BET_PURPLE: Color.PURPLE,
-				ActionInt.LEG_BET_RED: Color.RED,
-			}
-			return Action(player=player, leg_bet=color_map[action_enum])
-		elif action_enum in {
-			ActionInt.GAME_WINNER_BET_BLUE, ActionInt.GAME_WINNER_BET_YELLOW,
-			ActionInt.GAME_WINNER_BET_GREEN, ActionInt.GAME_WINNER_BET_PURPLE,
-			ActionInt.GAME_WINNER_BET_RED
-		}:
-			color_map = {
-				ActionInt.GAME_WINNER_BET_BLUE: Color.BLUE,
-				ActionInt.GAME_WINNER_BET_YELLOW: Color.YELLOW,
-				ActionInt.GAME_WINNER_BET_GREEN: Color.GREEN,
-				ActionInt.GAME_WINNER_BET_PURPLE: Color.PURPLE,
-				ActionInt.GAME_WINNER_BET_RED: Color.RED,
-			}
-			return Action(player=player, game_winner_bet=color_map[action_enum])
-		elif action_enum in {
-			ActionInt.GAME_LOSER_BET_BLUE, ActionInt.GAME_LOSER_BET_YELLOW,
-			ActionInt.GAME_LOSER_BET_GREEN, ActionInt.GAME_LOSER_BET_PURPLE,
-			ActionInt.GAME_LOSER_BET_RED
-		}:
-			color_map = {
-				ActionInt.GAME_LOSER_BET_BLUE: Color.BLUE,
-				ActionInt.GAME_LOSER_BET_YELLOW: Color.YELLOW,
-				ActionInt.GAME_LOSER_BET_GREEN: Color.GREEN,
-				ActionInt.GAME_LOSER_BET_PURPLE: Color.PURPLE,
-				ActionInt.GAME_LOSER_BET_RED: Color.RED,
-			}
-			return Action(player=player, game_loser_bet=color_map[action_enum])
-		elif action_enum.name.startswith('CHEERING_TILE_POS_'):
-			position = int(action_enum.name.split('_')[-1])
-			return Action(player=player, cheering_tile_placed=position)
-		elif action_enum.name.startswith('BOOING_TILE_POS_'):
-			position = int(action_enum.name.split('_')[-1])
-			return Action(player=player, booing_tile_placed=position)
-		else:
+		if not 0 <= action_int < len(_ACTION_FIELDS):
 			raise ValueError(f"Invalid action integer: {action_int}")
+		# TODO: Update the roll to include dice rolled information when actual dice is moved out from action
+		return Action(player=player, **_ACTION_FIELDS[action_int])
+
+
+def _action_fields(action_enum: ActionInt) -> dict:
+	name = action_enum.name
+	if action_enum == ActionInt.ROLL_DICE:
+		return {}
+	if name.startswith('CHEERING_TILE_POS_'):
+		return {"cheering_tile_placed": int(name.split('_')[-1])}
+	if name.startswith('BOOING_TILE_POS_'):
+		return {"booing_tile_placed": int(name.split('_')[-1])}
+	for prefix, field in (('LEG_BET_', 'leg_bet'), ('GAME_WINNER_BET_', 'game_winner_bet'), ('GAME_LOSER_BET_', 'game_loser_bet')):
+		if name.startswith(prefix):
+			return {field: Color(name[len(prefix):].lower())}
+	raise ValueError(f"Invalid action integer: {action_enum.value}")
+
+
+# the fields of the action of every integer, looked up instead of parsed at every step
+_ACTION_FIELDS = [_action_fields(action_enum) for action_enum in ActionInt]
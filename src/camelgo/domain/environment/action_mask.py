@@ -0,0 +1,86 @@
+"""Implements legal-action masks for a batch of (game, player) pairs.
+
+The rules of `Game.get_action_mask` are evaluated on arrays: the state each rule needs (tickets
+taken per camel, game bets of the player, tiles and camel positions) is gathered from every game
+into a few flat index lists, and the masks of the whole batch are computed from them at once.
+The state shared by all players is gathered once per game, however many players of it the batch holds.
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+
+from camelgo.domain.environment.action import ActionInt
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.game_config import GameConfig
+
+
+NUM_COLORS = len(GameConfig.CAMEL_COLORS)
+COLOR_INDEX = {color: i for i, color in enumerate(GameConfig.CAMEL_COLORS)}
+LEG_BET = ActionInt.LEG_BET_BLUE.value
+GAME_WINNER_BET = ActionInt.GAME_WINNER_BET_BLUE.value
+GAME_LOSER_BET = ActionInt.GAME_LOSER_BET_BLUE.value
+CHEERING_TILE = ActionInt.CHEERING_TILE_POS_1.value
+BOOING_TILE = ActionInt.BOOING_TILE_POS_1.value
+# track positions 0 to BOARD_SIZE + 1, camels past the finish line are clipped to the last one
+NUM_POSITIONS = GameConfig.BOARD_SIZE + 2
+
+
+def batch_action_masks(games: Sequence[Game], players: Sequence[str]) -> np.ndarray:
+    """
+    Legal-action masks of many (game, player) pairs, same rules as `Game.get_action_mask`.
+
+    Args:
+        games (Sequence[Game]): The games, a game can appear more than once.
+        players (Sequence[str]): The player of every game.
+
+    Returns:
+        np.ndarray: (len(games), Game.NUM_ACTIONS) boolean masks, True for legal actions.
+    """
+    n = len(games)
+    # index of every distinct game, the shared state is gathered once per game
+    game_index = {}
+    rows = np.array([game_index.setdefault(id(game), len(game_index)) for game in games], dtype=np.int64)
+    unique_games = list({id(game): game for game in games}.values())
+
+    # flat indices into (games, NUM_COLORS) and (games, NUM_POSITIONS) arrays
+    tickets, camels, tiles = [], [], []
+    for g, game in enumerate(unique_games):
+        leg = game.current_leg
+        for bets in leg.player_bets.values():
+            for color, values in bets.items():
+                tickets.extend([g * NUM_COLORS + COLOR_INDEX[color]] * len(values))
+        offset = g * NUM_POSITIONS
+        camels.extend(offset + min(camel.track_pos, NUM_POSITIONS - 1) for camel in leg.camel_states.values())
+        tiles.extend(offset + pos for pos, _ in leg.cheering_tiles + leg.booing_tiles)
+    # flat indices into (n, NUM_COLORS) arrays, and rows whose player already placed a tile this leg
+    winner_bets, loser_bets, tile_played = [], [], []
+    for row, (game, player) in enumerate(zip(games, players)):
+        offset = row * NUM_COLORS
+        for flat, bets in ((winner_bets, game.hidden_game_winner_bets), (loser_bets, game.hidden_game_loser_bets)):
+            flat.extend(offset + COLOR_INDEX[color] for color, names in bets.items() if player in names)
+        leg = game.current_leg
+        if any(owner == player for _, owner in leg.cheering_tiles + leg.booing_tiles):
+            tile_played.append(row)
+
+    num_games = len(unique_games)
+    tickets = np.bincount(np.array(tickets, dtype=np.int64), minlength=num_games * NUM_COLORS)
+    occupied = _flags(camels, num_games * NUM_POSITIONS).reshape(num_games, NUM_POSITIONS)
+    tiles = _flags(tiles, num_games * NUM_POSITIONS).reshape(num_games, NUM_POSITIONS)
+    # a tile cannot go on a camel, on another tile or next to another tile
+    tile_allowed = ~(occupied[:, 1:-1] | tiles[:, :-2] | tiles[:, 1:-1] | tiles[:, 2:])[rows]
+    tile_allowed[_flags(tile_played, n)] = False
+
+    masks = np.ones((n, Game.NUM_ACTIONS), dtype=bool)
+    masks[:, LEG_BET:LEG_BET + NUM_COLORS] = tickets.reshape(num_games, NUM_COLORS)[rows] < len(GameConfig.BET_VALUES)
+    masks[:, GAME_WINNER_BET:GAME_WINNER_BET + NUM_COLORS] = ~_flags(winner_bets, n * NUM_COLORS).reshape(n, NUM_COLORS)
+    masks[:, GAME_LOSER_BET:GAME_LOSER_BET + NUM_COLORS] = ~_flags(loser_bets, n * NUM_COLORS).reshape(n, NUM_COLORS)
+    masks[:, CHEERING_TILE:CHEERING_TILE + GameConfig.BOARD_SIZE] = tile_allowed
+    masks[:, BOOING_TILE:BOOING_TILE + GameConfig.BOARD_SIZE] = tile_allowed
+    return masks
+
+
+def _flags(flat: List[int], size: int) -> np.ndarray:
+    flags = np.zeros(size, dtype=bool)
+    flags[np.array(flat, dtype=np.int64)] = True
+    return flags
@@ -1,19 +1,31 @@
-from pydantic import BaseModel, field_validator, model_validator
+from dataclasses import dataclass, field
 from typing import List, Optional
 
 from camelgo.domain.environment.game_config import GameConfig, Color
 
-class Camel(BaseModel):
+
+# every stack of leg bet tickets a camel can have, shared by all camels: taking a ticket moves a
+# camel to the next stack instead of slicing its own, so the stacks are never changed in place
+_TICKET_STACKS = [GameConfig.BET_VALUES] + [
+    GameConfig.BET_VALUES[i:] for i in range(1, len(GameConfig.BET_VALUES) + 1)
+]
+
+@dataclass(slots=True)
+class Camel:
+    """
+    State of a camel. A plain record with slots, written to directly by the engine; the `Leg` and
+    `Game` models holding it validate and dump it like a pydantic model.
+    """
     color: Color  # Unique identifier for the camel (e.g., 'blue', 'yellow')
     track_pos: int  # Current position on the board (tile index, 1-16)
     stack_pos: int  # Stack order (0 = bottom, higher = on top)
 
     # below fields need to be reset at the start of each leg
-    available_bets: List[int] = GameConfig.BET_VALUES  # Next bet values for this camel (5, 3, 2, 2)
+    available_bets: List[int] = field(default_factory=lambda: GameConfig.BET_VALUES)  # Next bet values for this camel (5, 3, 2, 2)
     dice_value: Optional[int] = None  # Result of the camel's dice roll (1-3), None if not rolled yet
     finished: bool = False  # Whether the camel has finished the race
 
-    def _set_track_pos(self, track_pos: int):
+    def _set_track_pos(self, track_pos: int, stack_pos: int):
         if track_pos > GameConfig.BOARD_SIZE:
             # this means game is finished
             self.track_pos = track_pos
@@ -25,19 +37,23 @@ class Camel(BaseModel):
             self.track_pos = GameConfig.BOARD_SIZE
         else:
             self.track_pos = track_pos
+        self.stack_pos = stack_pos
+
+    def copy(self) -> 'Camel':
+        """A copy of the camel, sharing its ticket stack (see `bet`)."""
+        return Camel(self.color, self.track_pos, self.stack_pos, self.available_bets, self.dice_value, self.finished)
 
     def is_crazy(self) -> bool:
         return self.color in GameConfig.CRAZY_CAMELS
 
     def move(self, track_pos: int, stack_pos: int = 0) -> None:
-        self._set_track_pos(track_pos)
-        self.stack_pos = stack_pos
+        self._set_track_pos(track_pos, stack_pos)
 
     def bet(self) -> Optional[int]:
-        if self.available_bets:
-            next_bet = self.available_bets[0]
-            self.available_bets = self.available_bets[1:] if len(self.available_bets) > 1 else []
-            return next_bet
+        available_bets = self.available_bets
+        if available_bets:
+            self.available_bets = _TICKET_STACKS[len(_TICKET_STACKS) - len(available_bets)]
+            return available_bets[0]
         raise ValueError(f"No more bets available for camel {self.color}.")
     
     def dice_rolled(self, value: int) -> None:
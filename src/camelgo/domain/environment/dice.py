@@ -1,8 +1,9 @@
 from pydantic import BaseModel, Field, PrivateAttr
 import random
-from typing import ClassVar, List, Optional, Set
+from typing import ClassVar, Dict, List, Optional, Set, Tuple
 
 from camelgo.domain.environment.game_config import GameConfig, Color
+from camelgo.domain.environment.trusted import construct
 
 class Dice(BaseModel):
     base_color: Color
@@ -16,6 +17,12 @@ class Dice(BaseModel):
         if self.base_color == Color.GREY:
             return self.number_color
         return self.base_color
+
+    @classmethod
+    def of(cls, base_color: Color, number: int, number_color: Optional[Color] = Color.WHITE) -> 'Dice':
+        """The shared instance of a dice face; dice are immutable, so every roll showing it reuses it."""
+        dice = _FACES.get((base_color, number, number_color))
+        return dice if dice is not None else cls(base_color=base_color, number=number, number_color=number_color)
 	
 
 class DiceRoller(BaseModel):
@@ -28,11 +35,12 @@ class DiceRoller(BaseModel):
     DICE_NUMBERS: ClassVar[List[int]] = [1, 2, 3]
     # Grey dice numbers are either in white or black indicating the crazy camel
     GREY_DICE_NUMBER_COLORS: ClassVar[List[Color]] = [Color.WHITE, Color.BLACK]
+    DEFAULT_SEED: ClassVar[int] = 42
 
     _rng: random.Random = PrivateAttr()
     dices_rolled: List[Dice] = Field(default_factory=list)
 
-    def __init__(self, seed: int = 42, **data):
+    def __init__(self, seed: int = DEFAULT_SEED, **data):
         # create a random number generator for reproducibility if needed
         super().__init__(**data)
         self._rng = random.Random(seed)
@@ -45,10 +53,10 @@ class DiceRoller(BaseModel):
         if color == Color.GREY:
             number_color = self._rng.choice(DiceRoller.GREY_DICE_NUMBER_COLORS)
             number = self._rng.choice(DiceRoller.DICE_NUMBERS)
-            dice = Dice(base_color=color, number=number, number_color=number_color)
+            dice = Dice.of(color, number, number_color)
         else:
             number = self._rng.choice(DiceRoller.DICE_NUMBERS)
-            dice = Dice(base_color=color, number=number)
+            dice = Dice.of(color, number)
         self.dices_rolled.append(dice)
         return dice
     
@@ -57,6 +65,7 @@ class DiceRoller(BaseModel):
         rolled_colors = {d.color for d in self.dices_rolled}
         if dice.color in rolled_colors:
             raise ValueError(f"Dice with color {dice.color} has already been rolled.")
+        dice = Dice.of(dice.base_color, dice.number, dice.number_color)
         self.dices_rolled.append(dice)
         return dice
     
@@ -66,12 +75,45 @@ class DiceRoller(BaseModel):
         """
         number_color = self._rng.choice(DiceRoller.GREY_DICE_NUMBER_COLORS)
         number = self._rng.choice(DiceRoller.DICE_NUMBERS)
-        dice = Dice(base_color=Color.GREY, number=number, number_color=number_color)
+        dice = Dice.of(Color.GREY, number, number_color)
         self.dices_rolled.append(dice)
         return dice
 
+    def clone(self, seed: Optional[int] = None) -> 'DiceRoller':
+        """
+        A roller with the same dice rolled, and the same random state unless a seed is given.
+
+        Args:
+            seed (int, optional): Seeds the new roller instead of copying the random state.
+        """
+        if seed is None:
+            rng = random.Random.__new__(random.Random)
+            rng.setstate(self._rng.getstate())
+        else:
+            rng = random.Random(seed)
+        # dice are immutable, the list of dice rolled is the only state to copy
+        return construct(DiceRoller, {"dices_rolled": list(self.dices_rolled)}, private={"_rng": rng})
+
+    def randrange(self, stop: int) -> int:
+        """Draws an integer in [0, stop) from the roller's random number generator."""
+        return self._rng.randrange(stop)
+
     def reset(self) -> None:
         self.dices_rolled = []
 
+    def seed(self, seed: int) -> None:
+        """Restarts the roller as if it was just created with `seed`."""
+        self._rng.seed(seed)
+        self.dices_rolled = []
+
     def remaining_colors(self) -> Set[str]:
         return {c for c in DiceRoller.DICE_COLORS if c not in {d.base_color for d in self.dices_rolled}}
+
+
+# the 3 faces of the 5 coloured dice and the 3 white and 3 black faces of the grey one
+_FACES: Dict[Tuple[Color, int, Color], Dice] = {
+    (color, number, number_color): Dice(base_color=color, number=number, number_color=number_color)
+    for color in DiceRoller.DICE_COLORS
+    for number in DiceRoller.DICE_NUMBERS
+    for number_color in (DiceRoller.GREY_DICE_NUMBER_COLORS if color == Color.GREY else [Color.WHITE])
+}
@@ -1,7 +1,8 @@
 """Implements the Game state for CamelUp."""
 
 from collections import defaultdict
-from typing import ClassVar, Dict, Optional, List, OrderedDict
+import random
+from typing import Any, ClassVar, Dict, Optional, List, OrderedDict
 
 import numpy as np
 from pydantic import BaseModel, model_validator
@@ -11,7 +12,9 @@ from camelgo.domain.environment.camel import Camel
 from camelgo.domain.environment.game_config import GameConfig, Color
 from camelgo.domain.environment.leg import Leg
 from camelgo.domain.environment.player import Player
+from camelgo.domain.environment.trusted import COLORS, assign, construct
 from camelgo.domain.environment.dice import DiceRoller, Dice
+from camelgo.domain.environment.start_positions import start_position_table
 
 class Game(BaseModel):
     """
@@ -20,6 +23,9 @@ class Game(BaseModel):
     model_config = {'arbitrary_types_allowed': True}
 
     NUM_ACTIONS: ClassVar[int] = 48  # Total number of possible actions
+    HIDDEN_BETTOR: ClassVar[str] = ""  # stands for the players ahead of the viewer in the game bets of a clone
+    # check the games built by `from_trusted` against a validation of their data, the tests turn it on
+    strict_construction: ClassVar[bool] = False
 
     dice_roller: DiceRoller
     players: OrderedDict[str, Player]  # Map of player names to player states
@@ -40,22 +46,102 @@ class Game(BaseModel):
             self.hidden_game_loser_bets = defaultdict(list, self.hidden_game_loser_bets)
         return self
 
-    def _distribute_leg_points(self):
-        # determine camels' positions in the leg
-        camels_in_order = sorted(
-            [c for c in self.current_leg.camel_states.values() if not c.is_crazy()],
-            key=lambda c: (c.track_pos, c.stack_pos),
-            reverse=True
+    @classmethod
+    def from_trusted(cls, data: Dict[str, Any], strict: Optional[bool] = None) -> 'Game':
+        """
+        Builds a game from trusted data, e.g. a `model_dump` of a game, without validating it.
+
+        The models are built with `construct` and the defaultdicts are created directly, instead of
+        being validated and then rewrapped by the validators. The players are shared by the game and
+        its leg, as in a game built by `start_game`.
+
+        Args:
+            data (Dict[str, Any]): The game fields, dumped in python or JSON mode.
+            strict (bool, optional): Also validate the data with `model_validate`, and raise a
+                ValueError if the game built from it differs. Defaults to `Game.strict_construction`.
+
+        Returns:
+            Game: Equal to `Game.model_validate(data)`.
+        """
+        # bad data fails the validation before anything is built from it
+        validated = cls.model_validate(data) if (cls.strict_construction if strict is None else strict) else None
+        players = OrderedDict(
+            (name, Player(player["name"], player["points"]))
+            for name, player in data["players"].items()
+        )
+        dice_roller = construct(DiceRoller, {
+            "dices_rolled": [
+                Dice.of(COLORS[dice["base_color"]], dice["number"], COLORS.get(dice["number_color"]))
+                for dice in data["dice_roller"]["dices_rolled"]
+            ],
+        }, private={"_rng": random.Random(DiceRoller.DEFAULT_SEED)})
+        game = construct(cls, {
+            "dice_roller": dice_roller,
+            "players": players,
+            "next_leg_starting_player": data["next_leg_starting_player"],
+            "current_leg": Leg.from_trusted(data["current_leg"], players),
+            "legs_played": data["legs_played"],
+            "finished": data["finished"],
+            "hidden_game_winner_bets": defaultdict(list, {COLORS[c]: list(names) for c, names in data["hidden_game_winner_bets"].items()}),
+            "hidden_game_loser_bets": defaultdict(list, {COLORS[c]: list(names) for c, names in data["hidden_game_loser_bets"].items()}),
+        })
+        if validated is not None and game.model_dump() != validated.model_dump():
+            raise ValueError("Game.from_trusted built a different game than Game.model_validate")
+        return game
+
+    def clone(self, hidden_bets: bool = True, viewer: Optional[str] = None, seed: Optional[int] = None) -> 'Game':
+        """
+        A copy of the game that can be played on without changing the game.
+
+        Only the mutable state is copied: dice, colors, names and ticket stacks are shared.
+
+        Args:
+            hidden_bets (bool): Keep the hidden game bets; without them, only the bets of `viewer`
+                are kept, e.g. to search from the point of view of a player who cannot see the others.
+                The players who bet before the viewer on the same camel become `HIDDEN_BETTOR`, so
+                that the viewer keeps the rank their bet is paid at.
+            viewer (str, optional): The player whose game bets are kept without `hidden_bets`.
+            seed (int, optional): Seeds the dice roller of the copy instead of copying its random state.
+
+        Returns:
+            Game: The copy.
+        """
+        # the players' dict class itself, calling typing's alias costs more than the copies
+        players = type(self.players)(
+            (name, Player(name, player.points))
+            for name, player in self.players.items()
         )
+        bets = []
+        for hidden in (self.hidden_game_winner_bets, self.hidden_game_loser_bets):
+            if hidden_bets:
+                bets.append(defaultdict(list, {color: list(names) for color, names in hidden.items()}))
+            else:
+                bets.append(defaultdict(list, {
+                    color: [self.HIDDEN_BETTOR] * names.index(viewer) + [viewer]
+                    for color, names in hidden.items() if viewer is not None and viewer in names
+                }))
+        return construct(type(self), {
+            "dice_roller": self.dice_roller.clone(seed),
+            "players": players,
+            "next_leg_starting_player": self.next_leg_starting_player,
+            "current_leg": self.current_leg.clone(players),
+            "legs_played": self.legs_played,
+            "finished": self.finished,
+            "hidden_game_winner_bets": bets[0],
+            "hidden_game_loser_bets": bets[1],
+        })
 
+    def _distribute_leg_points(self):
+        leg = self.current_leg
         for player in self.players.values():
-            # distribute leg bets
-            for camel_color, bets in self.current_leg.player_bets[player.name].items():
-                camel = self.current_leg.camel_states.get(camel_color)
-                if not camel:
-                    # this should not happen
+            # distribute leg bets, colors in a fixed order since losses are floored at 0 points one
+            # color at a time
+            player_bets = leg.player_bets.get(player.name, {})
+            for camel_color in GameConfig.CAMEL_COLORS:
+                bets = player_bets.get(camel_color)
+                if not bets or camel_color not in leg.camel_states:
                     continue
-                camel_position = camels_in_order.index(camel) + 1  # 1-based position
+                camel_position = leg.rank(camel_color)
                 if camel_position == 1:
                     player.add_points(sum(bets))
                 elif camel_position == 2:
@@ -68,55 +154,44 @@ class Game(BaseModel):
     def _distribute_game_points(self):
         winner_camel = self.first_camel()
         loser_camel = self.last_camel()
-        # distribute points to the players who knew winner or the loser camel
+        # distribute points to the players who knew winner or the loser camel, hidden bettors of a
+        # clone take their rank but score nothing
         winner_points = GameConfig.CORRECT_GAME_BET_POINTS[:]
         for player_name in self.hidden_game_winner_bets.get(winner_camel.color, []):
-            player = self.players[player_name]
-            player.add_points(winner_points.pop(0) if winner_points else 0)
+            points = winner_points.pop(0) if winner_points else 0
+            if player_name != self.HIDDEN_BETTOR:
+                self.players[player_name].add_points(points)
         loser_points = GameConfig.CORRECT_GAME_BET_POINTS[:]
         for player_name in self.hidden_game_loser_bets.get(loser_camel.color, []):
-            player = self.players[player_name]
-            player.add_points(loser_points.pop(0) if loser_points else 0)
+            points = loser_points.pop(0) if loser_points else 0
+            if player_name != self.HIDDEN_BETTOR:
+                self.players[player_name].add_points(points)
         # collect penalty points from the players who bet on the wrong camels
         for camel_color, player_names in self.hidden_game_winner_bets.items():
             if camel_color == winner_camel.color:
                 continue
             for player_name in player_names:
+                if player_name == self.HIDDEN_BETTOR:
+                    continue
                 player = self.players[player_name]
                 player.add_points(max(-player.points, -GameConfig.INCORRECT_GAME_BET_PENALTY))
         for camel_color, player_names in self.hidden_game_loser_bets.items():
             if camel_color == loser_camel.color:
                 continue
             for player_name in player_names:
+                if player_name == self.HIDDEN_BETTOR:
+                    continue
                 player = self.players[player_name]
                 player.add_points(max(-player.points, -GameConfig.INCORRECT_GAME_BET_PENALTY))
 
     @classmethod
     def _find_camel_start_positions(cls, 
                                     dice_roller: DiceRoller) -> List[Camel]:
-        # roll the dices to determine starting positions of camels
-        dice_roller.reset()
-        for i in range(len(DiceRoller.DICE_COLORS)):
-            dice_roller.roll_dice()
-        dices_rolled = dice_roller.dices_rolled[:]
-        # find first grey dice color
-        first_grey_dice = next(d for d in dice_roller.dices_rolled if d.color == Color.WHITE or d.color == Color.BLACK)
-        second_grey_dice = dice_roller.roll_grey_dice()
-        if first_grey_dice.color == Color.WHITE:
-            second_grey_dice = Dice(base_color=Color.GREY, number=second_grey_dice.number, number_color=Color.BLACK)
-        else:
-            second_grey_dice = Dice(base_color=Color.GREY, number=second_grey_dice.number, number_color=Color.WHITE)
-        dices_rolled.append(second_grey_dice)
+        # Rolling every dice (and the grey one twice) only decides which starting layout we get.
+        # All layouts are enumerated once with their probabilities, so we draw one directly.
         dice_roller.reset()
-
-        camels = []
-        stacks = {i: 0 for i in range(1, GameConfig.BOARD_SIZE + 1)}
-        for dice in dices_rolled:
-            track_pos = dice.number if not GameConfig.is_camel_crazy(dice.color) else GameConfig.BOARD_SIZE - dice.number + 1
-            stack_pos = stacks[track_pos]
-            camels.append(Camel(color=dice.color, track_pos=track_pos, stack_pos=stack_pos))
-            stacks[track_pos] += 1  # Increment stack position for that tile
-        return camels
+        table = start_position_table()
+        return table.camels(table.sample_index(dice_roller))
 
     def _move_to_next_leg_starting_player(self):
         player_names = list(self.players.keys())
@@ -206,20 +281,10 @@ class Game(BaseModel):
             return False
         
     def first_camel(self) -> Camel:
-        camels_in_order = sorted(
-            [c for c in self.current_leg.camel_states.values() if not c.is_crazy()],
-            key=lambda c: (c.track_pos, c.stack_pos),
-            reverse=True
-        )
-        return camels_in_order[0]
+        return self.current_leg.leader()
 
     def last_camel(self) -> Camel:
-        camels_in_order = sorted(
-            [c for c in self.current_leg.camel_states.values() if not c.is_crazy()],
-            key=lambda c: (c.track_pos, c.stack_pos),
-            reverse=False
-        )
-        return camels_in_order[0]
+        return self.current_leg.last_place()
     
     def current_player_points(self, player_name: str) -> int:
         player = self.players[player_name]
@@ -234,22 +299,58 @@ class Game(BaseModel):
             return None
         return max(self.players.values(), key=lambda p: p.points)
 
-    def reset(self):
+    def reset(self, seed: Optional[int] = None):
+        """
+        Starts a new game in place with the same players, first player first.
+
+        The players, leg and camels are recycled instead of validated again. With a seed, the game
+        ends up in the same state as `Game.start_game(player_names, dice_roller=DiceRoller(seed=seed))`.
+
+        Args:
+            seed (int, optional): Reseeds the dice roller; without one, it keeps its random state.
+        """
+        if seed is not None:
+            self.dice_roller.seed(seed)
         self.dice_roller.reset()
-        self.players = {p: Player(name=p) for p in self.players.keys()}
-        self.legs_played = 0
-        self.current_leg = Leg(
+        table = start_position_table()
+        layout = table.layouts[table.sample_index(self.dice_roller)].tolist()
+
+        first_player = next(iter(self.players))
+        for player in self.players.values():
+            player.points = GameConfig.STARTING_MONEY
+        assign(
+            self,
+            legs_played=0,
+            finished=False,
+            next_leg_starting_player=first_player,
+            hidden_game_winner_bets=defaultdict(list),
+            hidden_game_loser_bets=defaultdict(list),
+        )
+
+        leg = self.current_leg
+        camels = leg.camel_states
+        for color, (track_pos, stack_pos) in zip(GameConfig.ALL_CAMEL_COLORS, layout):
+            camel = camels[color]
+            camel.track_pos, camel.stack_pos, camel.finished = track_pos, stack_pos, False
+            camel.reset_for_new_leg()
+        assign(
+            leg,
             leg_number=1,
-            players=self.players,
-            camel_states={camel.color: camel for camel in Game._find_camel_start_positions(self.dice_roller)}
+            next_player=first_player,
+            cheering_tiles=[],
+            booing_tiles=[],
+            leg_points=defaultdict(int),
+            player_bets=defaultdict(lambda: defaultdict(list)),
+            # same order as the camels of a new game, bottom camels first on each tile
+            camel_states=dict(sorted(camels.items(), key=lambda item: (item[1].track_pos, item[1].stack_pos))),
         )
-        self.next_leg_starting_player = 0
-        self.hidden_game_winner_bets = defaultdict(list)
-        self.hidden_game_loser_bets = defaultdict(list)
+        leg.refresh_ranking()
 
-    def get_action_mask(self, player_name) -> np.ndarray:
-        # 1=Valid, 0=Invalid
-        mask = np.ones(Game.NUM_ACTIONS, dtype=bool)
+    def get_action_mask(self, player_name, out: Optional[np.ndarray] = None) -> np.ndarray:
+        # 1=Valid, 0=Invalid, written into `out` if given
+        mask = np.ones(Game.NUM_ACTIONS, dtype=bool) if out is None else out
+        if out is not None:
+            mask.fill(True)
         
         # 0: Roll Dice (Valid unless leg ended, but step handles that. Always valid if turn exists)
         
@@ -13,15 +13,29 @@ from camelgo.domain.environment.game import Game
 from camelgo.domain.environment.game_config import GameConfig
 from camelgo.domain.environment.action import Action
 from camelgo.domain.environment.dice import DiceRoller
+from camelgo.domain.environment.observation import ACTION_DIM, OBSERVATION_DIM, build_observation
 
 
 class CamelGoEnv(gym.Env):
     metadata = {"render_modes": ["ansi"]}
 
-    ACTION_DIM = Game.NUM_ACTIONS
-    OBSERVATION_DIM = 253
-
-    def __init__(self, opponent_type=AgentType.RANDOM_PLAYER, num_opponents=1):
+    ACTION_DIM = ACTION_DIM
+    OBSERVATION_DIM = OBSERVATION_DIM
+
+    def __init__(
+        self, opponent_type=AgentType.RANDOM_PLAYER, num_opponents=1, agent_seat=0, reuse_buffers=False,
+        opponent_kwargs=None,
+    ):
+        """
+        Args:
+            opponent_type (AgentType): Type of the opponents.
+            num_opponents (int): Number of opponents.
+            agent_seat (int): Seat of the agent, seat 0 plays first in the first leg.
+            reuse_buffers (bool): If True, every step returns the same observation and mask arrays,
+                overwritten in place. Only safe when the caller copies them before the next step,
+                as the workers of a torchrl ParallelEnv do.
+            opponent_kwargs (dict, optional): Extra arguments of the opponents, e.g. the policy of PPO opponents.
+        """
         super().__init__()
         
         # Action Space
@@ -34,9 +48,13 @@ class CamelGoEnv(gym.Env):
         self.player_names = [self.agent_name]
         
         self.game: Optional[Game] = None
-        self._create_opponents(num_opponents, opponent_type)
+        self.reuse_buffers = reuse_buffers
+        self._obs = np.zeros(CamelGoEnv.OBSERVATION_DIM, dtype=np.float32)
+        self._mask = np.zeros(CamelGoEnv.ACTION_DIM, dtype=bool)
+        self._create_opponents(num_opponents, opponent_type, opponent_kwargs or {})
+        self._seat_agent(agent_seat)
 
-    def _create_opponents(self, num_opponents, opponent_type):
+    def _create_opponents(self, num_opponents, opponent_type, opponent_kwargs):
         if num_opponents > GameConfig.MAX_PLAYERS - 1:
             raise ValueError(f"Number of opponents {num_opponents} exceeds maximum allowed players {GameConfig.MAX_PLAYERS}.")
         if num_opponents < GameConfig.MIN_PLAYERS - 1:
@@ -46,19 +64,28 @@ class CamelGoEnv(gym.Env):
         for i in range(num_opponents):
             opponent_name = f"Opponent_{i+1}"
             self.player_names.append(opponent_name)
-            opponents[opponent_name] = AgentFactory.create_agent(opponent_type, name=opponent_name)
+            opponents[opponent_name] = AgentFactory.create_agent(opponent_type, name=opponent_name, **opponent_kwargs)
         self.opponents = opponents
 
+    def _seat_agent(self, agent_seat):
+        # seat 0 plays first in the first leg
+        if not 0 <= agent_seat < len(self.player_names):
+            raise ValueError(f"Agent seat {agent_seat} must be between 0 and {len(self.player_names) - 1}.")
+        self.player_names.remove(self.agent_name)
+        self.player_names.insert(agent_seat, self.agent_name)
+        self.agent_seat = agent_seat
+
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
         
-        # Initialize Game
-        dice_roller = DiceRoller(seed=self.np_random_seed)
-        
-        self.game = Game.start_game(
-            player_names=self.player_names,
-            dice_roller=dice_roller
-        )
+        # Initialize Game, later episodes recycle the game of the previous one in place
+        if self.game is None:
+            self.game = Game.start_game(
+                player_names=self.player_names,
+                dice_roller=DiceRoller(seed=self.np_random_seed)
+            )
+        else:
+            self.game.reset(seed=self.np_random_seed)
         
         # If it's not agent's turn, simulate until it is
         self._simulate_opponents()
@@ -97,111 +124,8 @@ class CamelGoEnv(gym.Env):
         return self._get_obs(), reward, terminated, truncated, self._get_info(self.agent_name)
 
     def _get_obs(self) -> np.ndarray:
-        # Construct the 253-dim vector
-        obs = []
-        
-        # 1. Camels (7 * 23 = 161)
-        # Order: Blue, Yellow, Green, Purple, Red, White, Black
-        all_colors = GameConfig.CAMEL_COLORS + GameConfig.CRAZY_CAMELS
-        camel_map = self.game.current_leg.camel_states
-        
-        for color in all_colors:
-            camel = camel_map.get(color)
-            if camel:
-                # Pos One-Hot (16)
-                pos_vec = [0] * 16
-                if 1 <= camel.track_pos <= 16:
-                    pos_vec[camel.track_pos - 1] = 1
-                obs.extend(pos_vec)
-                
-                # Stack One-Hot (7)
-                stack_vec = [0] * 7
-                if 0 <= camel.stack_pos < 7:
-                    stack_vec[camel.stack_pos] = 1
-                obs.extend(stack_vec)
-            else:
-                # Should not happen if initialized correctly
-                obs.extend([0] * 23)
-
-        # 2. Dice (6)
-        # color sequence: 'red', 'blue', 'green', 'yellow', 'purple', 'grey'
-        # TODO: the color sequence is dependent on the DiceRoller implementation
-        remaining_colors = self.game.dice_roller.remaining_colors()
-        for d_color in DiceRoller.DICE_COLORS:
-            obs.append(1.0 if d_color in remaining_colors else 0.0)
-
-        # 3. Leg Bets (5 * 4 = 20)
-        # Next available ticket value for normal camels {None, 2, 3, 5} -> One hot
-        # Logic: check taken bets in leg.
-        for color in GameConfig.CAMEL_COLORS:
-            # Count how many bets placed on this color
-            placed = 0
-            for p in self.game.players.values():
-                if color in self.game.current_leg.player_bets[p.name]:
-                     placed += len(self.game.current_leg.player_bets[p.name][color])
-            
-            next_val = 0 # 0 means None
-            if placed == 0: next_val = 5
-            elif placed == 1: next_val = 3
-            elif placed == 2: next_val = 2
-            elif placed == 3: next_val = 2
-            
-            # One hot [None, 2, 3, 5]
-            val_vec = [0, 0, 0, 0]
-            if next_val == 0: val_vec[0] = 1
-            elif next_val == 2: val_vec[1] = 1
-            elif next_val == 3: val_vec[2] = 1
-            elif next_val == 5: val_vec[3] = 1
-            obs.extend(val_vec)
-            
-        # 4. Board Tiles (16 * 3 = 48)
-        # {Empty, Cheer, Boo}
-        cheer_pos = {pos for pos, _ in self.game.current_leg.cheering_tiles}
-        boo_pos = {pos for pos, _ in self.game.current_leg.booing_tiles}
-        
-        for i in range(1, 17):
-            # TODO: tile_vec size cold be decreased to 2 without accounting Empty explicitly
-            tile_vec = [0, 0, 0] # Empty, Cheer, Boo
-            if i in cheer_pos:
-                tile_vec[1] = 1
-            elif i in boo_pos:
-                tile_vec[2] = 1
-            else:
-                tile_vec[0] = 1
-            obs.extend(tile_vec)
-            
-        # 5. Agent Resources (16)
-        agent = self.game.players[self.agent_name]
-        obs.append(agent.points / 50.0) # Normalize loosely
-        
-        # Agents leg bets held (value sum)
-        current_bets = self.game.current_leg.player_bets[self.agent_name]
-        for color in GameConfig.CAMEL_COLORS:
-            # Sum of bet values held
-            value = sum(current_bets.get(color, []))
-            obs.append(float(value) / 12.0)
-            
-        # Game Winners/Losers placed
-        # We need to check hidden bets for self
-        has_win_bet = [0]*5
-        has_lose_bet = [0]*5
-        for idx, color in enumerate(GameConfig.CAMEL_COLORS):
-             if self.agent_name in self.game.hidden_game_winner_bets[color]:
-                 has_win_bet[idx] = 1.0
-             if self.agent_name in self.game.hidden_game_loser_bets[color]:
-                 has_lose_bet[idx] = 1.0
-        obs.extend(has_win_bet)
-        obs.extend(has_lose_bet)
-        
-        # 6. Aggregates (2)
-        # Global bet counts on Win/Lose
-        win_counts = sum([len(self.game.hidden_game_winner_bets[c]) for c in GameConfig.CAMEL_COLORS])
-        lose_counts = sum([len(self.game.hidden_game_loser_bets[c]) for c in GameConfig.CAMEL_COLORS])
-        # TODO: normalize properly later. it depends on number of players.
-        obs.append(float(win_counts) / 2.0)
-        obs.append(float(lose_counts) / 2.0)
-        
-        return np.array(obs, dtype=np.float32)
+        obs = build_observation(self.game, self.agent_name, self._obs)
+        return obs if self.reuse_buffers else obs.copy()
 
     def _apply_action(self, action: Action):
         # Handle Roll Dice special case, as input Action doesn't have dice value info
@@ -226,4 +150,5 @@ class CamelGoEnv(gym.Env):
             self._apply_action(action)
 
     def _get_info(self, player_name):
-        return {"mask": self.game.get_action_mask(player_name)}
+        mask = self.game.get_action_mask(player_name, out=self._mask)
+        return {"mask": mask if self.reuse_buffers else mask.copy()}
@@ -1,12 +1,14 @@
+from bisect import insort
 from collections import defaultdict
 from pydantic import BaseModel, Field, model_validator
-from typing import Dict, List, Optional, OrderedDict, Tuple, Any
+from typing import Dict, Iterable, List, Optional, OrderedDict, Tuple, Any
 
 from camelgo.domain.environment.action import Action
 from camelgo.domain.environment.camel import Camel
 from camelgo.domain.environment.dice import Dice
 from camelgo.domain.environment.game_config import GameConfig, Color
 from camelgo.domain.environment.player import Player
+from camelgo.domain.environment.trusted import COLORS, assign, construct
 
 
 class Leg(BaseModel):
@@ -31,10 +33,116 @@ class Leg(BaseModel):
             })
         return self
 
+    @classmethod
+    def from_trusted(cls, data: Dict[str, Any], players: Dict[str, Player]) -> 'Leg':
+        """
+        Builds a leg from trusted data, e.g. a `model_dump` of a leg, without validating it.
+
+        Args:
+            data (Dict[str, Any]): The leg fields, dumped in python or JSON mode.
+            players (Dict[str, Player]): The players of the game, shared with the leg.
+
+        Returns:
+            Leg: Equal to `Leg.model_validate(data)`.
+        """
+        camel_states = {
+            COLORS[color]: Camel(
+                COLORS[camel["color"]], camel["track_pos"], camel["stack_pos"],
+                list(camel["available_bets"]), camel["dice_value"], camel["finished"],
+            )
+            for color, camel in data["camel_states"].items()
+        }
+        leg = construct(cls, {
+            "leg_number": data["leg_number"],
+            "players": players,
+            "camel_states": camel_states,
+            "cheering_tiles": [tuple(tile) for tile in data["cheering_tiles"]],
+            "booing_tiles": [tuple(tile) for tile in data["booing_tiles"]],
+            "leg_points": defaultdict(int, data["leg_points"]),
+            "player_bets": defaultdict(lambda: defaultdict(list), {
+                player: defaultdict(list, {COLORS[color]: list(bets) for color, bets in player_bets.items()})
+                for player, player_bets in data["player_bets"].items()
+            }),
+            "next_player": data["next_player"],
+        })
+        leg.refresh_ranking()
+        return leg
+
+    def clone(self, players: Dict[str, Player]) -> 'Leg':
+        """
+        A copy of the leg for a copy of its game, see `Game.clone`.
+
+        Args:
+            players (Dict[str, Player]): The players of the copy of the game, shared with the leg.
+        """
+        leg = construct(type(self), {
+            "leg_number": self.leg_number,
+            "players": players,
+            "camel_states": {color: camel.copy() for color, camel in self.camel_states.items()},
+            "cheering_tiles": list(self.cheering_tiles),
+            "booing_tiles": list(self.booing_tiles),
+            "leg_points": defaultdict(int, self.leg_points),
+            "player_bets": defaultdict(lambda: defaultdict(list), {
+                player: defaultdict(list, {color: list(bets) for color, bets in player_bets.items()})
+                for player, player_bets in self.player_bets.items()
+            }),
+            "next_player": self.next_player,
+        })
+        leg._set_ranking(list(self._ranking))
+        return leg
+
+    # The race order of the racing camels (`_ranking`, leader first) and their ranks (`_ranks`) are
+    # kept up to date as the camels move. They live in the instance dict next to the fields, where
+    # they are copied with the model but not dumped; pydantic private attributes take microseconds
+    # to read.
+    @model_validator(mode="after")
+    def build_ranking(self):
+        self.refresh_ranking()
+        return self
+
+    def _race_key(self, color: Color) -> Tuple[int, int]:
+        # ascending along the race order, so that the leader comes first
+        camel = self.camel_states[color]
+        return -camel.track_pos, -camel.stack_pos
+
+    def refresh_ranking(self) -> None:
+        """Rebuilds the race order, needed only after the camels were moved outside of `play_action`."""
+        racing = [c for c in GameConfig.CAMEL_COLORS if c in self.camel_states]
+        self._set_ranking(sorted(racing, key=self._race_key))
+
+    def _update_ranking(self, moved: Iterable[Color]) -> None:
+        # the camels that did not move keep their order, the moved ones are inserted back
+        moved = [c for c in moved if c in self._ranks]
+        if not moved:
+            return
+        ranking = [c for c in self._ranking if c not in moved]
+        for color in moved:
+            insort(ranking, color, key=self._race_key)
+        self._set_ranking(ranking)
+
+    def _set_ranking(self, ranking: List[Color]) -> None:
+        self.__dict__["_ranking"] = ranking
+        self.__dict__["_ranks"] = {color: rank for rank, color in enumerate(ranking, start=1)}
+
+    @property
+    def ranking(self) -> Tuple[Color, ...]:
+        """Colors of the racing camels in race order, leader first."""
+        return tuple(self._ranking)
+
+    def rank(self, color: Color) -> int:
+        """Position of a racing camel in the race, 1 for the leader."""
+        return self._ranks[color]
+
+    def leader(self) -> Camel:
+        return self.camel_states[self._ranking[0]]
+
+    def last_place(self) -> Camel:
+        return self.camel_states[self._ranking[-1]]
+
     def move_to_next_player(self):
         player_names = list(self.players.keys())
         current_index = player_names.index(self.next_player) if self.next_player else 0
-        self.next_player = player_names[(current_index + 1) % len(player_names)]
+        assign(self, next_player=player_names[(current_index + 1) % len(player_names)])
 
     def _move_camel(self, dice: Dice, player: str) -> bool:
         """
@@ -55,8 +163,12 @@ class Leg(BaseModel):
         # give one point to the player who rolled the dice
         self.leg_points[player] += 1
 
-        # camels on top of the moving camel also move
-        moving_stack = [c for c in self.camel_states.values() if c.track_pos == camel.track_pos and c.stack_pos >= camel.stack_pos]
+        # camels on top of the moving camel also move, bottom camel first
+        moving_stack = sorted(
+            (c for c in self.camel_states.values() if c.track_pos == camel.track_pos and c.stack_pos >= camel.stack_pos),
+            key=lambda c: c.stack_pos
+        )
+        moving_colors = {c.color for c in moving_stack}
         
         # find the new position
         next_pos = camel.track_pos + dice.number if not camel.is_crazy() else camel.track_pos - dice.number
@@ -71,8 +183,15 @@ class Leg(BaseModel):
             final_pos += 1 if camel.is_crazy() else -1
             point_for_player = [player for pos, player in self.booing_tiles if pos == next_pos][0]
             self.leg_points[point_for_player] += 1  # Award 1 point to the player who placed the booing tile
+        if final_pos < 1:
+            # a crazy camel moving back past the first tile continues from the last one
+            final_pos = GameConfig.BOARD_SIZE
 
-        on_camels = [c for c in self.camel_states.values() if c.color != dice.color and c.track_pos == final_pos]
+        # a booed camel may land back on its own tile, under the camels it was standing on
+        on_camels = sorted(
+            (c for c in self.camel_states.values() if c.color not in moving_colors and c.track_pos == final_pos),
+            key=lambda c: c.stack_pos
+        )
         if on_camels:
             if not booed:
                 # stack on top of the existing camels
@@ -87,10 +206,12 @@ class Leg(BaseModel):
                 # update the stack positions of the existing camels
                 for idx, c in enumerate(on_camels):
                     c.move(track_pos=c.track_pos, stack_pos=idx + len(moving_stack))
+                moving_colors.update(c.color for c in on_camels)
         else:
             # move to the new position, reset stack positions
             for idx, c in enumerate(moving_stack):
                 c.move(track_pos=final_pos, stack_pos=idx)
+        self._update_ranking(moving_colors)
         # check if game is finished
         if final_pos > GameConfig.BOARD_SIZE:
             return True
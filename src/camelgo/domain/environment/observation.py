@@ -0,0 +1,108 @@
+"""Implements the observation vector of a player, written into a reusable buffer.
+
+Layout of the 253 entries:
+    1. Camels (7 * 23): track position one-hot (16) and stack position one-hot (7) per camel,
+       racing camels first, then the crazy ones.
+    2. Dice (6): 1 for every dice still in the pyramid, in `DiceRoller.DICE_COLORS` order.
+    3. Leg bets (5 * 4): next ticket of every racing camel, one-hot over [None, 2, 3, 5].
+    4. Board tiles (16 * 3): one-hot over [Empty, Cheer, Boo] per position.
+    5. Player resources (16): points, leg ticket values held per camel, game winner and loser bets.
+    6. Aggregates (2): number of game winner and loser bets placed by all players.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from camelgo.domain.environment.dice import DiceRoller
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.game_config import GameConfig
+
+
+OBSERVATION_DIM = 253
+ACTION_DIM = Game.NUM_ACTIONS
+
+_NUM_POSITIONS = GameConfig.BOARD_SIZE
+_CAMEL_SIZE = _NUM_POSITIONS + GameConfig.NUM_CAMELS
+_DICE = len(GameConfig.ALL_CAMEL_COLORS) * _CAMEL_SIZE
+_LEG_BETS = _DICE + len(DiceRoller.DICE_COLORS)
+_TILES = _LEG_BETS + 4 * len(GameConfig.CAMEL_COLORS)
+_POINTS = _TILES + 3 * _NUM_POSITIONS
+_TICKETS_HELD = _POINTS + 1
+_WINNER_BETS = _TICKETS_HELD + len(GameConfig.CAMEL_COLORS)
+_LOSER_BETS = _WINNER_BETS + len(GameConfig.CAMEL_COLORS)
+_AGGREGATES = _LOSER_BETS + len(GameConfig.CAMEL_COLORS)
+assert _AGGREGATES + 2 == OBSERVATION_DIM
+
+# one-hot slot of the next ticket ([None, 2, 3, 5]) by number of tickets taken
+_TICKET_SLOT = [3, 2, 1, 1]
+
+
+def build_observation(game: Game, player: str, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Observation vector of a player.
+
+    Args:
+        game (Game): The game.
+        player (str): The observing player.
+        out (np.ndarray, optional): float32 buffer of size OBSERVATION_DIM to write into, a new one
+            is allocated if None.
+
+    Returns:
+        np.ndarray: The observation, `out` if given.
+    """
+    obs = np.zeros(OBSERVATION_DIM, dtype=np.float32) if out is None else out
+    if out is not None:
+        obs.fill(0)
+    leg = game.current_leg
+
+    # 1. Camels
+    for i, color in enumerate(GameConfig.ALL_CAMEL_COLORS):
+        camel = leg.camel_states.get(color)
+        if camel is None:
+            continue
+        offset = i * _CAMEL_SIZE
+        if 1 <= camel.track_pos <= _NUM_POSITIONS:
+            obs[offset + camel.track_pos - 1] = 1
+        if 0 <= camel.stack_pos < GameConfig.NUM_CAMELS:
+            obs[offset + _NUM_POSITIONS + camel.stack_pos] = 1
+
+    # 2. Dice
+    remaining_colors = game.dice_roller.remaining_colors()
+    for j, color in enumerate(DiceRoller.DICE_COLORS):
+        if color in remaining_colors:
+            obs[_DICE + j] = 1
+
+    # 3. Leg bets
+    for i, color in enumerate(GameConfig.CAMEL_COLORS):
+        placed = 0
+        for name in game.players:
+            bets = leg.player_bets[name]
+            if color in bets:
+                placed += len(bets[color])
+        slot = _TICKET_SLOT[placed] if placed < len(_TICKET_SLOT) else 0
+        obs[_LEG_BETS + 4 * i + slot] = 1
+
+    # 4. Board tiles, a cheering tile wins over a booing tile on the same position
+    tiles = obs[_TILES:_POINTS].reshape(_NUM_POSITIONS, 3)
+    tiles[:, 0] = 1
+    for pos, _ in leg.booing_tiles:
+        tiles[pos - 1] = (0, 0, 1)
+    for pos, _ in leg.cheering_tiles:
+        tiles[pos - 1] = (0, 1, 0)
+
+    # 5. Player resources
+    obs[_POINTS] = game.players[player].points / 50.0  # normalize loosely
+    current_bets = leg.player_bets[player]
+    for i, color in enumerate(GameConfig.CAMEL_COLORS):
+        obs[_TICKETS_HELD + i] = sum(current_bets.get(color, [])) / 12.0
+        if player in game.hidden_game_winner_bets[color]:
+            obs[_WINNER_BETS + i] = 1
+        if player in game.hidden_game_loser_bets[color]:
+            obs[_LOSER_BETS + i] = 1
+
+    # 6. Aggregates
+    # TODO: normalize properly later. it depends on number of players.
+    obs[_AGGREGATES] = sum(len(game.hidden_game_winner_bets[c]) for c in GameConfig.CAMEL_COLORS) / 2.0
+    obs[_AGGREGATES + 1] = sum(len(game.hidden_game_loser_bets[c]) for c in GameConfig.CAMEL_COLORS) / 2.0
+    return obs
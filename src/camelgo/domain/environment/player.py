@@ -1,8 +1,10 @@
-from pydantic import BaseModel
+from dataclasses import dataclass
 
 from camelgo.domain.environment.game_config import GameConfig
 
-class Player(BaseModel):
+@dataclass(slots=True)
+class Player:
+    """A player's name and points, a plain record with slots like `Camel`."""
     name: str  # Player's name
     points: int = GameConfig.STARTING_MONEY  # Player's current points
 
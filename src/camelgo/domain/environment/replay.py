@@ -0,0 +1,216 @@
+"""Implements a deterministic replay corpus of seeded games, the regression check of the engine's rules and speed.
+
+The corpus is a JSON lines file of recorded games: the players, the seed of the dice roller, the
+starting board and, for every turn, the seat of the player, the action, the dice rolled and a short
+digest of the state after the turn (board, tiles, points, legs played and next player), followed
+by the final board and scores. Replaying feeds the recorded actions and dice back into the engine,
+compares the digests turn by turn and reports the first turn that diverges, and times the replay.
+
+    python -m camelgo.domain.environment.replay generate --games 50
+    python -m camelgo.domain.environment.replay check
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from camelgo.domain.agents.random_player import RandomPlayerAgent
+from camelgo.domain.environment.action import Action, ActionInt
+from camelgo.domain.environment.dice import Dice, DiceRoller
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.game_config import Color, GameConfig
+from camelgo.domain.environment.transitions import board_from_camels
+
+
+DEFAULT_CORPUS_PATH = "tests/data/replay_corpus.jsonl"
+
+# seat, action, dice as [base color, number, number color] or None, state digest
+Turn = Tuple[int, int, Optional[list], str]
+
+
+class RecordedGame(BaseModel):
+    """A game recorded for replay."""
+    seed: int
+    players: List[str]
+    start_board: List[Tuple[int, int]]  # (track, stack) of every camel, in GameConfig.ALL_CAMEL_COLORS order
+    turns: List[Turn]
+    final_board: List[Tuple[int, int]]
+    final_points: List[int]  # by seat
+
+
+class Divergence(BaseModel):
+    """The first turn where the engine left the recorded game."""
+    game: int  # index of the game in the corpus
+    seed: int
+    turn: int  # 0 for the starting board, then 1 for the first turn
+    message: str
+
+
+class ReplayReport(BaseModel):
+    """Outcome and speed of a replay of the corpus."""
+    num_games: int  # games replayed, up to the first divergence
+    num_turns: int
+    seconds: float
+    turns_per_second: float
+    divergence: Optional[Divergence] = None
+
+
+def state_digest(game: Game) -> str:
+    """Short digest of the state a turn leaves, see the module docstring."""
+    leg = game.current_leg
+    state = (
+        board_from_camels(leg.camel_states),
+        sorted(leg.cheering_tiles),
+        sorted(leg.booing_tiles),
+        [game.current_player_points(name) for name in game.players],
+        game.legs_played,
+        game.finished,
+        leg.next_player,
+    )
+    return hashlib.blake2b(repr(state).encode(), digest_size=4).hexdigest()
+
+
+def _encode_dice(dice: Dice) -> list:
+    if dice.base_color == Color.GREY:
+        return [dice.base_color.value, dice.number, dice.number_color.value]
+    return [dice.base_color.value, dice.number]
+
+
+def _decode_dice(encoded: list) -> Dice:
+    if len(encoded) == 3:
+        return Dice.of(Color(encoded[0]), encoded[1], Color(encoded[2]))
+    return Dice.of(Color(encoded[0]), encoded[1])
+
+
+def record_game(seed: int, num_players: int) -> RecordedGame:
+    """Plays a seeded game between random players and records it."""
+    np.random.seed(seed)
+    players = [f"Player_{seat + 1}" for seat in range(num_players)]
+    agents = {name: RandomPlayerAgent(name=name) for name in players}
+    game = Game.start_game(players, dice_roller=DiceRoller(seed=seed))
+    start_board = board_from_camels(game.current_leg.camel_states)
+    turns = []
+    while not game.finished:
+        player = game.current_leg.next_player
+        action = agents[player].play(game)
+        action_int = action.to_int()
+        dice = None
+        if action_int == ActionInt.ROLL_DICE.value:
+            action.dice_rolled = game.roll_dice()
+            dice = _encode_dice(action.dice_rolled)
+        game.play_action(action)
+        turns.append((players.index(player), action_int, dice, state_digest(game)))
+    return RecordedGame(
+        seed=seed,
+        players=players,
+        start_board=list(start_board),
+        turns=turns,
+        final_board=list(board_from_camels(game.current_leg.camel_states)),
+        final_points=[game.players[name].points for name in players],
+    )
+
+
+def generate_corpus(path: str = DEFAULT_CORPUS_PATH, num_games: int = 50) -> None:
+    """Records games with seeds 0..num_games-1, between 2 to MAX_PLAYERS random players."""
+    num_seatings = GameConfig.MAX_PLAYERS - GameConfig.MIN_PLAYERS + 1
+    with open(path, "w") as f:
+        for seed in range(num_games):
+            recorded = record_game(seed, GameConfig.MIN_PLAYERS + seed % num_seatings)
+            f.write(recorded.model_dump_json() + "\n")
+
+
+def load_corpus(path: str = DEFAULT_CORPUS_PATH) -> List[RecordedGame]:
+    with open(path) as f:
+        return [RecordedGame.model_validate_json(line) for line in f if line.strip()]
+
+
+def _replay_game(recorded: RecordedGame, check_turns: bool) -> Tuple[int, Optional[Tuple[int, str]]]:
+    """Replays a game; returns the number of turns played and the first divergence as (turn, message)."""
+    game = Game.start_game(recorded.players, dice_roller=DiceRoller(seed=recorded.seed))
+    if [list(p) for p in board_from_camels(game.current_leg.camel_states)] != [list(p) for p in recorded.start_board]:
+        return 0, (0, "starting board differs")
+    for turn, (seat, action_int, dice, digest) in enumerate(recorded.turns, start=1):
+        player = recorded.players[seat]
+        if game.finished or game.current_leg.next_player != player:
+            expected = "the game is over" if game.finished else f"{game.current_leg.next_player} moves"
+            return turn - 1, (turn, f"{player} should play {ActionInt(action_int).name} but {expected}")
+        action = Action.from_int(action_int, player)
+        if dice is not None:
+            action.dice_rolled = game.dice_roller.deterministic_roll_dice(_decode_dice(dice))
+        try:
+            game.play_action(action)
+        except ValueError as e:
+            return turn - 1, (turn, f"{player} playing {ActionInt(action_int).name} raised: {e}")
+        if check_turns and state_digest(game) != digest:
+            return turn, (turn, f"state differs after {player} played {ActionInt(action_int).name}")
+    turns = len(recorded.turns)
+    if not game.finished:
+        return turns, (turns, "the game is not over after the last turn")
+    if [list(p) for p in board_from_camels(game.current_leg.camel_states)] != [list(p) for p in recorded.final_board]:
+        return turns, (turns, "final board differs")
+    points = [game.players[name].points for name in recorded.players]
+    if points != recorded.final_points:
+        return turns, (turns, f"final points {points} differ from {recorded.final_points}")
+    return turns, None
+
+
+def replay(corpus: List[RecordedGame], check_turns: bool = True) -> ReplayReport:
+    """
+    Replays the corpus through the engine, stopping at the first divergence.
+
+    Args:
+        corpus (List[RecordedGame]): The recorded games.
+        check_turns (bool): Compare the state after every turn; without it only the end states are
+            compared, which times the engine alone.
+
+    Returns:
+        ReplayReport: The first divergence, if any, and the replay speed.
+    """
+    num_turns = 0
+    divergence = None
+    start = time.perf_counter()
+    for index, recorded in enumerate(corpus):
+        turns, diverged = _replay_game(recorded, check_turns)
+        num_turns += turns
+        if diverged is not None:
+            turn, message = diverged
+            divergence = Divergence(game=index, seed=recorded.seed, turn=turn, message=message)
+            break
+    seconds = time.perf_counter() - start
+    return ReplayReport(
+        num_games=index + 1 if corpus else 0,
+        num_turns=num_turns,
+        seconds=seconds,
+        turns_per_second=num_turns / seconds if seconds > 0 else 0.0,
+        divergence=divergence,
+    )
+
+
+def run_cli():
+    parser = argparse.ArgumentParser(description="Generate or replay the corpus of recorded games.")
+    parser.add_argument("command", choices=["generate", "check"])
+    parser.add_argument("--corpus", type=str, default=DEFAULT_CORPUS_PATH)
+    parser.add_argument("--games", type=int, default=50, help="Games to record.")
+    parser.add_argument("--end-states-only", action="store_true", help="Only compare the end states.")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        generate_corpus(args.corpus, args.games)
+        print(f"Recorded {args.games} games in {args.corpus}")
+        return
+    report = replay(load_corpus(args.corpus), check_turns=not args.end_states_only)
+    print(f"Replayed {report.num_games} games, {report.num_turns} turns in {report.seconds:.3f}s "
+          f"({report.turns_per_second:.0f} turns/s)")
+    if report.divergence is not None:
+        d = report.divergence
+        print(f"Diverged in game {d.game} (seed {d.seed}) at turn {d.turn}: {d.message}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    run_cli()
@@ -0,0 +1,109 @@
+"""Implements the table of all possible starting camel layouts and their probabilities."""
+
+from functools import lru_cache
+from itertools import permutations, product
+from math import factorial
+import random
+from typing import Callable, List
+
+import numpy as np
+
+from camelgo.domain.environment.camel import Camel
+from camelgo.domain.environment.game_config import GameConfig
+
+
+class StartPositionTable:
+    """
+    Enumerates every starting layout of the camels with its exact probability.
+
+    At the start of the game all dice are rolled once in random order: a racing camel goes to
+    the tile of its die value, a crazy camel to the tile `BOARD_SIZE - value + 1`, and camels
+    rolled later land on top of the ones already on their tile. The grey die is rolled once more
+    to place the crazy camel it did not show.
+
+    Racing and crazy camels never share a tile, so the two groups are independent:
+    - racing camels: each of the 3^5 tile assignments is equally likely, and every stacking
+      order on a tile is equally likely (2520 layouts);
+    - crazy camels: two different tiles have probability 1/9, the same tile (in either order)
+      1/18 (12 layouts).
+
+    Layouts are stored as an int8 array of shape (N, NUM_CAMELS, 2) holding (track_pos, stack_pos)
+    per camel in `GameConfig.ALL_CAMEL_COLORS` order. Probabilities are exact integer weights over
+    `total_weight`.
+    """
+
+    def __init__(self):
+        racing = self._racing_layouts()
+        crazy = self._crazy_layouts()
+        layouts = np.empty((len(racing) * len(crazy), GameConfig.NUM_CAMELS, 2), dtype=np.int8)
+        weights = np.empty(len(layouts), dtype=np.int64)
+        for i, ((racing_layout, racing_weight), (crazy_layout, crazy_weight)) in enumerate(product(racing, crazy)):
+            layouts[i] = racing_layout + crazy_layout
+            weights[i] = racing_weight * crazy_weight
+        self.layouts = layouts
+        self.weights = weights
+        self.total_weight = int(weights.sum())
+        self.probabilities = weights / self.total_weight
+        self._cumulative_weights = np.cumsum(weights)
+
+    @staticmethod
+    def _racing_layouts():
+        """Racing camel layouts with weights over 3^5 * 5! (tile assignment x roll order)."""
+        num_camels = GameConfig.NUM_NORMAL_CAMELS
+        layouts = []
+        for tiles in product(GameConfig.DICE_VALUES, repeat=num_camels):
+            groups = [[c for c in range(num_camels) if tiles[c] == tile] for tile in GameConfig.DICE_VALUES]
+            weight = factorial(num_camels)
+            for group in groups:
+                weight //= factorial(len(group))
+            # every combination of stacking orders of the tiles is a distinct layout
+            for orders in product(*(permutations(group) for group in groups)):
+                layout = [None] * num_camels
+                for order in orders:
+                    for stack_pos, camel in enumerate(order):
+                        layout[camel] = (tiles[camel], stack_pos)
+                layouts.append((layout, weight))
+        return layouts
+
+    @staticmethod
+    def _crazy_layouts():
+        """Crazy camel layouts with weights over 18 (first grey colour x first value x second value)."""
+        layouts = []
+        for first, second in product(GameConfig.DICE_VALUES, repeat=2):
+            first_tile = GameConfig.BOARD_SIZE - first + 1
+            second_tile = GameConfig.BOARD_SIZE - second + 1
+            if first == second:
+                # the camel shown by the first grey roll is at the bottom
+                layouts.append(([(first_tile, 0), (second_tile, 1)], 1))
+                layouts.append(([(second_tile, 1), (first_tile, 0)], 1))
+            elif first < second:
+                # reached by either camel being rolled first
+                layouts.append(([(first_tile, 0), (second_tile, 0)], 2))
+                layouts.append(([(second_tile, 0), (first_tile, 0)], 2))
+        return layouts
+
+    def __len__(self) -> int:
+        return len(self.layouts)
+
+    def sample_index(self, rng: random.Random) -> int:
+        """Draws a layout index with its exact probability."""
+        draw = rng.randrange(self.total_weight)
+        return int(np.searchsorted(self._cumulative_weights, draw, side="right"))
+
+    def camels(self, index: int) -> List[Camel]:
+        """Builds the camels of a layout, bottom camels first on each tile."""
+        camels = [
+            Camel(color=color, track_pos=int(track_pos), stack_pos=int(stack_pos))
+            for color, (track_pos, stack_pos) in zip(GameConfig.ALL_CAMEL_COLORS, self.layouts[index])
+        ]
+        return sorted(camels, key=lambda c: (c.track_pos, c.stack_pos))
+
+    def expectation(self, fn: Callable[[np.ndarray], float]) -> float:
+        """Exact expectation of `fn(layout)` over all openings."""
+        return float(sum(p * fn(layout) for layout, p in zip(self.layouts, self.probabilities)))
+
+
+@lru_cache(maxsize=1)
+def start_position_table() -> StartPositionTable:
+    """The shared table, built on first use."""
+    return StartPositionTable()
@@ -0,0 +1,173 @@
+"""Implements canonicalization of leg states under translation and colour symmetries.
+
+Two leg states are equivalent for probability purposes when:
+- the whole board (camels and tiles) is shifted along the track, as long as no camel can reach
+  the finish line or move back past the first tile with the dice left in the leg;
+- racing camels are relabelled, together with their dice and leg bet tickets;
+- the two crazy camels are swapped (they share the grey dice).
+
+`canonicalize` maps a state to the representative of its class and returns the `Symmetry` that
+maps between the two, so results computed on the representative can be mapped back.
+"""
+
+from typing import Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+from camelgo.domain.environment.game_config import GameConfig
+from camelgo.domain.environment.transitions import (
+    Board, CRAZY_INDICES, LegState, RACING_INDICES, STEP_TABLE
+)
+
+
+# the furthest a camel can be moved by a single dice, with a tile effect
+MAX_STEP = max(abs(step.displacement) for step in STEP_TABLE.values())
+
+_CRAZY_SLOTS = tuple(sorted(CRAZY_INDICES))
+
+
+class Symmetry:
+    """
+    A translation along the track combined with a relabelling of the camels.
+
+    `permutation[i]` is the index of the camel that original camel `i` becomes; racing camels
+    map to racing camels and crazy camels to crazy camels.
+    """
+
+    __slots__ = ("shift", "permutation", "inverse")
+
+    def __init__(self, shift: int, permutation: Tuple[int, ...]):
+        self.shift = shift
+        self.permutation = permutation
+        inverse = [0] * len(permutation)
+        for i, j in enumerate(permutation):
+            inverse[j] = i
+        self.inverse = tuple(inverse)
+
+    def __eq__(self, other):
+        return isinstance(other, Symmetry) and (self.shift, self.permutation) == (other.shift, other.permutation)
+
+    def __repr__(self):
+        return f"Symmetry(shift={self.shift}, permutation={self.permutation})"
+
+    def camel(self, i: int) -> int:
+        """Index of original camel `i` in the canonical state."""
+        return self.permutation[i]
+
+    def original_camel(self, j: int) -> int:
+        """Index in the original state of canonical camel `j`."""
+        return self.inverse[j]
+
+    def apply_board(self, board: Board) -> Board:
+        return tuple(
+            (board[i][0] + self.shift, board[i][1]) for i in self.inverse
+        )
+
+    def invert_board(self, board: Board) -> Board:
+        return tuple(
+            (board[j][0] - self.shift, board[j][1]) for j in self.permutation
+        )
+
+    def _permute_racing(self, values: tuple, inverse: bool) -> tuple:
+        mapping = self.permutation if inverse else self.inverse
+        return tuple(values[mapping[i]] for i in RACING_INDICES)
+
+    def apply(self, state: LegState) -> LegState:
+        return LegState(
+            board=self.apply_board(state.board),
+            racing_dice=self._permute_racing(state.racing_dice, inverse=False),
+            grey_dice=state.grey_dice,
+            bets_taken=self._permute_racing(state.bets_taken, inverse=False),
+            tiles=tuple((pos + self.shift, effect) for pos, effect in state.tiles),
+        )
+
+    def invert(self, state: LegState) -> LegState:
+        return LegState(
+            board=self.invert_board(state.board),
+            racing_dice=self._permute_racing(state.racing_dice, inverse=True),
+            grey_dice=state.grey_dice,
+            bets_taken=self._permute_racing(state.bets_taken, inverse=True),
+            tiles=tuple((pos - self.shift, effect) for pos, effect in state.tiles),
+        )
+
+
+def translation_window(state: LegState) -> Optional[Tuple[int, int]]:
+    """
+    Returns the range of shifts that keep the leg away from the finish line and the wrap-around,
+    or None if the state cannot be translated.
+
+    Within a leg, a camel moves forward at most MAX_STEP tiles per racing dice left (it can be
+    carried by every other racing camel) and backward at most MAX_STEP tiles if the grey dice is left.
+    """
+    positions = [track_pos for track_pos, _ in state.board] + [pos for pos, _ in state.tiles]
+    forward_reach = MAX_STEP * sum(state.racing_dice)
+    backward_reach = MAX_STEP * state.grey_dice
+    # tiles are only placed on the board, the shifted ones must stay on it
+    lowest = 1 + backward_reach
+    highest = GameConfig.BOARD_SIZE - forward_reach
+    low, high = min(positions), max(positions)
+    if low < lowest or high > highest:
+        return None
+    return lowest - low, highest - high
+
+
+def canonicalize(state: LegState, translate: bool = True) -> Tuple[LegState, Symmetry]:
+    """
+    Maps a leg state to the representative of its symmetry class.
+
+    The representative orders the racing camels (and the crazy camels) from the last to the leading
+    one, and, if the state can be translated, moves the rearmost camel or tile as far back as allowed.
+
+    Args:
+        state (LegState): The state.
+        translate (bool): Also canonicalize the position on the track.
+
+    Returns:
+        The canonical state and the symmetry mapping `state` to it.
+    """
+    board = state.board
+    permutation = [0] * len(board)
+    for slots in (RACING_INDICES, _CRAZY_SLOTS):
+        for slot, i in zip(slots, sorted(slots, key=lambda i: board[i])):
+            permutation[i] = slot
+    shift = 0
+    if translate:
+        window = translation_window(state)
+        if window is not None:
+            shift = window[0]
+    symmetry = Symmetry(shift, tuple(permutation))
+    return symmetry.apply(state), symmetry
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class CanonicalCache(Generic[V]):
+    """
+    Memoizes a function of leg states on their canonical representatives.
+
+    The function is only ever called on canonical states, so its results are in canonical
+    coordinates; `lookup` returns them with the symmetry needed to map them back.
+    """
+
+    def __init__(self, compute: Callable[[LegState], V], translate: bool = True):
+        self.compute = compute
+        self.translate = translate
+        self.entries: Dict[LegState, V] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, state: LegState) -> Tuple[V, Symmetry]:
+        canonical, symmetry = canonicalize(state, translate=self.translate)
+        if canonical in self.entries:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.entries[canonical] = self.compute(canonical)
+        return self.entries[canonical], symmetry
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
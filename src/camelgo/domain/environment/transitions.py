@@ -0,0 +1,331 @@
+"""Implements precomputed lookup tables for camel stack movements on a compact board.
+
+`Leg._move_camel` is the reference implementation of a dice roll. Simulation, enumeration and
+batched playouts that only need camel positions work on a compact `Board` instead, and apply
+rolls with two small tables:
+
+- `STEP_TABLE`: (crazy camel, dice value, tile effect) -> (displacement, goes under)
+- `STACK_TABLE`: (moving camels, camels on the landing tile, goes under)
+  -> (new stack positions of the moving camels, new stack positions of the landed-on camels)
+
+`verify_transition_tables` checks every combination against `Leg._move_camel`.
+"""
+
+from itertools import product
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from camelgo.domain.environment.camel import Camel
+from camelgo.domain.environment.dice import Dice
+from camelgo.domain.environment.game_config import GameConfig, Color
+
+
+# (track_pos, stack_pos) of every camel, in GameConfig.ALL_CAMEL_COLORS order
+Board = Tuple[Tuple[int, int], ...]
+# (position, effect) of the tiles on the board, sorted by position
+Tiles = Tuple[Tuple[int, int], ...]
+
+TILE_NONE = 0
+TILE_CHEER = 1
+TILE_BOO = -1
+TILE_EFFECTS = (TILE_NONE, TILE_CHEER, TILE_BOO)
+
+CAMEL_INDEX: Dict[Color, int] = {color: i for i, color in enumerate(GameConfig.ALL_CAMEL_COLORS)}
+RACING_INDICES = tuple(CAMEL_INDEX[c] for c in GameConfig.CAMEL_COLORS)
+CRAZY_INDICES = frozenset(CAMEL_INDEX[c] for c in GameConfig.CRAZY_CAMELS)
+
+
+class Step(NamedTuple):
+    displacement: int  # tiles moved, negative for crazy camels
+    under: bool  # the moving stack goes under the camels on the landing tile
+
+
+class Restack(NamedTuple):
+    moving: Tuple[int, ...]  # new stack positions of the moving camels, bottom first
+    landing: Tuple[int, ...]  # new stack positions of the camels already on the landing tile, bottom first
+
+
+def _build_step_table() -> Dict[Tuple[bool, int, int], Step]:
+    table = {}
+    for crazy, value, effect in product((False, True), GameConfig.DICE_VALUES, TILE_EFFECTS):
+        direction = -1 if crazy else 1
+        # a cheering tile pushes the camel one more tile forward, a booing tile one back
+        table[(crazy, value, effect)] = Step(direction * (value + effect), effect == TILE_BOO)
+    return table
+
+
+def _build_stack_table() -> Dict[Tuple[int, int, bool], Restack]:
+    table = {}
+    for moving, landing, under in product(range(1, GameConfig.NUM_CAMELS + 1), range(GameConfig.NUM_CAMELS), (False, True)):
+        if moving + landing > GameConfig.NUM_CAMELS:
+            continue
+        if under:
+            table[(moving, landing, under)] = Restack(tuple(range(moving)), tuple(range(moving, moving + landing)))
+        else:
+            table[(moving, landing, under)] = Restack(tuple(range(landing, landing + moving)), tuple(range(landing)))
+    return table
+
+
+STEP_TABLE = _build_step_table()
+STACK_TABLE = _build_stack_table()
+
+
+def tiles_from_leg(cheering_tiles, booing_tiles) -> Tiles:
+    """Compact tiles from the (position, player) lists of a Leg."""
+    return tuple(sorted(
+        [(pos, TILE_CHEER) for pos, _ in cheering_tiles] + [(pos, TILE_BOO) for pos, _ in booing_tiles]
+    ))
+
+
+def board_from_camels(camel_states: Mapping[Color, Camel]) -> Board:
+    return tuple((camel_states[c].track_pos, camel_states[c].stack_pos) for c in GameConfig.ALL_CAMEL_COLORS)
+
+
+def apply_roll(board: Board, camel: int, value: int, tiles: Tiles = ()) -> Tuple[Board, Optional[int]]:
+    """
+    Moves a camel (and the camels on top of it) by table lookup.
+
+    Args:
+        board (Board): The current board.
+        camel (int): Index of the camel in GameConfig.ALL_CAMEL_COLORS.
+        value (int): The dice value.
+        tiles (Tiles): The tiles on the board.
+
+    Returns:
+        The new board and the position of the tile the camel landed on (None if it landed on none).
+    """
+    track_pos, stack_pos = board[camel]
+    crazy = camel in CRAZY_INDICES
+    next_pos = track_pos - value if crazy else track_pos + value
+    effect = TILE_NONE
+    for pos, tile_effect in tiles:
+        if pos == next_pos:
+            effect = tile_effect
+            break
+    step = STEP_TABLE[(crazy, value, effect)]
+    final_pos = track_pos + step.displacement
+    if final_pos < 1:
+        final_pos = GameConfig.BOARD_SIZE
+
+    moving = sorted((board[i][1], i) for i in range(len(board)) if board[i][0] == track_pos and board[i][1] >= stack_pos)
+    moving_indices = {i for _, i in moving}
+    landing = sorted((board[i][1], i) for i in range(len(board)) if board[i][0] == final_pos and i not in moving_indices)
+    restack = STACK_TABLE[(len(moving), len(landing), step.under and bool(landing))]
+
+    new_board = list(board)
+    for (_, i), new_stack_pos in zip(moving, restack.moving):
+        new_board[i] = (final_pos, new_stack_pos)
+    for (_, i), new_stack_pos in zip(landing, restack.landing):
+        new_board[i] = (final_pos, new_stack_pos)
+    return tuple(new_board), (next_pos if effect != TILE_NONE else None)
+
+
+# batched boards are packed into int64 codes, one byte per camel: track_pos in the high 5 bits, stack_pos in the low 3
+_STACK_BITS = 3
+_CAMEL_BITS = 8
+_SHIFTS = np.arange(GameConfig.NUM_CAMELS, dtype=np.int64) * _CAMEL_BITS
+# furthest a camel can get past the finish line: a racing camel on the last tile rolling 3 onto a cheering tile
+MAX_TRACK_POS = GameConfig.BOARD_SIZE + max(step.displacement for step in STEP_TABLE.values())
+
+
+def _step_arrays() -> Tuple[np.ndarray, np.ndarray]:
+    """STEP_TABLE as arrays indexed by (crazy, value, effect); TILE_BOO (-1) indexes the last slot."""
+    displacement = np.zeros((2, max(GameConfig.DICE_VALUES) + 1, len(TILE_EFFECTS)), dtype=np.int8)
+    under = np.zeros(displacement.shape, dtype=bool)
+    for (crazy, value, effect), step in STEP_TABLE.items():
+        displacement[int(crazy), value, effect] = step.displacement
+        under[int(crazy), value, effect] = step.under
+    return displacement, under
+
+
+_STEP_DISPLACEMENT, _STEP_UNDER = _step_arrays()
+
+
+def encode_boards(tracks: np.ndarray, stacks: np.ndarray) -> np.ndarray:
+    """Packs (N, NUM_CAMELS) track and stack positions into N int64 codes."""
+    packed = (tracks.astype(np.int64) << _STACK_BITS) | stacks.astype(np.int64)
+    return np.bitwise_or.reduce(packed << _SHIFTS, axis=1)
+
+
+def decode_boards(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Unpacks int64 codes into (N, NUM_CAMELS) track and stack positions."""
+    packed = (codes[:, None] >> _SHIFTS) & ((1 << _CAMEL_BITS) - 1)
+    return (packed >> _STACK_BITS).astype(np.int8), (packed & ((1 << _STACK_BITS) - 1)).astype(np.int8)
+
+
+def encode_board(board: Board) -> int:
+    tracks, stacks = np.array([board], dtype=np.int8).transpose(2, 0, 1)
+    return int(encode_boards(tracks, stacks)[0])
+
+
+def decode_board(code: int) -> Board:
+    tracks, stacks = decode_boards(np.array([code], dtype=np.int64))
+    return tuple(zip(tracks[0].tolist(), stacks[0].tolist()))
+
+
+def tile_effects(tiles: Tiles) -> np.ndarray:
+    """The effect of the tile on every track position, TILE_NONE where there is no tile."""
+    effects = np.full(MAX_TRACK_POS + 1, TILE_NONE, dtype=np.int8)
+    for pos, effect in tiles:
+        effects[pos] = effect
+    return effects
+
+
+def apply_roll_batch(
+    tracks: np.ndarray, stacks: np.ndarray, camel: int, value: int, effects: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    `apply_roll` on many boards at once.
+
+    Args:
+        tracks (np.ndarray): (N, NUM_CAMELS) track positions.
+        stacks (np.ndarray): (N, NUM_CAMELS) stack positions.
+        camel (int): Index of the camel in GameConfig.ALL_CAMEL_COLORS.
+        value (int): The dice value.
+        effects (np.ndarray): `tile_effects` of the tiles on the board, None if there are none.
+
+    Returns:
+        The new track and stack positions, and the position every camel reached before any tile effect.
+    """
+    crazy = camel in CRAZY_INDICES
+    origin = tracks[:, camel]
+    height = stacks[:, camel]
+    next_pos = origin - value if crazy else origin + value
+    if effects is None:
+        effect = np.zeros(len(tracks), dtype=np.int8)
+    else:
+        effect = effects[np.clip(next_pos, 0, MAX_TRACK_POS)]
+    final_pos = origin + _STEP_DISPLACEMENT[int(crazy), value, effect]
+    final_pos[final_pos < 1] = GameConfig.BOARD_SIZE
+
+    moving = (tracks == origin[:, None]) & (stacks >= height[:, None])
+    landing = (tracks == final_pos[:, None]) & ~moving
+    num_moving = moving.sum(axis=1, dtype=np.int8)[:, None]
+    num_landing = landing.sum(axis=1, dtype=np.int8)[:, None]
+    under = _STEP_UNDER[int(crazy), value, effect][:, None]
+
+    # the moving stack keeps its order, at the bottom when booed and on top otherwise
+    relative = stacks - height[:, None]
+    new_stacks = np.where(moving, np.where(under, relative, relative + num_landing), stacks)
+    new_stacks = np.where(landing & under, stacks + num_moving, new_stacks)
+    new_tracks = np.where(moving, final_pos[:, None], tracks)
+    return new_tracks.astype(np.int8), new_stacks.astype(np.int8), next_pos
+
+
+class LegState(NamedTuple):
+    """Everything about a leg that matters for where the camels end up and what the leg bets pay."""
+    board: Board
+    racing_dice: Tuple[bool, ...]  # per racing camel, True if its dice is still in the pyramid
+    grey_dice: bool  # True if the grey dice is still in the pyramid
+    bets_taken: Tuple[int, ...]  # per racing camel, number of leg bet tickets already taken
+    tiles: Tiles = ()
+
+    @classmethod
+    def from_leg(cls, leg, dice_rolled=()) -> 'LegState':
+        """The state of a Leg, given the dice already rolled in it."""
+        rolled = {d.base_color for d in dice_rolled}
+        bets_taken = [0] * len(RACING_INDICES)
+        for bets in leg.player_bets.values():
+            for color, values in bets.items():
+                bets_taken[CAMEL_INDEX[color]] += len(values)
+        return cls(
+            board=board_from_camels(leg.camel_states),
+            racing_dice=tuple(c not in rolled for c in GameConfig.CAMEL_COLORS),
+            grey_dice=Color.GREY not in rolled,
+            bets_taken=tuple(bets_taken),
+            tiles=tiles_from_leg(leg.cheering_tiles, leg.booing_tiles),
+        )
+
+    @classmethod
+    def from_game(cls, game) -> 'LegState':
+        return cls.from_leg(game.current_leg, game.dice_roller.dices_rolled)
+
+    def num_dice(self) -> int:
+        return sum(self.racing_dice) + self.grey_dice
+
+
+def is_finished(board: Board) -> bool:
+    """True if a camel crossed the finish line."""
+    return any(track_pos > GameConfig.BOARD_SIZE for track_pos, _ in board)
+
+
+def _reference_roll(board: Board, camel: int, value: int, tiles: Tiles) -> Board:
+    """Applies a roll with Leg._move_camel."""
+    # imported here to keep this module importable from leg.py-level code
+    from camelgo.domain.environment.leg import Leg
+    from camelgo.domain.environment.player import Player
+
+    players = {"cheer": Player(name="cheer"), "boo": Player(name="boo"), "roller": Player(name="roller")}
+    camel_states = {
+        color: Camel(color=color, track_pos=track_pos, stack_pos=stack_pos)
+        for color, (track_pos, stack_pos) in zip(GameConfig.ALL_CAMEL_COLORS, board)
+    }
+    leg = Leg(
+        camel_states=camel_states,
+        players=players,
+        cheering_tiles=[(pos, "cheer") for pos, effect in tiles if effect == TILE_CHEER],
+        booing_tiles=[(pos, "boo") for pos, effect in tiles if effect == TILE_BOO],
+    )
+    color = GameConfig.ALL_CAMEL_COLORS[camel]
+    if camel in CRAZY_INDICES:
+        dice = Dice(base_color=Color.GREY, number=value, number_color=color)
+    else:
+        dice = Dice(base_color=color, number=value)
+    leg._move_camel(dice, "roller")
+    return board_from_camels(leg.camel_states)
+
+
+def _verification_cases():
+    """Yields (board, camel, value, tiles) for every relative stack layout, dice and tile effect."""
+    num_camels = GameConfig.NUM_CAMELS
+    for crazy, value, effect in product((False, True), GameConfig.DICE_VALUES, TILE_EFFECTS):
+        step = STEP_TABLE[(crazy, value, effect)]
+        # mid-board, about to cross the finish line, and (crazy camels) about to wrap around
+        origins = [8, 1] if crazy else [8, GameConfig.BOARD_SIZE - 1]
+        for origin, origin_size in product(origins, range(1, num_camels + 1)):
+            for height in range(origin_size):
+                final_pos = origin + step.displacement
+                if final_pos < 1:
+                    final_pos = GameConfig.BOARD_SIZE
+                same_tile = final_pos == origin
+                max_landing = 0 if same_tile else num_camels - origin_size
+                next_pos = origin - value if crazy else origin + value
+                # parked camels share a tile away from the origin, the landing tile and the tile effect
+                parking = next(
+                    p for p in (2, 5, 12, 14) if all(abs(p - q) > 1 for q in (origin, final_pos, next_pos))
+                )
+                for landing_size in range(max_landing + 1):
+                    # the moving camel first, then the rest of the origin stack, the landing stack and parked camels
+                    order = [i for i in range(num_camels) if (i in CRAZY_INDICES) == crazy][:1]
+                    order += [i for i in range(num_camels) if i not in order]
+                    board = [None] * num_camels
+                    origin_camels = order[1:height + 1] + order[:1] + order[height + 1:origin_size]
+                    for stack_pos, i in enumerate(origin_camels):
+                        board[i] = (origin, stack_pos)
+                    for stack_pos, i in enumerate(order[origin_size:origin_size + landing_size]):
+                        board[i] = (final_pos, stack_pos)
+                    for stack_pos, i in enumerate(order[origin_size + landing_size:]):
+                        board[i] = (parking, stack_pos)
+                    tiles = ((next_pos, effect),) if effect != TILE_NONE and 1 <= next_pos <= GameConfig.BOARD_SIZE else ()
+                    yield tuple(board), order[0], value, tiles
+
+
+def verify_transition_tables() -> List[str]:
+    """
+    Checks the tables against Leg._move_camel for every (relative stack layout, camel kind,
+    dice value, tile effect) combination.
+
+    Returns:
+        list[str]: Descriptions of the mismatches, empty if the tables are exact.
+    """
+    mismatches = []
+    for board, camel, value, tiles in _verification_cases():
+        expected = _reference_roll(board, camel, value, tiles)
+        actual, _ = apply_roll(board, camel, value, tiles)
+        if actual != expected:
+            mismatches.append(
+                f"camel {GameConfig.ALL_CAMEL_COLORS[camel]} rolls {value} on {board} with tiles {tiles}: "
+                f"expected {expected}, got {actual}"
+            )
+    return mismatches
@@ -0,0 +1,154 @@
+"""Periodic checkpointing of PPO training runs, written by a background thread."""
+
+import logging
+import os
+import queue
+import random
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+
+
+CHECKPOINT_PREFIX = "checkpoint_"
+CHECKPOINT_SUFFIX = ".pt"
+
+
+def capture_rng_state() -> Dict[str, Any]:
+    """Returns the state of every random number generator used during training."""
+    state = {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def restore_rng_state(state: Dict[str, Any]) -> None:
+    """Restores the random number generators from `capture_rng_state` output."""
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    # the states must be CPU ByteTensors, even if the checkpoint was mapped to another device
+    torch.set_rng_state(state["torch"].cpu())
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all([s.cpu() for s in state["cuda"]])
+
+
+def _detach_to_cpu(obj):
+    """Copies every tensor in a (nested) state dict to the CPU so the live values can keep changing."""
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {k: _detach_to_cpu(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_detach_to_cpu(v) for v in obj)
+    return obj
+
+
+def checkpoint_path(checkpoint_dir: str, frames: int) -> str:
+    return os.path.join(checkpoint_dir, f"{CHECKPOINT_PREFIX}{frames:012d}{CHECKPOINT_SUFFIX}")
+
+
+def list_checkpoints(checkpoint_dir: str) -> List[str]:
+    """Returns the checkpoints in a directory, oldest first."""
+    if not os.path.isdir(checkpoint_dir):
+        return []
+    names = sorted(
+        n for n in os.listdir(checkpoint_dir)
+        if n.startswith(CHECKPOINT_PREFIX) and n.endswith(CHECKPOINT_SUFFIX)
+    )
+    return [os.path.join(checkpoint_dir, n) for n in names]
+
+
+def latest_checkpoint(checkpoint_dir: str) -> Optional[str]:
+    checkpoints = list_checkpoints(checkpoint_dir)
+    return checkpoints[-1] if checkpoints else None
+
+
+def load_checkpoint(path: str, map_location="cpu") -> Dict[str, Any]:
+    """
+    Loads a checkpoint written by `CheckpointWriter`.
+
+    Args:
+        path (str): Checkpoint file, or a directory to load the latest checkpoint from.
+        map_location: Passed to `torch.load`.
+
+    Returns:
+        dict: The checkpoint contents.
+    """
+    if os.path.isdir(path):
+        latest = latest_checkpoint(path)
+        if latest is None:
+            raise FileNotFoundError(f"No checkpoint found in {path}.")
+        path = latest
+    # checkpoints hold RNG states and plain python objects besides tensors
+    return torch.load(path, map_location=map_location, weights_only=False)
+
+
+class CheckpointWriter:
+    """
+    Writes training checkpoints from a background thread.
+
+    `save` only snapshots the state on the calling thread (a copy of the tensors to the CPU);
+    serialization and disk I/O happen on the writer thread, so the training loop does not wait
+    for the disk. Files are written to a temporary name and renamed, so a crash never leaves a
+    truncated checkpoint behind.
+    """
+
+    def __init__(self, checkpoint_dir: str, keep_last: Optional[int] = 3):
+        self.checkpoint_dir = checkpoint_dir
+        self.keep_last = keep_last
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        # a bounded queue keeps memory in check if the disk is much slower than training
+        self._queue: queue.Queue = queue.Queue(maxsize=2)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    def save(self, state: Dict[str, Any], frames: int) -> str:
+        """
+        Queues a checkpoint to be written.
+
+        Args:
+            state (dict): The checkpoint contents. Tensors are copied before returning.
+            frames (int): Frames collected so far, used to name the file.
+
+        Returns:
+            str: The path the checkpoint will be written to.
+        """
+        if self._error is not None:
+            raise RuntimeError("Checkpoint writer failed.") from self._error
+        path = checkpoint_path(self.checkpoint_dir, frames)
+        self._queue.put((path, _detach_to_cpu(state)))
+        return path
+
+    def close(self) -> None:
+        """Waits until every queued checkpoint is on disk and stops the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise RuntimeError("Checkpoint writer failed.") from self._error
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            path, state = item
+            try:
+                tmp_path = path + ".tmp"
+                torch.save(state, tmp_path)
+                os.replace(tmp_path, path)
+                self._prune()
+            except BaseException as e:
+                logging.error(f"Failed to write checkpoint {path}: {e}")
+                self._error = e
+
+    def _prune(self) -> None:
+        if self.keep_last is None:
+            return
+        for path in list_checkpoints(self.checkpoint_dir)[:-self.keep_last]:
+            os.remove(path)
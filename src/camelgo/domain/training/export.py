@@ -0,0 +1,132 @@
+"""Exports trained PPO actors to lean inference modules for fast action selection."""
+
+import argparse
+import os
+
+import torch
+
+from camelgo.domain.environment.observation import ACTION_DIM, OBSERVATION_DIM
+
+
+EXPORT_METHODS = ("script", "compile", "eager")
+# prefix of the MLP weights inside the ProbabilisticActor state dict
+ACTOR_MLP_PREFIX = "module.0.module."
+
+
+class InferencePolicy(torch.nn.Module):
+    """
+    Maps (observation, mask) to an action without the torchrl/tensordict machinery.
+
+    Accepts a single observation of shape (OBSERVATION_DIM,) or a batch of shape
+    (B, OBSERVATION_DIM), with a boolean mask of matching leading shape.
+    """
+
+    def __init__(
+        self,
+        obs_dim: int = OBSERVATION_DIM,
+        action_dim: int = ACTION_DIM,
+        hidden_dim: int = 128,
+        deterministic: bool = True,
+    ):
+        super().__init__()
+        # same layout as the torchrl MLP in create_ppo_modules, so weights map one to one
+        self.net = torch.nn.Sequential(
+            torch.nn.Linear(obs_dim, hidden_dim),
+            torch.nn.Tanh(),
+            torch.nn.Linear(hidden_dim, hidden_dim),
+            torch.nn.Tanh(),
+            torch.nn.Linear(hidden_dim, action_dim),
+        )
+        self.deterministic = deterministic
+
+    def forward(self, observation: torch.Tensor, mask: torch.Tensor) -> torch.Tensor:
+        logits = self.net(observation)
+        logits = logits.masked_fill(~mask, float("-inf"))
+        if self.deterministic:
+            return logits.argmax(dim=-1)
+        # Gumbel-max trick: sampling from the masked categorical without building a distribution
+        gumbel = -torch.log(-torch.log(torch.rand_like(logits).clamp_min(1e-20)))
+        return (logits + gumbel).argmax(dim=-1)
+
+
+def policy_from_actor_state_dict(state_dict, deterministic: bool = True) -> InferencePolicy:
+    """Builds an InferencePolicy from the state dict of the ProbabilisticActor of create_ppo_modules."""
+    mlp_state = {
+        k[len(ACTOR_MLP_PREFIX):]: v for k, v in state_dict.items() if k.startswith(ACTOR_MLP_PREFIX)
+    }
+    if not mlp_state:
+        raise ValueError("State dict does not contain the actor MLP weights.")
+    hidden_dim, obs_dim = mlp_state["0.weight"].shape
+    action_dim = mlp_state["4.weight"].shape[0]
+    policy = InferencePolicy(obs_dim, action_dim, hidden_dim, deterministic=deterministic)
+    policy.net.load_state_dict(mlp_state)
+    return policy.eval()
+
+
+def build_inference_policy(
+    actor_path: str = "models/actor.pt",
+    method: str = "script",
+    quantize: bool = False,
+    deterministic: bool = True,
+):
+    """
+    Turns a trained `actor.pt` into a lean inference module.
+
+    Args:
+        actor_path (str): Path to the actor state dict saved by training.
+        method (str): "script" (TorchScript), "compile" (torch.compile) or "eager".
+        quantize (bool): Apply dynamic int8 quantization to the linear layers (CPU only).
+        deterministic (bool): Take the most likely legal action instead of sampling.
+
+    Returns:
+        torch.nn.Module: Callable as `policy(observation, mask) -> action`.
+    """
+    if method not in EXPORT_METHODS:
+        raise ValueError(f"Unknown export method {method}, expected one of {EXPORT_METHODS}.")
+    state_dict = torch.load(actor_path, map_location="cpu")
+    policy = policy_from_actor_state_dict(state_dict, deterministic=deterministic)
+    if quantize:
+        policy = torch.ao.quantization.quantize_dynamic(policy, {torch.nn.Linear}, dtype=torch.qint8)
+    if method == "script":
+        return torch.jit.script(policy)
+    if method == "compile":
+        return torch.compile(policy)
+    return policy
+
+
+def export_actor(
+    actor_path: str = "models/actor.pt",
+    output_path: str = "models/actor_inference.pt",
+    quantize: bool = False,
+    deterministic: bool = True,
+) -> str:
+    """
+    Exports a trained actor as a TorchScript file loadable with `load_inference_policy`.
+
+    torch.compile'd modules cannot be serialized; compile at load time instead.
+    """
+    policy = build_inference_policy(actor_path, method="script", quantize=quantize, deterministic=deterministic)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    policy.save(output_path)
+    return output_path
+
+
+def load_inference_policy(path: str = "models/actor_inference.pt"):
+    """Loads a policy exported by `export_actor`."""
+    return torch.jit.load(path, map_location="cpu").eval()
+
+
+def run_cli():
+    parser = argparse.ArgumentParser(description="Export a trained actor for inference.")
+    parser.add_argument("--actor", type=str, default="models/actor.pt")
+    parser.add_argument("--output", type=str, default="models/actor_inference.pt")
+    parser.add_argument("--quantize", action="store_true", help="Dynamic int8 quantization (CPU).")
+    parser.add_argument("--sample", action="store_true", help="Sample actions instead of taking the best one.")
+    args = parser.parse_args()
+
+    path = export_actor(args.actor, args.output, quantize=args.quantize, deterministic=not args.sample)
+    print(f"Exported inference policy to {path}")
+
+
+if __name__ == "__main__":
+    run_cli()
@@ -0,0 +1,283 @@
+"""Implements a local policy inference server shared by rollout worker processes.
+
+The server holds the only copy of the policy weights and listens on a Unix socket. Every worker
+connects with an `InferenceClient`, which is called like a policy, so a `PolicyAgent` plays with
+it unchanged. Requests of all connections go through one `BatchingDispatcher`, so the workers
+share forward passes; the learner pushes new weights through the same socket.
+
+Messages are frames of a 4-byte payload length, a 1-byte kind and the payload:
+    DECIDE: row count (4 bytes), float32 observations, uint8 masks -> int64 actions
+    UPDATE_WEIGHTS: state dict saved with `torch.save` -> weight version (8 bytes)
+    METRICS: empty -> `InferenceMetrics` as JSON
+A failed request is answered with an ERROR frame holding the message, the connection stays usable.
+"""
+
+import argparse
+import asyncio
+import collections
+import io
+import os
+import socket
+import struct
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+from pydantic import BaseModel
+import torch
+
+from camelgo.domain.agents.batching import BatchingDispatcher
+from camelgo.domain.environment.observation import ACTION_DIM, OBSERVATION_DIM
+from camelgo.domain.training.export import ACTOR_MLP_PREFIX, InferencePolicy, build_inference_policy
+
+
+DEFAULT_SOCKET_PATH = "/tmp/camelgo_inference.sock"
+
+HEADER = struct.Struct("!IB")
+ROWS = struct.Struct("!I")
+VERSION = struct.Struct("!Q")
+OK, DECIDE, UPDATE_WEIGHTS, METRICS, ERROR = 0, 1, 2, 3, 255
+
+OBSERVATION_BYTES = OBSERVATION_DIM * 4
+MASK_BYTES = ACTION_DIM
+
+
+class InferenceMetrics(BaseModel):
+    """Counters of an inference server, latencies over the most recent requests."""
+    requests: int
+    batches: int
+    mean_batch_size: float
+    throughput: float  # decisions per second since the server started
+    latency_p50_ms: float
+    latency_p99_ms: float
+    weight_version: int
+
+
+class InferenceServer:
+    """Serves a policy to the processes of this machine over a Unix socket."""
+
+    def __init__(
+        self,
+        policy: torch.nn.Module,
+        socket_path: str = DEFAULT_SOCKET_PATH,
+        max_batch_size: int = 256,
+        max_delay: float = 0.001,
+        latency_window: int = 10000,
+    ):
+        """
+        Args:
+            policy (torch.nn.Module): Maps observations and masks to actions, see `InferencePolicy`.
+            socket_path (str): Path of the Unix socket.
+            max_batch_size (int): Largest batch of a forward pass.
+            max_delay (float): Seconds a request waits for requests of other workers.
+            latency_window (int): Number of recent requests the latency percentiles are taken over.
+        """
+        self.policy = policy
+        self.socket_path = socket_path
+        self.dispatcher = BatchingDispatcher(policy, max_batch_size=max_batch_size, max_delay=max_delay)
+        self.weight_version = 0
+        self._latencies = collections.deque(maxlen=latency_window)
+        self._started = time.perf_counter()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def metrics(self) -> InferenceMetrics:
+        latencies = np.array(self._latencies) * 1000 if self._latencies else np.zeros(1)
+        return InferenceMetrics(
+            requests=self.dispatcher.num_requests,
+            batches=self.dispatcher.num_batches,
+            mean_batch_size=self.dispatcher.mean_batch_size,
+            throughput=self.dispatcher.num_requests / (time.perf_counter() - self._started),
+            latency_p50_ms=float(np.percentile(latencies, 50)),
+            latency_p99_ms=float(np.percentile(latencies, 99)),
+            weight_version=self.weight_version,
+        )
+
+    def load_weights(self, state_dict: dict) -> int:
+        """Loads an `InferencePolicy` or training actor state dict, returns the new weight version."""
+        if any(k.startswith(ACTOR_MLP_PREFIX) for k in state_dict):
+            self.policy.net.load_state_dict(
+                {k[len(ACTOR_MLP_PREFIX):]: v for k, v in state_dict.items() if k.startswith(ACTOR_MLP_PREFIX)}
+            )
+        else:
+            self.policy.load_state_dict(state_dict)
+        self.weight_version += 1
+        return self.weight_version
+
+    async def _respond(self, kind: int, payload: bytes, received: float) -> bytes:
+        if kind == DECIDE:
+            (rows,) = ROWS.unpack_from(payload)
+            if len(payload) != ROWS.size + rows * (OBSERVATION_BYTES + MASK_BYTES):
+                raise ValueError(f"Decision request of {len(payload)} bytes does not hold {rows} rows.")
+            observations = np.frombuffer(payload, np.float32, rows * OBSERVATION_DIM, ROWS.size)
+            observations = observations.reshape(rows, OBSERVATION_DIM)
+            masks = np.frombuffer(payload, np.bool_, rows * MASK_BYTES, ROWS.size + rows * OBSERVATION_BYTES)
+            masks = masks.reshape(rows, ACTION_DIM)
+            actions = await asyncio.gather(*(self.dispatcher.decide(o, m) for o, m in zip(observations, masks)))
+            self._latencies.extend([time.perf_counter() - received] * rows)
+            return np.array(actions, dtype=np.int64).tobytes()
+        if kind == UPDATE_WEIGHTS:
+            # weights are swapped between two batches, the event loop runs one thing at a time
+            return VERSION.pack(self.load_weights(torch.load(io.BytesIO(payload), weights_only=True)))
+        if kind == METRICS:
+            return self.metrics().model_dump_json().encode()
+        raise ValueError(f"Unknown request kind {kind}.")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                length, kind = HEADER.unpack(await reader.readexactly(HEADER.size))
+                payload = await reader.readexactly(length)
+                try:
+                    frame = _frame(OK, await self._respond(kind, payload, time.perf_counter()))
+                except Exception as exc:
+                    frame = _frame(ERROR, str(exc).encode())
+                writer.write(frame)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            # the worker went away
+            pass
+        finally:
+            writer.close()
+
+    async def serve_forever(self) -> None:
+        await self._listen()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _listen(self) -> None:
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+
+    def start(self) -> 'InferenceServer':
+        """Serves from a background thread of this process, returns once the socket is listening."""
+        self._loop = asyncio.new_event_loop()
+        self._loop.run_until_complete(self._listen())
+        self._thread = threading.Thread(target=self._loop.run_forever, name="inference-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._close(), self._loop)
+        future.result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    async def _close(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def __enter__(self) -> 'InferenceServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+class InferenceClient:
+    """
+    Blocking client of an `InferenceServer`, called like a policy: `client(observation, mask) -> action`.
+
+    The connection is opened on first use, so a client can be pickled into worker processes.
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH):
+        self.socket_path = socket_path
+        self._socket: Optional[socket.socket] = None
+
+    def __getstate__(self):
+        return {"socket_path": self.socket_path, "_socket": None}
+
+    def _request(self, kind: int, payload: bytes = b"") -> bytes:
+        if self._socket is None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(self.socket_path)
+        self._socket.sendall(_frame(kind, payload))
+        length, kind = HEADER.unpack(self._receive(HEADER.size))
+        response = self._receive(length)
+        if kind == ERROR:
+            raise RuntimeError(f"Inference server error: {response.decode()}")
+        return response
+
+    def _receive(self, size: int) -> bytes:
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        while view:
+            received = self._socket.recv_into(view)
+            if not received:
+                raise ConnectionError("Inference server closed the connection.")
+            view = view[received:]
+        return bytes(buffer)
+
+    def decide(self, observations: np.ndarray, masks: np.ndarray) -> np.ndarray:
+        """
+        Actions of a batch of observations.
+
+        Args:
+            observations (np.ndarray): (B, OBSERVATION_DIM) observations.
+            masks (np.ndarray): (B, ACTION_DIM) legal-action masks.
+
+        Returns:
+            np.ndarray: B actions.
+        """
+        observations = np.ascontiguousarray(observations, dtype=np.float32)
+        masks = np.ascontiguousarray(masks, dtype=np.bool_)
+        payload = ROWS.pack(len(observations)) + observations.tobytes() + masks.tobytes()
+        return np.frombuffer(self._request(DECIDE, payload), dtype=np.int64)
+
+    def __call__(self, observation, mask) -> torch.Tensor:
+        observation = np.asarray(observation, dtype=np.float32)
+        single = observation.ndim == 1
+        actions = self.decide(observation.reshape(-1, OBSERVATION_DIM), np.asarray(mask).reshape(-1, ACTION_DIM))
+        actions = torch.from_numpy(actions.copy())
+        return actions[0] if single else actions
+
+    def update_weights(self, state_dict: dict) -> int:
+        """Pushes an `InferencePolicy` or training actor state dict, returns the new weight version."""
+        buffer = io.BytesIO()
+        torch.save({k: v.detach().cpu() for k, v in state_dict.items()}, buffer)
+        (version,) = VERSION.unpack(self._request(UPDATE_WEIGHTS, buffer.getvalue()))
+        return version
+
+    def metrics(self) -> InferenceMetrics:
+        return InferenceMetrics.model_validate_json(self._request(METRICS))
+
+    def close(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+def _frame(kind: int, payload: bytes) -> bytes:
+    return HEADER.pack(len(payload), kind) + payload
+
+
+def run_cli():
+    parser = argparse.ArgumentParser(description="Serve a trained actor to the processes of this machine.")
+    parser.add_argument("--actor", type=str, default=None, help="Actor state dict, random weights if not given.")
+    parser.add_argument("--socket", type=str, default=DEFAULT_SOCKET_PATH)
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    parser.add_argument("--max-delay", type=float, default=0.001, help="Seconds a request waits for others.")
+    parser.add_argument("--sample", action="store_true", help="Sample actions instead of taking the best one.")
+    args = parser.parse_args()
+
+    if args.actor:
+        policy = build_inference_policy(args.actor, method="eager", deterministic=not args.sample)
+    else:
+        policy = InferencePolicy(deterministic=not args.sample).eval()
+    server = InferenceServer(policy, args.socket, max_batch_size=args.max_batch_size, max_delay=args.max_delay)
+    print(f"Serving inference on {args.socket}")
+    asyncio.run(server.serve_forever())
+
+
+if __name__ == "__main__":
+    run_cli()
@@ -1,29 +1,153 @@
 """Single-Agent PPO training script for CamelGo using TorchRL."""
 
-from tensordict.nn import TensorDictModule
+import functools
+import time
+
+from tensordict.nn import TensorDictModule, TensorDictSequential
 import torch
 from torchrl.envs import GymWrapper, ParallelEnv
 from torchrl.envs.libs.gym import default_info_dict_reader
-from torchrl.collectors import SyncDataCollector
-from torchrl.data import ReplayBuffer, LazyMemmapStorage
+from torchrl.collectors import MultiaSyncDataCollector, MultiSyncDataCollector, SyncDataCollector
+from torchrl.data import Binary, ReplayBuffer, LazyMemmapStorage
 from torchrl.modules import MLP, ProbabilisticActor
 from torchrl.modules.distributions import MaskedCategorical
 from torchrl.objectives import ClipPPOLoss
 from torchrl.objectives.value import GAE
 
+from camelgo.domain.agents.agent_types import AgentType
 from camelgo.domain.environment.gym_env import CamelGoEnv
+from camelgo.domain.training.checkpoint import (
+    CheckpointWriter, capture_rng_state, load_checkpoint, restore_rng_state
+)
+from camelgo.domain.training.export import policy_from_actor_state_dict
+from camelgo.domain.training.inference_server import InferenceClient, InferenceServer
 
 
-def make_env():
-    env = CamelGoEnv()
+def make_env(reuse_buffers=False, opponent_socket=None):
+    """
+    Args:
+        reuse_buffers (bool): Let the env overwrite the same observation and mask arrays every
+            step. GymWrapper reads them without copying, so this is only safe under ParallelEnv,
+            whose workers copy every step into the shared memory read by the parent process.
+        opponent_socket (str, optional): Socket of an InferenceServer. If given, the opponents
+            play with the policy it serves instead of randomly.
+    """
+    if opponent_socket is None:
+        env = CamelGoEnv(reuse_buffers=reuse_buffers)
+    else:
+        env = CamelGoEnv(
+            opponent_type=AgentType.PPO,
+            reuse_buffers=reuse_buffers,
+            opponent_kwargs={"policy": InferenceClient(opponent_socket)},
+        )
     # Converts to TorchRL Env
     # Important: Use categorical action encoding for discrete actions
     # Otherwise, TorchRL may misinterpret the action space
     env = GymWrapper(env, categorical_action_encoding=True)
-    env.set_info_dict_reader(default_info_dict_reader(["mask"]))
+    # The mask spec must be declared up front, otherwise ParallelEnv allocates
+    # its shared buffers before the first reset with a scalar placeholder.
+    env.set_info_dict_reader(default_info_dict_reader(
+        ["mask"], spec={"mask": Binary(n=CamelGoEnv.ACTION_DIM, dtype=torch.bool)}
+    ))
     return env
 
 
+def make_collector_env(num_workers=1, opponent_socket=None):
+    """Environment factory for a single collector: one env, or a ParallelEnv of `num_workers` envs."""
+    if num_workers > 1:
+        return ParallelEnv(num_workers, functools.partial(make_env, reuse_buffers=True, opponent_socket=opponent_socket))
+    return make_env(opponent_socket=opponent_socket)
+
+
+class PolicyVersion(torch.nn.Module):
+    """
+    Stamps every collected frame with the version of the policy weights that produced it.
+
+    The version lives in a buffer, so it travels to the collector workers together with the
+    weights. The learner bumps it after every update and can then measure how many updates
+    behind a batch is.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.register_buffer("version", torch.zeros((), dtype=torch.int64))
+
+    def forward(self, logits):
+        return self.version.expand(logits.shape[:-1]).clone()
+
+    def bump(self):
+        self.version += 1
+
+
+def create_collector(
+    actor,
+    frames_per_batch,
+    total_frames,
+    device,
+    num_workers=1,
+    num_collectors=1,
+    async_collection=False,
+    policy_version=None,
+    opponent_socket=None,
+):
+    """
+    Creates the data collector for the requested layout.
+
+    Args:
+        actor (ProbabilisticActor): The policy used for collection.
+        frames_per_batch (int): Frames handed to the learner per iteration.
+        total_frames (int): Total frames to collect.
+        device (torch.device): Device of the policy.
+        num_workers (int): Environments stepped in parallel inside each collector.
+        num_collectors (int): Number of collector processes.
+        async_collection (bool): If True, collectors keep stepping their environments while the
+            learner updates, and batches are handed over as soon as any collector is ready.
+        policy_version (PolicyVersion, optional): If given, collected frames carry a
+            "policy_version" entry used to measure policy lag.
+        opponent_socket (str, optional): Socket of the InferenceServer the opponents play with.
+
+    Returns:
+        The collector.
+    """
+    policy = actor
+    if policy_version is not None:
+        policy = TensorDictSequential(
+            actor, TensorDictModule(policy_version, in_keys=["logits"], out_keys=["policy_version"])
+        )
+
+    if num_collectors <= 1:
+        return SyncDataCollector(
+            make_collector_env(num_workers, opponent_socket),
+            policy,
+            frames_per_batch=frames_per_batch,
+            total_frames=total_frames,
+            split_trajs=False,
+            device=device,
+        )
+
+    create_env_fns = [functools.partial(make_collector_env, num_workers, opponent_socket)] * num_collectors
+    if async_collection:
+        # every collector delivers a full batch on its own
+        return MultiaSyncDataCollector(
+            create_env_fns,
+            policy,
+            frames_per_batch=frames_per_batch,
+            total_frames=total_frames,
+            split_trajs=False,
+            device=device,
+        )
+    # synchronous: the batch is split across collectors and gathered before each update
+    return MultiSyncDataCollector(
+        create_env_fns,
+        policy,
+        frames_per_batch=frames_per_batch,
+        total_frames=total_frames,
+        split_trajs=False,
+        device=device,
+        cat_results="stack",
+    )
+
+
 def create_ppo_modules(
         obs_dim=CamelGoEnv.OBSERVATION_DIM, 
         action_dim=CamelGoEnv.ACTION_DIM, 
@@ -91,34 +215,86 @@ def train(
     num_epochs=10,
     lr=3e-4,
     device="cpu", # or "cuda"
-    num_workers=1
+    num_workers=1,
+    num_collectors=1,
+    async_collection=False,
+    max_policy_lag=None,
+    checkpoint_dir="checkpoints",
+    checkpoint_every=None,
+    resume_from=None,
+    opponent_socket=None,
 ):
+    """
+    Trains the PPO agent.
+
+    Args:
+        total_frames (int): Total frames to collect.
+        frames_per_batch (int): Frames per learner iteration.
+        num_epochs (int): PPO epochs per batch.
+        lr (float): Learning rate.
+        device (str): Device of the networks.
+        num_workers (int): Environments per collector (ParallelEnv if > 1).
+        num_collectors (int): Number of collector processes. With more than one collector,
+            the policy weights are synced to the collectors after every update.
+        async_collection (bool): Overlap environment stepping with PPO updates.
+        max_policy_lag (int, optional): Drop batches collected with weights more than this many
+            updates old. Only meaningful with asynchronous collection.
+        checkpoint_dir (str): Directory for periodic checkpoints.
+        checkpoint_every (int, optional): Write a checkpoint every this many batches.
+            Checkpoints are written by a background thread. Disabled if None.
+        resume_from (str, optional): Checkpoint file (or directory, for its latest checkpoint)
+            to resume from. Networks, optimizer, scheduler, RNG states and frame counters
+            are restored; collection restarts from fresh episodes.
+        opponent_socket (str, optional): Self-play: an InferenceServer serving the actor is started
+            on this socket, the opponents of every environment play with it, and the new weights
+            are pushed to it after every update.
+
+    Returns:
+        dict: Training logs, including per-batch frames/second.
+    """
     device = torch.device(device)
-    
-    # 1. Define Environment
-    # Use ParallelEnv if >1 worker, else normal
-    if num_workers > 1:
-        create_env_fn = make_env
-        env = ParallelEnv(num_workers, create_env_fn)
-    else:
-        env = make_env()
-        
-    # 2. Define Network
+    if max_policy_lag is not None and max_policy_lag < 0:
+        raise ValueError(f"max_policy_lag must be non-negative, got {max_policy_lag}.")
+
+    # 1. Define Network
     actor, value_operator = create_ppo_modules(
         obs_dim=CamelGoEnv.OBSERVATION_DIM, 
         action_dim=CamelGoEnv.ACTION_DIM, 
         hidden_dim=128, 
         device=device
     )
+    # loaded on the CPU, where the RNG states must stay; load_state_dict moves the rest to the device
+    checkpoint = load_checkpoint(resume_from) if resume_from else None
+    frames_done = checkpoint["frames_collected"] if checkpoint else 0
+    batches_done = checkpoint["batches_done"] if checkpoint else 0
+    if checkpoint:
+        actor.load_state_dict(checkpoint["actor"])
+        value_operator.load_state_dict(checkpoint["critic"])
+        if frames_done >= total_frames:
+            raise ValueError(f"Checkpoint already has {frames_done} frames, total_frames is {total_frames}.")
+
+    # 2. Opponents, one copy of the actor weights serves the opponents of all environments
+    opponent_server = opponent_client = None
+    if opponent_socket is not None:
+        opponent_policy = policy_from_actor_state_dict(actor.state_dict(), deterministic=False)
+        opponent_server = InferenceServer(opponent_policy, opponent_socket).start()
+        opponent_client = InferenceClient(opponent_socket)
 
     # 3. Collector
-    collector = SyncDataCollector(
-        env,
+    # Frames are stamped with the weights version when collection happens in other processes
+    policy_version = PolicyVersion().to(device) if num_collectors > 1 else None
+    if policy_version is not None and checkpoint:
+        policy_version.version.fill_(checkpoint["policy_version"])
+    collector = create_collector(
         actor,
         frames_per_batch=frames_per_batch,
-        total_frames=total_frames,
-        split_trajs=False,
+        total_frames=total_frames - frames_done,
         device=device,
+        num_workers=num_workers,
+        num_collectors=num_collectors,
+        async_collection=async_collection,
+        policy_version=policy_version,
+        opponent_socket=opponent_socket,
     )
 
     # 4. Loss
@@ -141,6 +317,9 @@ def train(
     scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(
         optim, total_frames // frames_per_batch, 0.0
     )
+    if checkpoint:
+        optim.load_state_dict(checkpoint["optimizer"])
+        scheduler.load_state_dict(checkpoint["scheduler"])
 
     # 6. Replay Buffer
     replay_buffer = ReplayBuffer(
@@ -149,10 +328,56 @@ def train(
     )
 
     # 7. Loop
-    print(f"Starting training on {device}...")
-    logs = {"reward": [], "step_count": []}
-    
-    for i, tensordict_data in enumerate(collector):
+    mode = "async" if async_collection and num_collectors > 1 else "sync"
+    print(
+        f"Starting training on {device} with {num_collectors} {mode} collector(s) "
+        f"x {num_workers} env(s)..."
+    )
+    logs = {"reward": [], "step_count": [], "fps": [], "policy_lag": [], "dropped_batches": 0}
+    if checkpoint:
+        logs = checkpoint["logs"]
+        # restored last so that building the modules above does not consume random numbers
+        restore_rng_state(checkpoint["rng"])
+        print(f"Resumed from {resume_from} at {frames_done} frames.")
+    checkpoint_writer = CheckpointWriter(checkpoint_dir) if checkpoint_every else None
+    start_time = time.perf_counter()
+    batch_start = start_time
+    frames_collected = frames_done
+
+    def save_checkpoint(batches):
+        # dropped batches count too, so that checkpoints stay every `checkpoint_every` batches
+        if checkpoint_writer is None or batches % checkpoint_every:
+            return
+        checkpoint_writer.save({
+            "actor": actor.state_dict(),
+            "critic": value_operator.state_dict(),
+            "optimizer": optim.state_dict(),
+            "scheduler": scheduler.state_dict(),
+            "rng": capture_rng_state(),
+            "frames_collected": frames_collected,
+            "batches_done": batches,
+            "policy_version": int(policy_version.version) if policy_version is not None else 0,
+            "logs": logs,
+        }, frames=frames_collected)
+
+    for i, tensordict_data in enumerate(collector, start=batches_done):
+        batch_frames = tensordict_data.numel()
+        frames_collected += batch_frames
+        # Frames/second counts the whole iteration (waiting for data + update)
+        now = time.perf_counter()
+        fps = batch_frames / max(now - batch_start, 1e-9)
+        batch_start = now
+
+        lag = 0
+        if policy_version is not None:
+            lag = int(policy_version.version - tensordict_data["policy_version"].min())
+        logs["policy_lag"].append(lag)
+        if max_policy_lag is not None and lag > max_policy_lag:
+            logs["dropped_batches"] += 1
+            print(f"Batch {i}: dropped, policy lag {lag} > {max_policy_lag}")
+            save_checkpoint(i + 1)
+            continue
+
         # Calc Advantage
         with torch.no_grad():
             advantage_module(tensordict_data)
@@ -179,13 +404,31 @@ def train(
                 optim.step()
                  
         scheduler.step()
-        
+
+        # Push the new weights to the collector processes
+        if policy_version is not None:
+            policy_version.bump()
+            collector.update_policy_weights_()
+        if opponent_client is not None:
+            opponent_client.update_weights(actor.state_dict())
+
         # Logging
         avg_reward = tensordict_data["next", "reward"].mean().item()
-        print(f"Batch {i}: Avg Reward = {avg_reward:.4f}")
+        print(f"Batch {i}: Avg Reward = {avg_reward:.4f} | FPS = {fps:.0f} | Policy Lag = {lag}")
         logs["reward"].append(avg_reward)
-        
-    print("Training Complete.")
+        logs["fps"].append(fps)
+        save_checkpoint(i + 1)
+
+    collector.shutdown()
+    if opponent_server is not None:
+        print(f"Opponent inference: {opponent_client.metrics()}")
+        opponent_client.close()
+        opponent_server.stop()
+    if checkpoint_writer is not None:
+        checkpoint_writer.close()
+    elapsed = time.perf_counter() - start_time
+    logs["total_fps"] = (frames_collected - frames_done) / max(elapsed, 1e-9)
+    print(f"Training Complete. {frames_collected} frames in {elapsed:.1f}s ({logs['total_fps']:.0f} frames/s).")
     
     # Save Model
     import os
@@ -193,20 +436,42 @@ def train(
     torch.save(actor.state_dict(), "models/actor.pt")
     torch.save(value_operator.state_dict(), "models/critic.pt")
     print("Models saved to models/")
+    return logs
 
 
 def run_cli():
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("--device", type=str, default="cpu")
-    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1, help="Environments per collector.")
     parser.add_argument("--frames", type=int, default=10_000)
+    parser.add_argument("--frames-per-batch", type=int, default=1_000)
+    parser.add_argument("--collectors", type=int, default=1, help="Number of collector processes.")
+    parser.add_argument("--async-collection", action="store_true",
+                        help="Overlap environment stepping with PPO updates (needs --collectors > 1).")
+    parser.add_argument("--max-policy-lag", type=int, default=None,
+                        help="Drop batches collected with weights more than this many updates old.")
+    parser.add_argument("--checkpoint-dir", type=str, default="checkpoints")
+    parser.add_argument("--checkpoint-every", type=int, default=None,
+                        help="Write a checkpoint every this many batches.")
+    parser.add_argument("--resume", type=str, default=None,
+                        help="Checkpoint file, or checkpoint directory to resume from its latest checkpoint.")
+    parser.add_argument("--opponent-socket", type=str, default=None,
+                        help="Self-play: serve the actor to the opponents of all environments on this Unix socket.")
     args = parser.parse_args()
     
     train(
         total_frames=args.frames,
+        frames_per_batch=args.frames_per_batch,
         device=args.device,
-        num_workers=args.workers
+        num_workers=args.workers,
+        num_collectors=args.collectors,
+        async_collection=args.async_collection,
+        max_policy_lag=args.max_policy_lag,
+        checkpoint_dir=args.checkpoint_dir,
+        checkpoint_every=args.checkpoint_every,
+        resume_from=args.resume,
+        opponent_socket=args.opponent_socket,
     )
 
 
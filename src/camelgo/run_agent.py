@@ -1,11 +1,31 @@
-"""Script to run a trained CamelGo agent in a simulation environment and display the game progress."""
+"""Script to run a trained CamelGo agent in a simulation environment and display the game progress.
 
-import torch
+With `--evaluate`, plays many seeded games in a process pool instead and reports win rate,
+final points and per-leg rewards with confidence intervals.
+"""
 
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import math
+import os
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from camelgo.domain.agents.agent_types import AgentType
 from camelgo.domain.environment.action import ActionInt
 from camelgo.domain.environment.game_config import GameConfig
-from camelgo.domain.environment.gym_env import CamelGoEnv
-from camelgo.domain.training.single_agent_ppo import create_ppo_modules, make_env
+
+# torch, torchrl and gymnasium take seconds to import, they are imported by the functions playing games
+if TYPE_CHECKING:
+    from camelgo.domain.environment.gym_env import CamelGoEnv
+
+
+EVAL_CACHE_DIR = ".eval_cache"
+Z_95 = 1.96  # two-sided 95% normal quantile
 
 
 def get_action_description(action_idx):
@@ -19,6 +39,11 @@ def load_agent(model_path="models/actor.pt"):
     Reconstructs the agent architecture and loads trained weights.
     Structure must match src/camelgo/training/single_agent_ppo.py
     """
+    import torch
+
+    from camelgo.domain.environment.gym_env import CamelGoEnv
+    from camelgo.domain.training.single_agent_ppo import create_ppo_modules
+
     # 1. Define Network Architecture
     actor, _ = create_ppo_modules(
         obs_dim=CamelGoEnv.OBSERVATION_DIM, 
@@ -41,9 +66,240 @@ def load_agent(model_path="models/actor.pt"):
     return actor
 
 
-def main():
+class Estimate(BaseModel):
+    """A sample mean with its 95% confidence interval."""
+    mean: float
+    low: float
+    high: float
+    n: int
+
+    @classmethod
+    def from_samples(cls, samples: List[float]) -> 'Estimate':
+        n = len(samples)
+        mean = float(np.mean(samples)) if n else 0.0
+        half_width = Z_95 * float(np.std(samples, ddof=1)) / math.sqrt(n) if n > 1 else 0.0
+        return cls(mean=mean, low=mean - half_width, high=mean + half_width, n=n)
+
+    @classmethod
+    def from_proportion(cls, successes: int, n: int) -> 'Estimate':
+        # Wilson score interval, well behaved for win rates close to 0 or 1
+        if n == 0:
+            return cls(mean=0.0, low=0.0, high=1.0, n=0)
+        p = successes / n
+        denom = 1 + Z_95 ** 2 / n
+        center = (p + Z_95 ** 2 / (2 * n)) / denom
+        half_width = Z_95 * math.sqrt(p * (1 - p) / n + Z_95 ** 2 / (4 * n ** 2)) / denom
+        # the bounds are within [0, 1] up to rounding
+        return cls(mean=p, low=max(0.0, center - half_width), high=min(1.0, center + half_width), n=n)
+
+    def __str__(self):
+        return f"{self.mean:.3f} [{self.low:.3f}, {self.high:.3f}]"
+
+
+class EvaluationReport(BaseModel):
+    """Aggregated results of an evaluation run."""
+    checkpoint_hash: str
+    opponent_type: str
+    num_opponents: int
+    agent_seat: int
+    num_games: int
+    win_rate: Estimate
+    final_points: Estimate
+    leg_rewards: Dict[int, Estimate]  # leg number -> reward collected by the agent during that leg
+
+
+def play_evaluation_game(env: "CamelGoEnv", policy, seed: int) -> dict:
+    """
+    Plays one seeded game with the policy and returns its outcome.
+
+    The seed fixes the dice (through the environment) and the opponents' random choices.
+    """
+    import torch
+
+    np.random.seed(seed)
+    obs, info = env.reset(seed=seed)
+    leg_rewards = {}
+    terminated = truncated = False
+    while not (terminated or truncated):
+        leg_number = env.game.legs_played + 1
+        with torch.no_grad():
+            action = policy(torch.from_numpy(obs), torch.from_numpy(info["mask"])).item()
+        obs, reward, terminated, truncated, info = env.step(action)
+        leg_rewards[leg_number] = leg_rewards.get(leg_number, 0.0) + reward
+    winner = env.game.winner_player()
+    return {
+        "seed": seed,
+        "won": winner is not None and winner.name == env.agent_name,
+        "final_points": env.game.players[env.agent_name].points,
+        "leg_rewards": leg_rewards,
+    }
+
+
+# per-process state of the evaluation workers
+_worker_env: Optional["CamelGoEnv"] = None
+_worker_policy = None
+
+
+def _init_evaluation_worker(state_dict, opponent_type: str, num_opponents: int, agent_seat: int,
+                            opponent_kwargs: Optional[dict] = None):
+    import torch
+
+    from camelgo.domain.environment.gym_env import CamelGoEnv
+    from camelgo.domain.training.export import policy_from_actor_state_dict
+
+    global _worker_env, _worker_policy
+    torch.set_num_threads(1)
+    _worker_env = CamelGoEnv(
+        opponent_type=AgentType(opponent_type), num_opponents=num_opponents, agent_seat=agent_seat,
+        opponent_kwargs=opponent_kwargs,
+    )
+    _worker_policy = policy_from_actor_state_dict(state_dict)
+
+
+def _evaluate_seeds(seeds: List[int]) -> List[dict]:
+    return [play_evaluation_game(_worker_env, _worker_policy, seed) for seed in seeds]
+
+
+def _file_hash(path: str) -> str:
+    """SHA-256 of a file, empty if there is none."""
+    if not os.path.exists(path):
+        return ""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _opponent_hash(opponent_type: str, opponent_actor: Optional[str]) -> str:
+    """Hash of the files the opponents play with, so that cached reports go stale with them."""
+    if opponent_type == AgentType.PPO.value:
+        paths = [opponent_actor]
+    elif opponent_type == AgentType.EXPECTED_VALUE_MAX.value:
+        from camelgo.domain.analysis.odds_table import DEFAULT_ODDS_TABLE_PATH
+        from camelgo.domain.analysis.opening_book import DEFAULT_OPENING_BOOK_PATH
+
+        paths = [DEFAULT_ODDS_TABLE_PATH, DEFAULT_OPENING_BOOK_PATH]
+    else:
+        paths = []
+    return hashlib.sha256("|".join(_file_hash(path) for path in paths).encode()).hexdigest()
+
+
+def _evaluation_cache_key(checkpoint_hash: str, opponent_type: str, opponent_hash: str, num_opponents: int,
+                          agent_seat: int, seeds: List[int]) -> str:
+    seeds_hash = hashlib.sha256(json.dumps(list(seeds)).encode()).hexdigest()
+    key = f"{checkpoint_hash}|{opponent_type}|{opponent_hash}|{num_opponents}|{agent_seat}|{seeds_hash}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def summarize_games(results: List[dict], **report_fields) -> EvaluationReport:
+    num_legs = max((max(r["leg_rewards"]) for r in results if r["leg_rewards"]), default=0)
+    leg_rewards = {}
+    for leg in range(1, num_legs + 1):
+        # games that ended before this leg are left out of its estimate
+        samples = [r["leg_rewards"][leg] for r in results if leg in r["leg_rewards"]]
+        leg_rewards[leg] = Estimate.from_samples(samples)
+    return EvaluationReport(
+        num_games=len(results),
+        win_rate=Estimate.from_proportion(sum(r["won"] for r in results), len(results)),
+        final_points=Estimate.from_samples([r["final_points"] for r in results]),
+        leg_rewards=leg_rewards,
+        **report_fields,
+    )
+
+
+def evaluate(
+    model_path: str = "models/actor.pt",
+    opponent_type: AgentType = AgentType.RANDOM_PLAYER,
+    num_opponents: int = 1,
+    agent_seat: int = 0,
+    seeds: Optional[List[int]] = None,
+    num_processes: int = os.cpu_count() or 1,
+    cache_dir: Optional[str] = EVAL_CACHE_DIR,
+    opponent_actor: Optional[str] = None,
+) -> EvaluationReport:
+    """
+    Evaluates a trained actor over many seeded games.
+
+    Args:
+        model_path (str): Path to the actor state dict.
+        opponent_type (AgentType): Type of all opponents.
+        num_opponents (int): Number of opponents.
+        agent_seat (int): Seat of the agent; seat 0 plays first.
+        seeds (list[int]): One game per seed. Defaults to seeds 0..999.
+        num_processes (int): Size of the process pool.
+        cache_dir (str, optional): Reports are cached per (checkpoint hash, opponents and the hash of
+            the files they play with, seat, seeds). Set to None to disable caching.
+        opponent_actor (str, optional): Path to the actor state dict of PPO opponents, required for them.
+
+    Returns:
+        EvaluationReport: The aggregated results.
+    """
+    seeds = list(range(1000)) if seeds is None else list(seeds)
+    with open(model_path, "rb") as f:
+        checkpoint_hash = hashlib.sha256(f.read()).hexdigest()
+    opponent = AgentType(opponent_type).value
+    opponent_kwargs = {}
+    if opponent == AgentType.PPO.value:
+        if opponent_actor is None:
+            raise ValueError("PPO opponents need the path of their actor, see `opponent_actor`.")
+        opponent_kwargs["actor_path"] = opponent_actor
+
+    cache_path = None
+    if cache_dir is not None:
+        opponent_hash = _opponent_hash(opponent, opponent_actor)
+        key = _evaluation_cache_key(checkpoint_hash, opponent, opponent_hash, num_opponents, agent_seat, seeds)
+        cache_path = os.path.join(cache_dir, f"{key}.json")
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                return EvaluationReport.model_validate_json(f.read())
+
+    import torch
+
+    state_dict = torch.load(model_path, map_location="cpu")
+    init_args = (state_dict, opponent, num_opponents, agent_seat, opponent_kwargs)
+    num_processes = max(1, min(num_processes, len(seeds)))
+    # a few chunks per process balances the load without much IPC
+    chunk_size = max(1, math.ceil(len(seeds) / (num_processes * 4)))
+    chunks = [seeds[i:i + chunk_size] for i in range(0, len(seeds), chunk_size)]
+    if num_processes == 1:
+        _init_evaluation_worker(*init_args)
+        results = [r for chunk in chunks for r in _evaluate_seeds(chunk)]
+    else:
+        with ProcessPoolExecutor(num_processes, initializer=_init_evaluation_worker, initargs=init_args) as pool:
+            results = [r for chunk_results in pool.map(_evaluate_seeds, chunks) for r in chunk_results]
+
+    report = summarize_games(
+        results,
+        checkpoint_hash=checkpoint_hash,
+        opponent_type=opponent,
+        num_opponents=num_opponents,
+        agent_seat=agent_seat,
+    )
+    if cache_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path, "w") as f:
+            f.write(report.model_dump_json())
+    return report
+
+
+def print_report(report: EvaluationReport):
+    print("-" * 50)
+    print(f"Evaluation over {report.num_games} games against {report.num_opponents} "
+          f"{report.opponent_type} opponent(s), agent in seat {report.agent_seat}")
+    print("-" * 50)
+    print(f"Win Rate:     {report.win_rate}")
+    print(f"Final Points: {report.final_points}")
+    print("Reward by Leg:")
+    for leg, estimate in report.leg_rewards.items():
+        print(f"  Leg {leg:2d}: {estimate} (n={estimate.n})")
+    print("-" * 50)
+
+
+def show_game(model_path: str = "models/actor.pt"):
+    import torch
+
+    from camelgo.domain.training.single_agent_ppo import make_env
+
     env = make_env()
-    actor = load_agent()
+    actor = load_agent(model_path)
     # evaluation mode
     actor.eval()
     
@@ -79,5 +335,36 @@ def main():
     print("-" * 50)
 
 
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", type=str, default="models/actor.pt")
+    parser.add_argument("--evaluate", action="store_true", help="Evaluate over many seeded games.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed-start", type=int, default=0)
+    parser.add_argument("--opponent", type=str, default=AgentType.RANDOM_PLAYER.value,
+                        choices=[t.value for t in AgentType])
+    parser.add_argument("--opponent-actor", type=str, default=None, help="Actor state dict of PPO opponents.")
+    parser.add_argument("--opponents", type=int, default=1, help="Number of opponents.")
+    parser.add_argument("--seat", type=int, default=0, help="Seat of the agent, 0 plays first.")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    if not args.evaluate:
+        show_game(args.model)
+        return
+    report = evaluate(
+        model_path=args.model,
+        opponent_type=AgentType(args.opponent),
+        num_opponents=args.opponents,
+        agent_seat=args.seat,
+        seeds=range(args.seed_start, args.seed_start + args.games),
+        num_processes=args.processes,
+        cache_dir=None if args.no_cache else EVAL_CACHE_DIR,
+        opponent_actor=args.opponent_actor,
+    )
+    print_report(report)
+
+
 if __name__ == "__main__":
     main()
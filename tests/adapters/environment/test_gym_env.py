@@ -83,3 +83,48 @@ class TestCamelGoEnv:
                 break
             assert obs.shape == (CamelGoEnv.OBSERVATION_DIM,)
 
+
+    def test_agent_seat(self):
+        env = CamelGoEnv(num_opponents=2, agent_seat=1)
+        assert env.player_names == ["Opponent_1", env.agent_name, "Opponent_2"]
+        env.reset(seed=0)
+        # the opponent in seat 0 has played, so it is the agent's turn
+        assert env.game.current_leg.next_player == env.agent_name
+
+    def test_reuse_buffers(self):
+        # the random opponents draw from the global numpy generator
+        env = CamelGoEnv(reuse_buffers=True)
+        np.random.seed(0)
+        obs, info = env.reset(seed=0)
+        copied = CamelGoEnv()
+        np.random.seed(0)
+        copied_obs, copied_info = copied.reset(seed=0)
+        np.testing.assert_array_equal(obs, copied_obs)
+        np.testing.assert_array_equal(info["mask"], copied_info["mask"])
+        first_obs = obs.copy()
+
+        np.random.seed(1)
+        next_obs, _, _, _, next_info = env.step(0)
+        np.random.seed(1)
+        copied_next_obs, _, _, _, copied_next_info = copied.step(0)
+        # the same arrays are overwritten in place
+        assert next_obs is obs and next_info["mask"] is info["mask"]
+        np.testing.assert_array_equal(next_obs, copied_next_obs)
+        np.testing.assert_array_equal(next_info["mask"], copied_next_info["mask"])
+        # without reuse, earlier observations are left untouched
+        assert copied_next_obs is not copied_obs
+        np.testing.assert_array_equal(copied_obs, first_obs)
+
+    def test_reset_recycles_the_game(self):
+        env = CamelGoEnv(num_opponents=2, agent_seat=2)
+        env.reset(seed=0)
+        game = env.game
+        for _ in range(5):
+            env.step(0)
+        np.random.seed(0)
+        obs, info = env.reset(seed=1)
+        assert env.game is game
+        np.random.seed(0)
+        new_obs, new_info = CamelGoEnv(num_opponents=2, agent_seat=2).reset(seed=1)
+        np.testing.assert_array_equal(obs, new_obs)
+        np.testing.assert_array_equal(info["mask"], new_info["mask"])
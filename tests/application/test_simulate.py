@@ -0,0 +1,26 @@
+import json
+
+from camelgo import main
+from camelgo.application.simulate import simulate
+from camelgo.domain.agents.agent_types import AgentType
+
+
+def test_simulate_streams_every_game(tmp_path):
+    output = tmp_path / "games.jsonl"
+    report = simulate([AgentType.RANDOM_PLAYER] * 3, seeds=range(4), num_processes=1, output_path=str(output))
+
+    games = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [game["seed"] for game in games] == [0, 1, 2, 3]
+    assert report.num_games == 4 and report.games_per_second > 0
+    assert report.mean_steps == sum(game["steps"] for game in games) / 4
+    assert sum(report.win_rates.values()) == 1
+    assert list(report.win_rates) == ["P1_RANDOM_PLAYER", "P2_RANDOM_PLAYER", "P3_RANDOM_PLAYER"]
+
+    # seeded games are replayed identically
+    again = simulate([AgentType.RANDOM_PLAYER] * 3, seeds=[2], num_processes=1)
+    assert again.win_rates[games[2]["winner"]] == 1
+
+
+def test_main_runs_the_simulate_command(tmp_path, capsys):
+    main(["simulate", "--games", "2", "--processes", "1", "--output", str(tmp_path / "games.jsonl")])
+    assert "Games/second" in capsys.readouterr().out
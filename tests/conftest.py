@@ -0,0 +1,11 @@
+import pytest
+
+from camelgo.domain.environment.game import Game
+
+
+@pytest.fixture(autouse=True, scope="session")
+def strict_construction():
+    """Games built from trusted data are checked against a validation of the data in the tests."""
+    Game.strict_construction = True
+    yield
+    Game.strict_construction = False
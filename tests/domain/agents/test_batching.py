@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+import torch
+
+from camelgo.domain.agents.batching import BatchingDispatcher, play_game
+from camelgo.domain.agents.policy_agent import PolicyAgent
+from camelgo.domain.environment.dice import DiceRoller
+from camelgo.domain.environment.game import Game
+from camelgo.domain.training.export import InferencePolicy
+
+
+PLAYERS = ["Alice", "Bob"]
+
+
+@pytest.fixture
+def policy():
+    torch.manual_seed(0)
+    return InferencePolicy().eval()
+
+
+def new_games(num_games):
+    return [Game.start_game(player_names=PLAYERS, dice_roller=DiceRoller(seed=seed)) for seed in range(num_games)]
+
+
+def test_concurrent_games_share_batches(policy):
+    sequential = new_games(8)
+    for game in sequential:
+        asyncio.run(play_game(game, {name: PolicyAgent(policy, name=name) for name in PLAYERS}))
+
+    dispatcher = BatchingDispatcher(policy)
+    agents = {name: PolicyAgent(name=name, dispatcher=dispatcher) for name in PLAYERS}
+
+    async def play_all(games):
+        return await asyncio.gather(*(play_game(game, agents) for game in games))
+
+    concurrent = asyncio.run(play_all(new_games(8)))
+    # batching does not change the decisions
+    assert [g.model_dump() for g in concurrent] == [g.model_dump() for g in sequential]
+    # every game waiting on a decision joins the same batch
+    assert dispatcher.mean_batch_size > 4
+
+
+def test_full_batch_and_deadline(policy):
+    dispatcher = BatchingDispatcher(policy, max_batch_size=3, max_delay=10.0)
+    game = new_games(1)[0]
+    agent = PolicyAgent(name="Alice", dispatcher=dispatcher)
+
+    async def decide(n):
+        return await asyncio.wait_for(asyncio.gather(*(agent.aplay(game) for _ in range(n))), timeout=1.0)
+
+    # a full batch does not wait for the deadline
+    actions = asyncio.run(decide(3))
+    assert len({a.model_dump_json() for a in actions}) == 1
+    assert (dispatcher.num_batches, dispatcher.num_requests) == (1, 3)
+    # a partial batch waits for it
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(decide(2))
+
+
+def test_policy_errors_reach_every_request():
+    def failing_policy(observations, masks):
+        raise RuntimeError("no weights")
+
+    agent = PolicyAgent(name="Alice", dispatcher=BatchingDispatcher(failing_policy))
+    game = new_games(1)[0]
+
+    async def decide():
+        return await asyncio.gather(agent.aplay(game), agent.aplay(game), return_exceptions=True)
+
+    errors = asyncio.run(decide())
+    assert all(isinstance(e, RuntimeError) for e in errors)
@@ -0,0 +1,36 @@
+import pytest
+
+from camelgo.domain.agents.expected_value import ExpectedValueAgent
+from camelgo.domain.analysis.endgame import EndgameSolver, is_endgame
+from camelgo.domain.analysis.odds_table import LegOddsTable
+from camelgo.domain.analysis.opening_book import OpeningBook
+from camelgo.domain.environment.action import Action, ActionInt
+from camelgo.domain.environment.dice import DiceRoller
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.game_config import Color
+
+
+def test_takes_the_best_leg_bet_then_rolls():
+    game = Game.start_game(["A", "B"], dice_roller=DiceRoller(seed=0))
+    # red alone far ahead wins the leg whatever is rolled
+    game.current_leg.camel_states[Color.RED].move(12)
+    game.current_leg.refresh_ranking()
+    agent = ExpectedValueAgent(name="A", odds_table=LegOddsTable(path=None), opening_book=OpeningBook(path=None))
+    assert agent.play(game).to_int() == ActionInt.LEG_BET_RED.value
+    for player in ("A", "B", "A", "B"):
+        game.play_action(Action(player=player, leg_bet=Color.RED))
+    # the best ticket left, purple's 5, is worth less than a point: purple comes second at best
+    odds = LegOddsTable(path=None).game_odds(game)
+    values = [odds.leg_bet_value(i, 5) for i in range(4)]
+    assert max(values) == values[3] == pytest.approx(0.0485, abs=1e-4)
+    assert agent.play(game).to_int() == ActionInt.ROLL_DICE.value
+
+
+def test_plays_the_endgame_solver_action_in_the_endgame():
+    game = Game.start_game(["A", "B"], dice_roller=DiceRoller(seed=1))
+    while not (is_endgame(game) and game.current_leg.next_player == "A"):
+        action = Action(player=game.current_leg.next_player)
+        action.dice_rolled = game.roll_dice()
+        game.play_action(action)
+    agent = ExpectedValueAgent(name="A", odds_table=LegOddsTable(path=None), opening_book=OpeningBook(path=None))
+    assert agent.play(game).to_int() == EndgameSolver().solve(game, "A").best_action
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from camelgo.domain.agents.agent_types import AgentType
+from camelgo.domain.analysis.best_response import (
+    BestResponse, PositionCache, exploitability, game_bets_value, position_key
+)
+from camelgo.domain.environment.action import Action
+from camelgo.domain.environment.dice import DiceRoller
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.game_config import Color, GameConfig
+from camelgo.domain.environment.gym_env import CamelGoEnv
+from camelgo.domain.environment.transitions import CAMEL_INDEX
+
+
+def test_action_values_leave_the_game_untouched():
+    env = CamelGoEnv()
+    np.random.seed(0)
+    env.reset(seed=0)
+    before = env.game.model_copy(deep=True)
+    np.random.seed(1)
+    random_state = np.random.get_state()
+
+    values = BestResponse(env.opponents, rollouts=2).action_values(env.game, env.agent_name)
+
+    mask = env.game.get_action_mask(env.agent_name)
+    assert np.isfinite(values[mask]).all() and np.isnan(values[~mask]).all()
+    assert env.game.model_dump() == before.model_dump()
+    assert env.game.dice_roller.roll_dice() == before.dice_roller.roll_dice()
+    assert np.random.get_state()[1].tolist() == random_state[1].tolist()
+
+
+def test_game_bets_value():
+    game = Game.start_game(["A", "B"], dice_roller=DiceRoller(seed=0))
+    for player, color in (("B", Color.RED), ("A", Color.RED), ("A", Color.BLUE)):
+        game.play_action(Action(player=player, game_winner_bet=color))
+    game.play_action(Action(player="A", game_loser_bet=Color.GREEN))
+    red, blue, green = CAMEL_INDEX[Color.RED], CAMEL_INDEX[Color.BLUE], CAMEL_INDEX[Color.GREEN]
+    # second on the right winner, wrong on the other winner bet and on the loser bet
+    assert game_bets_value(game, "A", red, blue) == 5 - 1 - 1
+    assert game_bets_value(game, "A", blue, green) == 8 - 1 + 8
+    assert position_key(game, "A") != position_key(game, "B")
+
+
+def test_merge_keeps_the_entry_with_more_rollouts():
+    cache = PositionCache(positions={"key": np.array([[3.0, 1.0], [9.0, 1.0], [2.0, 1.0]])})
+    cache.merge({"key": np.array([[5.0, 0.0], [9.0, 0.0], [3.0, 0.0]]), "other": np.ones((3, 2))})
+    assert cache.positions["key"].tolist() == [[5.0, 1.0], [9.0, 1.0], [3.0, 1.0]]
+    assert len(cache) == 2
+
+
+def test_cache_is_reused_between_runs(tmp_path):
+    kwargs = dict(agent_type=AgentType.RANDOM_PLAYER, seeds=[0], rollouts=2, num_processes=1,
+                  cache_path=str(tmp_path / "cache.pkl"))
+    first = exploitability(**kwargs)
+    second = exploitability(**kwargs)
+    assert first.num_decisions > 0 and first.cache_hits == 0
+    assert second.cache_hits == second.num_decisions
+    assert second.mean_gap == pytest.approx(first.mean_gap)
+    assert first.mean_gap >= 0 and 0 <= first.best_action_rate <= 1
+
+
+def test_position_key_sees_only_the_player_bets_and_points_on_demand():
+    game = Game.start_game(["A", "B"], dice_roller=DiceRoller(seed=0))
+    for player, action in (("A", {"leg_bet": Color.BLUE}), ("B", {"game_winner_bet": Color.RED}),
+                           ("A", {"game_winner_bet": Color.RED}), ("B", {"game_loser_bet": Color.BLUE})):
+        game.play_action(Action(player=player, **action))
+    # A's bet on red comes second, B's loser bet is hidden from A
+    red = GameConfig.CAMEL_COLORS.index(Color.RED)
+    assert position_key(game, "A")[-1][0][red] == 1 and position_key(game, "B")[-1][0][red] == 0
+    assert position_key(game, "A") == position_key(game.clone(hidden_bets=False, viewer="A"), "A")
+    assert position_key(game, "B") != position_key(game.clone(hidden_bets=False, viewer="A"), "B")
+
+    game.players["B"].add_points(3)
+    assert position_key(game, "A", with_points=True)[:-1] == position_key(game, "A")
+    assert position_key(game, "A", with_points=True)[-1] == (game.players["A"].points, game.players["B"].points)
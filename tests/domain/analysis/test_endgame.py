@@ -0,0 +1,113 @@
+import pytest
+
+from camelgo.domain.analysis.endgame import EndgameSolver, is_endgame
+from camelgo.domain.environment.action import ActionInt
+from camelgo.domain.environment.camel import Camel
+from camelgo.domain.environment.dice import Dice, DiceRoller
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.game_config import Color, GameConfig
+from camelgo.domain.environment.leg import Leg
+from camelgo.domain.environment.player import Player
+from camelgo.domain.environment.transitions import LegState, RACING_INDICES, TILE_CHEER, apply_roll, is_finished
+
+
+BOARD = ((15, 0), (13, 0), (13, 1), (11, 0), (14, 0), (12, 0), (8, 0))
+# blue rides on green on the last tile, and only their dice are left: blue wins this leg whatever is rolled
+ENDGAME_BOARD = ((16, 1), (13, 0), (16, 0), (11, 0), (14, 0), (12, 0), (8, 0))
+
+
+def reference_leg(board, racing_dice, grey_dice, tiles=()):
+    """Plain recursion over the rolls of the current leg: (winner, leg first) probabilities."""
+    dice = [i for i in RACING_INDICES if racing_dice[i]] + (["grey"] if grey_dice else [])
+    ranking = sorted(RACING_INDICES, key=lambda i: board[i], reverse=True)
+    if len(dice) <= 1:
+        return [0.0] * 5, [float(i == ranking[0]) for i in RACING_INDICES]
+    winner, first = [0.0] * 5, [0.0] * 5
+    for d in dice:
+        camels = [5, 6] if d == "grey" else [d]
+        for camel in camels:
+            for value in GameConfig.DICE_VALUES:
+                p = 1 / (len(dice) * len(camels) * 3)
+                new_board, _ = apply_roll(board, camel, value, tiles)
+                if is_finished(new_board):
+                    leader = max(RACING_INDICES, key=lambda i: new_board[i])
+                    winner[leader] += p
+                    first[leader] += p
+                    continue
+                racing = tuple(r and i != camel for i, r in enumerate(racing_dice))
+                w, f = reference_leg(new_board, racing, grey_dice and d != "grey", tiles)
+                for i in RACING_INDICES:
+                    winner[i] += p * w[i]
+                    first[i] += p * f[i]
+    return winner, first
+
+
+@pytest.fixture
+def endgame():
+    players = {name: Player(name=name, points=3) for name in ["Alice", "Bob"]}
+    camels = {
+        color: Camel(color=color, track_pos=track_pos, stack_pos=stack_pos)
+        for color, (track_pos, stack_pos) in zip(GameConfig.ALL_CAMEL_COLORS, ENDGAME_BOARD)
+    }
+    leg = Leg(leg_number=6, players=players, camel_states=camels, next_player="Alice")
+    dice_roller = DiceRoller(seed=1)
+    dice_roller.deterministic_roll_dice(Dice(base_color=Color.PURPLE, number=1))
+    dice_roller.deterministic_roll_dice(Dice(base_color=Color.RED, number=1))
+    dice_roller.deterministic_roll_dice(Dice(base_color=Color.YELLOW, number=2))
+    dice_roller.deterministic_roll_dice(Dice(base_color=Color.GREY, number=1, number_color=Color.WHITE))
+    return Game(players=players, current_leg=leg, dice_roller=dice_roller, next_leg_starting_player="Alice")
+
+
+def test_is_endgame(endgame):
+    assert is_endgame(endgame)
+    # close to the finish line, but the race can outlast the leg
+    endgame.current_leg.camel_states[Color.BLUE].move(15)
+    endgame.current_leg.camel_states[Color.GREEN].move(13, 1)
+    assert not is_endgame(endgame)
+    assert EndgameSolver().solve(endgame).unresolved > 0.1
+    endgame.current_leg.camel_states[Color.BLUE].move(13)
+    endgame.current_leg.camel_states[Color.RED].move(10)
+    assert not is_endgame(endgame)
+
+
+def test_current_leg_matches_plain_recursion():
+    state = LegState(BOARD, (True, True, False, True, False), True, (0,) * 5, ((16, TILE_CHEER),))
+    result = EndgameSolver(max_legs=1).distribution(state)
+    winner, first = reference_leg(BOARD, state.racing_dice, state.grey_dice, state.tiles)
+    assert result.winner == pytest.approx(winner)
+    assert result.leg_first == pytest.approx(first)
+    assert sum(result.winner) + result.unresolved == pytest.approx(1)
+
+
+def test_relabelled_camels_share_the_search():
+    solver = EndgameSolver(max_legs=1)
+    state = LegState(BOARD, (True, False, True, True, False), True, (0,) * 5)
+    # swap blue and yellow, and the crazy camels
+    swapped = tuple(BOARD[i] for i in (1, 0, 2, 3, 4, 6, 5))
+    other = state._replace(board=swapped, racing_dice=(False, True, True, True, False))
+    result = solver.distribution(state)
+    relabelled = solver.distribution(other)
+    assert len(solver.cache) == 1
+    assert relabelled.winner == pytest.approx(tuple(result.winner[i] for i in (1, 0, 2, 3, 4)))
+    assert relabelled.loser == pytest.approx(tuple(result.loser[i] for i in (1, 0, 2, 3, 4)))
+
+
+def test_solve(endgame):
+    endgame.hidden_game_winner_bets[Color.BLUE].append("Bob")
+    endgame.current_leg.player_bets["Alice"][Color.YELLOW].append(5)
+    solution = EndgameSolver().solve(endgame)
+    assert solution.player == "Alice"
+    assert sum(solution.winner_probabilities.values()) + solution.unresolved == pytest.approx(1)
+    assert solution.unresolved == 0
+    assert solution.winner_probabilities[Color.BLUE] == pytest.approx(1)
+
+    mask = endgame.get_action_mask("Alice")
+    assert set(solution.action_values) == {a for a in ActionInt.all_actions() if mask[a]}
+    assert solution.best_action == max(solution.action_values, key=solution.action_values.get)
+    # Bob was first to bet on blue, so Alice gets at most 5 points for it
+    p_blue = solution.winner_probabilities[Color.BLUE]
+    roll = solution.action_values[ActionInt.ROLL_DICE.value]
+    winner_bet = solution.action_values[ActionInt.GAME_WINNER_BET_BLUE.value]
+    assert winner_bet - (roll - 1) == pytest.approx(5 * p_blue - (1 - solution.unresolved - p_blue))
+    # a tile no camel can reach this leg is worth nothing
+    assert solution.action_values[ActionInt.CHEERING_TILE_POS_3.value] == pytest.approx(roll - 1)
@@ -0,0 +1,80 @@
+import pytest
+
+from camelgo.domain.analysis.endgame import EndgameSolver
+from camelgo.domain.analysis.forecast import RaceForecaster
+from camelgo.domain.analysis.leg_distribution import enumerate_leg
+from camelgo.domain.environment.dice import DiceRoller
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.game_config import GameConfig
+from camelgo.domain.environment.transitions import LegState
+
+
+BOARD = ((15, 0), (13, 0), (13, 1), (11, 0), (14, 0), (12, 0), (8, 0))
+
+
+def test_matches_endgame_search_near_the_finish_line():
+    state = LegState(BOARD, (True, False, True, True, False), True, (0,) * 5, ((16, -1),))
+    expected = EndgameSolver(max_legs=1).distribution(state)
+    # nothing is unlikely enough to be resampled, so the forecast is exact
+    forecast = RaceForecaster(min_probability=1e-12, max_legs=1).forecast_state(state)
+    assert forecast.winner == pytest.approx(expected.winner)
+    assert forecast.loser == pytest.approx(expected.loser)
+    assert forecast.unresolved == pytest.approx(expected.unresolved)
+    assert sum(forecast.legs) + forecast.unresolved == pytest.approx(1)
+
+
+def test_relabelled_camels_share_the_forecast():
+    forecaster = RaceForecaster(max_legs=1)
+    state = LegState(BOARD, (True, False, True, True, False), True, (0,) * 5)
+    swapped = tuple(BOARD[i] for i in (1, 0, 2, 3, 4, 6, 5))
+    other = state._replace(board=swapped, racing_dice=(False, True, True, True, False), bets_taken=(1, 0, 0, 0, 0))
+    forecast = forecaster.forecast_state(state)
+    relabelled = forecaster.forecast_state(other)
+    assert len(forecaster.cache) == 1
+    assert relabelled.winner == pytest.approx(tuple(forecast.winner[i] for i in (1, 0, 2, 3, 4)))
+
+
+def test_forecast_game():
+    game = Game.start_game(["Alice", "Bob"], dice_roller=DiceRoller(seed=7))
+    for camel in game.current_leg.camel_states.values():
+        if camel.color in GameConfig.CAMEL_COLORS:
+            camel.track_pos += 9
+    forecast = RaceForecaster().forecast(game)
+    # resampling preserves the total probability only approximately
+    assert sum(forecast.winner_probabilities.values()) == pytest.approx(1, abs=1e-3)
+    assert sum(forecast.loser_probabilities.values()) == pytest.approx(1, abs=1e-3)
+    assert forecast.unresolved == 0
+    assert 1 <= sum((k + 1) * p for k, p in enumerate(forecast.leg_probabilities)) < 3
+    # the pruning is seeded
+    assert RaceForecaster().forecast(game) == forecast
+
+
+def test_forecast_game_cut_off_before_any_finish():
+    # a race cannot end in its first leg
+    game = Game.start_game(["a", "b"], dice_roller=DiceRoller(seed=1))
+    forecast = RaceForecaster(max_legs=1).forecast(game)
+    assert set(forecast.winner_probabilities.values()) == {0.0}
+    assert set(forecast.loser_probabilities.values()) == {0.0}
+    # the current leg is enumerated exactly
+    assert forecast.unresolved == pytest.approx(1)
+    assert forecast.leg_probabilities == (0.0,)
+
+
+def test_probabilities_are_not_normalized_over_the_races_searched():
+    state = LegState(BOARD, (True, False, True, True, False), True, (0,) * 5)
+    forecast = RaceForecaster(max_legs=1).forecast_state(state)
+    assert 0 < forecast.unresolved < 1
+    assert sum(forecast.winner) == pytest.approx(1 - forecast.unresolved)
+    assert sum(forecast.loser) == pytest.approx(1 - forecast.unresolved)
+
+
+def test_reuses_the_continuations_of_the_boards_ending_the_leg():
+    forecaster = RaceForecaster()
+    # only the grey dice is left, so the leg ends on one of six boards
+    state = LegState(BOARD, (False,) * 5, True, (0,) * 5)
+    ends = [(board, q) for board, q in enumerate_leg(state).boards()]
+    starts = [forecaster.forecast_state(LegState(board, (True,) * 5, True, (0,) * 5)) for board, _ in ends]
+    forecast = forecaster.forecast_state(state)
+    for i in range(5):
+        assert forecast.winner[i] == pytest.approx(sum(q * start.winner[i] for (_, q), start in zip(ends, starts)))
+    assert forecast.unresolved == pytest.approx(sum(q * start.unresolved for (_, q), start in zip(ends, starts)))
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from camelgo.domain.analysis.leg_distribution import enumerate_leg, leg_distribution
+from camelgo.domain.environment.camel import Camel
+from camelgo.domain.environment.dice import Dice
+from camelgo.domain.environment.game_config import Color, GameConfig
+from camelgo.domain.environment.leg import Leg
+from camelgo.domain.environment.player import Player
+from camelgo.domain.environment.transitions import LegState, RACING_INDICES, TILE_BOO, apply_roll, is_finished
+
+
+BOARD = ((6, 0), (4, 0), (4, 1), (2, 0), (5, 0), (12, 0), (9, 0))
+
+
+def reference_layouts(board, racing_dice, grey_dice, tiles=()):
+    """Plain recursion over the rolls of the leg: board -> probability."""
+    dice = [i for i in RACING_INDICES if racing_dice[i]] + (["grey"] if grey_dice else [])
+    if len(dice) <= 1 or is_finished(board):
+        return {board: 1.0}
+    layouts = {}
+    for d in dice:
+        camels = [5, 6] if d == "grey" else [d]
+        for camel in camels:
+            for value in GameConfig.DICE_VALUES:
+                p = 1 / (len(dice) * len(camels) * 3)
+                new_board, _ = apply_roll(board, camel, value, tiles)
+                racing = tuple(r and i != camel for i, r in enumerate(racing_dice))
+                for layout, q in reference_layouts(new_board, racing, grey_dice and d != "grey", tiles).items():
+                    layouts[layout] = layouts.get(layout, 0.0) + p * q
+    return layouts
+
+
+def test_layouts_match_plain_recursion():
+    state = LegState(BOARD, (True, False, True, True, False), True, (0,) * 5, ((7, TILE_BOO),))
+    result = enumerate_leg(state)
+    expected = reference_layouts(BOARD, state.racing_dice, state.grey_dice, state.tiles)
+    assert len(result) == len(expected)
+    for board, p in expected.items():
+        assert result.probability(board) == pytest.approx(p)
+    assert result.probability(BOARD) == 0.0
+    assert sum(p for _, p in result.boards()) == pytest.approx(1)
+    assert result.tile_hits[7] > 0
+    assert 7 in result.landings
+
+
+def test_marginals():
+    state = LegState(BOARD, (True, True, True, True, True), True, (0,) * 5)
+    result = enumerate_leg(state)
+    np.testing.assert_allclose(result.track_marginals().sum(axis=1), 1)
+    np.testing.assert_allclose(result.stack_marginals().sum(axis=1), 1)
+    ranks = result.rank_probabilities()
+    np.testing.assert_allclose(ranks.sum(axis=0), 1)
+    np.testing.assert_allclose(ranks.sum(axis=1), 1)
+    # the purple camel at the back never moves backwards, and reaches the crazy camels only when carried
+    purple = result.track_marginals()[3]
+    assert purple[:2].sum() == 0 and purple[6:].sum() > 0
+    assert result.finish_probability() == 0
+    board, p = next(iter(result.most_likely(1)))
+    assert p == result.probabilities.max()
+    assert result.probability(board) == p
+
+
+def test_race_outcomes():
+    board = ((15, 0), (13, 0), (13, 1), (11, 0), (14, 0), (12, 0), (8, 0))
+    result = enumerate_leg(LegState(board, (True, True, False, False, True), True, (0,) * 5))
+    winner, loser = result.race_outcomes()
+    assert winner.sum() == pytest.approx(result.finish_probability())
+    assert loser.sum() == pytest.approx(result.finish_probability())
+    assert 0 < result.finish_probability() < 1
+    # green is last and its dice was rolled, so it cannot win
+    assert winner[3] == 0
+
+
+def test_leg_distribution():
+    players = {name: Player(name=name) for name in ["Alice", "Bob"]}
+    camels = {
+        color: Camel(color=color, track_pos=track_pos, stack_pos=stack_pos)
+        for color, (track_pos, stack_pos) in zip(GameConfig.ALL_CAMEL_COLORS, BOARD)
+    }
+    leg = Leg(leg_number=1, players=players, camel_states=camels, next_player="Alice")
+    rolled = [Dice(base_color=Color.BLUE, number=1), Dice(base_color=Color.GREEN, number=2)]
+    result = leg_distribution(leg, rolled)
+    expected = enumerate_leg(LegState(BOARD, (False, True, False, True, True), True, (0,) * 5))
+    np.testing.assert_array_equal(result.codes, expected.codes)
+    np.testing.assert_allclose(result.probabilities, expected.probabilities)
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from camelgo.domain.analysis.odds_table import (
+    LegOddsTable, build_odds_table, canonical_state, collect_states, compute_leg_odds
+)
+from camelgo.domain.environment.transitions import LegState
+
+
+@pytest.fixture(scope="module")
+def table_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("odds") / "leg_odds.npy"
+    assert build_odds_table(str(path), opening_depth=None, num_games=1, max_entries=6, num_processes=1) == 6
+    return str(path)
+
+
+def test_lookups_match_the_enumeration(table_path):
+    table = LegOddsTable(table_path)
+    for state, _ in collect_states(num_games=1).most_common(6):
+        odds = table.canonical_odds(state)
+        exact = compute_leg_odds(state)
+        np.testing.assert_allclose(odds.rank, exact.rank, atol=1e-6)
+        assert odds.finish == pytest.approx(exact.finish, abs=1e-6)
+    assert (table.hits, table.misses) == (6, 0)
+
+
+def test_missing_states_are_computed_on_the_fly(table_path):
+    table = LegOddsTable(table_path)
+    state = LegState(((1, 0), (1, 1), (2, 0), (3, 0), (3, 1), (16, 0), (15, 0)),
+                     (True, False, True, False, False), False, (0,) * 5)
+    odds = table.odds(state)
+    np.testing.assert_allclose(odds.rank, compute_leg_odds(state).rank, atol=1e-12)
+    assert table.misses == 1 and table.hit_rate() == 0.0
+    table.odds(state)
+    assert len(table._computed) == 1
+
+
+def test_odds_computed_on_the_fly_are_bounded():
+    table = LegOddsTable(path=None, max_computed=2)
+    board = ((1, 0), (1, 1), (2, 0), (3, 0), (3, 1), (16, 0), (15, 0))
+    states = [canonical_state(LegState(board, dice, False, (0,) * 5)) for dice in (
+        (True, False, False, False, False), (False, True, False, False, False), (False, False, True, False, False),
+    )]
+    table.canonical_odds(states[0])
+    table.canonical_odds(states[1])
+    # the first state is used again, so the second one is the least recently used
+    table.canonical_odds(states[0])
+    table.canonical_odds(states[2])
+    assert list(table._computed) == [states[0], states[2]]
+    assert table.misses == 4
+
+
+def test_odds_follow_the_camels_of_a_relabelled_state():
+    table = LegOddsTable(path=None)
+    board = ((1, 0), (1, 1), (2, 0), (3, 0), (3, 1), (16, 0), (15, 0))
+    state = LegState(board, (True, True, False, False, True), True, (0,) * 5)
+    # blue and red swap places, and their dice
+    swapped = LegState((board[4],) + board[1:4] + (board[0],) + board[5:], (True, True, False, False, True), True, (0,) * 5)
+    assert canonical_state(state) == canonical_state(swapped)
+    odds, swapped_odds = table.odds(state), table.odds(swapped)
+    np.testing.assert_allclose(swapped_odds.rank, odds.rank[[4, 1, 2, 3, 0]], atol=1e-12)
+    np.testing.assert_allclose(odds.rank.sum(axis=0), 1.0)
@@ -0,0 +1,44 @@
+import pytest
+
+from camelgo.domain.analysis.endgame import EndgameSolver
+from camelgo.domain.analysis.forecast import RaceForecaster
+from camelgo.domain.analysis.opening_book import (
+    OpeningBook, build_opening_book, opening_boards, opening_game, opening_values
+)
+from camelgo.domain.environment.action import Action, ActionInt
+from camelgo.domain.environment.game_config import Color, GameConfig
+from camelgo.domain.environment.transitions import LegState
+
+
+@pytest.fixture(scope="module")
+def forecaster():
+    return RaceForecaster(min_probability=1e-3)
+
+
+def test_book_action_follows_the_relabelled_camels(tmp_path, forecaster):
+    path = str(tmp_path / "opening_book.npz")
+    assert build_opening_book(path, max_boards=1, forecaster=forecaster) == 1
+    book = OpeningBook(path)
+    # the racing camels in reverse order, the crazy camels swapped
+    board = opening_boards()[0]
+    relabelled = board[4::-1] + board[6:4:-1]
+    game = opening_game(relabelled, ["A", "B", "C"])
+
+    action = book.best_action(game, "B")
+    assert action == EndgameSolver(max_legs=1, forecaster=forecaster).solve(game, "B").best_action
+
+    game.play_action(Action(player="A", leg_bet=Color.BLUE))
+    assert book.best_action(game, "B") is None
+    assert OpeningBook(str(tmp_path / "missing.npz")).best_action(opening_game(board, ["A", "B"]), "A") is None
+
+
+def test_game_bets_are_valued_with_the_race_forecast(forecaster):
+    board = opening_boards()[0]
+    values = opening_values(EndgameSolver(max_legs=1, forecaster=forecaster), board)
+    race = forecaster.forecast_state(LegState.from_game(opening_game(board, ["A", "B"])))
+    base = values[ActionInt.ROLL_DICE.value] - 1
+    payout, penalty = GameConfig.CORRECT_GAME_BET_POINTS[0], GameConfig.INCORRECT_GAME_BET_PENALTY
+    winner_bets = values[ActionInt.GAME_WINNER_BET_BLUE.value:][:5]
+    # the race cannot end in the first leg, yet the bets are not valued as lost turns
+    assert race.unresolved == 0
+    assert winner_bets == pytest.approx([base + payout * p - penalty * (1 - p) for p in race.winner])
@@ -0,0 +1,6 @@
+from camelgo.domain.environment.action import Action, ActionInt
+
+
+def test_to_int_inverts_from_int():
+    for action_int in ActionInt.all_actions():
+        assert Action.from_int(action_int, "A").to_int() == action_int
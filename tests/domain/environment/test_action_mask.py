@@ -0,0 +1,44 @@
+import copy
+import random
+
+import numpy as np
+
+from camelgo.domain.environment.action import Action, ActionInt
+from camelgo.domain.environment.action_mask import batch_action_masks
+from camelgo.domain.environment.dice import DiceRoller
+from camelgo.domain.environment.game import Game
+
+
+def random_positions(num_games=6, seed=3):
+    """(game, player) pairs from random playouts, every player of every visited position."""
+    rng = random.Random(seed)
+    positions = []
+    for g in range(num_games):
+        game = Game.start_game(player_names=["Alice", "Bob", "Carol"], dice_roller=DiceRoller(seed=g))
+        while not game.finished:
+            # every player of the same game object
+            snapshot = copy.deepcopy(game)
+            positions.extend((snapshot, name) for name in game.players)
+            player = game.current_leg.next_player
+            action_int = rng.choice(np.flatnonzero(game.get_action_mask(player)).tolist())
+            action = Action.from_int(action_int, player)
+            if action_int == ActionInt.ROLL_DICE.value:
+                action.dice_rolled = game.roll_dice()
+            game.play_action(action)
+    return positions
+
+
+def test_batch_matches_get_action_mask():
+    positions = random_positions()
+    games, players = zip(*positions)
+    masks = batch_action_masks(games, players)
+    assert masks.shape == (len(positions), Game.NUM_ACTIONS)
+    expected = np.stack([game.get_action_mask(player) for game, player in positions])
+    np.testing.assert_array_equal(masks, expected)
+    # the playouts went through exhausted tickets, game bets and tiles
+    assert not expected[:, 1:16].all()
+    assert not expected[:, 16:].all()
+
+
+def test_empty_batch():
+    assert batch_action_masks([], []).shape == (0, Game.NUM_ACTIONS)
@@ -41,6 +41,15 @@ def test_camel_bet():
     assert camel.available_bets == GameConfig.BET_VALUES[1:]
 
 
+def test_camel_bets_take_every_ticket_in_order():
+    camels = [Camel(color=Color.RED, track_pos=2, stack_pos=0), Camel(color=Color.BLUE, track_pos=1, stack_pos=0)]
+    assert [camels[0].bet() for _ in GameConfig.BET_VALUES] == GameConfig.BET_VALUES
+    assert camels[0].available_bets == []
+    camels[1].bet()
+    assert camels[1].available_bets == GameConfig.BET_VALUES[1:]
+    assert GameConfig.BET_VALUES == [5, 3, 2, 2]
+
+
 def test_camel_bet_no_available_bets():
     camel = Camel(color=Color.RED, track_pos=2, stack_pos=1)
     camel.available_bets = []
@@ -52,3 +52,9 @@ def test_dice_roller_randomness_with_different_seeds():
     roller1.reset()
     rolls2 = [roller2.roll_dice() for _ in range(3)]
     assert rolls1 != rolls2
+
+
+def test_rolled_dice_are_shared():
+    rolls = [DiceRoller(seed=seed).roll_dice() for seed in range(50)]
+    assert all(dice is Dice.of(dice.base_color, dice.number, dice.number_color) for dice in rolls)
+    assert DiceRoller().deterministic_roll_dice(Dice(base_color=Color.RED, number=2)) is Dice.of(Color.RED, 2)
@@ -1,4 +1,9 @@
+from collections import defaultdict
+import json
+
+import numpy as np
 import pytest
+from pydantic import ValidationError
 
 from camelgo.domain.environment.action import Action
 from camelgo.domain.environment.game import Game
@@ -84,10 +89,11 @@ def test_start_game(dice_roller):
     assert game is not None
     assert game.players.keys() == {"Alice", "Bob"}
     assert len(game.current_leg.camel_states) == 7
-    assert game.current_leg.camel_states[Color.BLUE].track_pos == 2
-    assert game.current_leg.camel_states[Color.BLUE].stack_pos == 1
+    assert game.current_leg.camel_states[Color.BLUE].track_pos == 1
+    assert game.current_leg.camel_states[Color.BLUE].stack_pos == 0
     assert game.first_camel().color == Color.GREEN
-    assert game.last_camel().color == Color.PURPLE
+    assert game.last_camel().color == Color.BLUE
+    assert game.dice_roller.dices_rolled == []
 
 def test_player_dice_roll_action(game_new_start, action_alice_roll_red_3):
     # given
@@ -264,3 +270,149 @@ def test_game_model_validate(game_new_start):
     leg2 = game.current_leg
     assert isinstance(leg2.leg_points, type(game_new_start.current_leg.leg_points))
     assert isinstance(leg2.player_bets, type(game_new_start.current_leg.player_bets))
+
+def test_game_reset_with_seed_matches_new_game():
+    game = Game.start_game(player_names=["Alice", "Bob", "Carol"], dice_roller=DiceRoller(seed=0))
+    rng = np.random.default_rng(0)
+    for seed in [3, 4, 4]:
+        # play a while so that every part of the state changes
+        while not game.finished:
+            player = game.current_leg.next_player
+            action_int = int(rng.choice(np.flatnonzero(game.get_action_mask(player))))
+            action = Action.from_int(action_int, player)
+            if action_int == 0:
+                action.dice_rolled = game.roll_dice()
+            game.play_action(action)
+        game.reset(seed=seed)
+        new_game = Game.start_game(player_names=["Alice", "Bob", "Carol"], dice_roller=DiceRoller(seed=seed))
+        assert game.model_dump() == new_game.model_dump()
+        assert list(game.current_leg.camel_states) == list(new_game.current_leg.camel_states)
+        assert [game.roll_dice() for _ in range(3)] == [new_game.roll_dice() for _ in range(3)]
+
+def test_leg_bets_settle_in_a_fixed_color_order():
+    points = []
+    for colors in ([Color.RED, Color.BLUE], [Color.BLUE, Color.RED]):
+        game = Game.start_game(player_names=["Alice", "Bob"], dice_roller=DiceRoller(seed=0))
+        game.players["Alice"].points = 0
+        # red leads the leg, blue is last
+        for color, (track_pos, stack_pos) in {Color.RED: (5, 0), Color.BLUE: (1, 0)}.items():
+            game.current_leg.camel_states[color].track_pos = track_pos
+            game.current_leg.camel_states[color].stack_pos = stack_pos
+        game.current_leg.refresh_ranking()
+        for color in colors:
+            game.play_action(Action(player="Alice", leg_bet=color))
+            game.play_action(Action(player="Bob", game_winner_bet=color))
+        game.move_to_next_leg()
+        points.append(game.players["Alice"].points)
+    # blue comes first, its loss is floored at 0 before red pays 5
+    assert points == [5, 5]
+
+def test_game_from_trusted_matches_model_validate():
+    game = Game.start_game(player_names=["Alice", "Bob", "Carol"], dice_roller=DiceRoller(seed=0))
+    rng = np.random.default_rng(0)
+    for _ in range(30):
+        player = game.current_leg.next_player
+        action_int = int(rng.choice(np.flatnonzero(game.get_action_mask(player))))
+        action = Action.from_int(action_int, player)
+        if action_int == 0:
+            action.dice_rolled = game.roll_dice()
+        game.play_action(action)
+    for dumped in (game.model_dump(), json.loads(game.model_dump_json())):
+        trusted = Game.from_trusted(dumped, strict=False)
+        validated = Game.from_trusted(dumped)
+        assert trusted.model_dump() == validated.model_dump() == game.model_dump()
+        assert trusted.current_leg.ranking == game.current_leg.ranking
+        assert isinstance(trusted.current_leg.player_bets["Alice"], defaultdict)
+        assert trusted.current_leg.players is trusted.players
+        assert trusted.roll_dice() == validated.roll_dice()
+    # only the strict mode checks the data
+    dumped = game.model_dump()
+    dumped["legs_played"] = "many"
+    with pytest.raises(ValidationError):
+        Game.from_trusted(dumped)
+    assert Game.from_trusted(dumped, strict=False).legs_played == "many"
+
+
+def test_strict_from_trusted_checks_the_trusted_game(monkeypatch):
+    game = Game.start_game(player_names=["Alice", "Bob"], dice_roller=DiceRoller(seed=0))
+    dumped = game.model_dump()
+    # the fast path is the one built, sharing the players with the leg
+    trusted = Game.from_trusted(dumped)
+    assert trusted.current_leg.players is trusted.players
+    from_trusted = Leg.from_trusted
+    monkeypatch.setattr(Leg, "from_trusted", lambda data, players: from_trusted(dict(data, leg_number=7), players))
+    with pytest.raises(ValueError):
+        Game.from_trusted(dumped)
+    assert Game.from_trusted(dumped, strict=False).current_leg.leg_number == 7
+
+
+def test_clone_is_independent_of_the_game():
+    game = Game.start_game(player_names=["Alice", "Bob", "Carol"], dice_roller=DiceRoller(seed=0))
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        player = game.current_leg.next_player
+        action_int = int(rng.choice(np.flatnonzero(game.get_action_mask(player))))
+        action = Action.from_int(action_int, player)
+        if action_int == 0:
+            action.dice_rolled = game.roll_dice()
+        game.play_action(action)
+    game.play_action(Action(player=game.current_leg.next_player, game_winner_bet=Color.RED))
+    dumped = game.model_dump()
+
+    clone = game.clone()
+    assert clone.model_dump() == dumped
+    assert clone.current_leg.ranking == game.current_leg.ranking
+    # the copy plays on, the game stays as it was
+    while not clone.finished:
+        player = clone.current_leg.next_player
+        action = Action(player=player, leg_bet=Color.BLUE) if clone.get_action_mask(player)[1] else Action(player=player)
+        if action.leg_bet is None:
+            action.dice_rolled = clone.roll_dice()
+        clone.play_action(action)
+    assert game.model_dump() == dumped
+    assert game.clone().roll_dice() == game.roll_dice()
+
+    seeded = game.clone(seed=5)
+    reseeded = game.model_copy(deep=True)
+    reseeded.dice_roller.seed(5)
+    assert seeded.dice_roller.dices_rolled == game.dice_roller.dices_rolled
+    assert seeded.roll_dice() == reseeded.roll_dice()
+
+    assert not game.clone(hidden_bets=False).hidden_game_winner_bets
+
+
+def test_clone_without_hidden_bets_keeps_the_viewer_rank(game_about_to_end, action_alice_roll_red_3):
+    game = game_about_to_end
+    game.hidden_game_winner_bets = defaultdict(list, {Color.RED: ["Alice", "Bob"], Color.BLUE: ["Alice"]})
+    game.hidden_game_loser_bets = defaultdict(list, {Color.GREEN: ["Bob"], Color.YELLOW: ["Alice", "Bob"]})
+
+    clone = game.clone(hidden_bets=False, viewer="Bob")
+    assert clone.hidden_game_winner_bets == {Color.RED: [Game.HIDDEN_BETTOR, "Bob"]}
+    assert clone.hidden_game_loser_bets == {Color.GREEN: ["Bob"], Color.YELLOW: [Game.HIDDEN_BETTOR, "Bob"]}
+
+    # red wins and blue is last: Bob bet second on red, so 3 + 3 (leg points) + 5 - 1 (green) - 1 (yellow)
+    clone.play_action(action_alice_roll_red_3)
+    game.play_action(action_alice_roll_red_3)
+    assert clone.finished
+    assert clone.players["Bob"].points == game.players["Bob"].points == 9
+    # Alice's game bets are hidden from Bob
+    assert clone.players["Alice"].points == 18
+    assert game.players["Alice"].points == 18 + 8 - 1 - 1
+
+
+def test_fast_assignments_dump_like_a_validated_game(game_about_to_end, action_alice_roll_red_3):
+    game = game_about_to_end
+    game.current_leg.next_player = "Bob"
+    game.play_action(Action(player="Bob", leg_bet=Color.BLUE))
+    game.play_action(action_alice_roll_red_3)
+    assert game.finished
+    dumped = game.model_dump()
+
+    validated = Game.model_validate(dumped)
+    assert validated.model_dump() == dumped
+    # players and camels are records, dumped whole
+    unset = game.model_dump(exclude_unset=True)
+    assert unset["players"] == dumped["players"]
+    assert unset["current_leg"]["camel_states"] == dumped["current_leg"]["camel_states"]
+    # the fields assigned on the models count as set, like the fields of a validated model
+    assert "next_player" in game.current_leg.model_fields_set
@@ -1,10 +1,12 @@
 from collections import defaultdict
+import numpy as np
 import pytest
 
 from camelgo.domain.environment.action import Action
+from camelgo.domain.environment.game import Game
 from camelgo.domain.environment.leg import Leg
 from camelgo.domain.environment.camel import Camel
-from camelgo.domain.environment.dice import Dice
+from camelgo.domain.environment.dice import Dice, DiceRoller
 from camelgo.domain.environment.game_config import GameConfig, Color
 from camelgo.domain.environment.player import Player
 
@@ -277,3 +279,42 @@ def test_leg_model_validate(players, camels_on_different_tiles):
     # Ensure defaultdicts are restored
     assert isinstance(leg2.leg_points, type(leg.leg_points))
     assert isinstance(leg2.player_bets, type(leg.player_bets))
+
+def test_leg_move_keeps_stack_order(players):
+    # camels are listed top camel first, the order of the dict must not matter
+    camels = {
+        "red": Camel(color="red", track_pos=3, stack_pos=1),
+        "blue": Camel(color="blue", track_pos=3, stack_pos=0),
+        "green": Camel(color="green", track_pos=8, stack_pos=0),
+        "yellow": Camel(color="yellow", track_pos=9, stack_pos=0),
+        "purple": Camel(color="purple", track_pos=10, stack_pos=0),
+        "white": Camel(color="white", track_pos=15, stack_pos=0),
+        "black": Camel(color="black", track_pos=16, stack_pos=0),
+    }
+    leg = Leg(leg_number=1, camel_states=camels, players=players)
+    leg.play_action(Action(dice_rolled=Dice(base_color="blue", number=1), player="Alice"))
+    assert (leg.camel_states["blue"].track_pos, leg.camel_states["blue"].stack_pos) == (4, 0)
+    assert (leg.camel_states["red"].track_pos, leg.camel_states["red"].stack_pos) == (4, 1)
+
+def test_ranking_follows_the_camels():
+    game = Game.start_game(player_names=["Alice", "Bob", "Carol"], dice_roller=DiceRoller(seed=1))
+    rng = np.random.default_rng(1)
+    for seed in range(3):
+        game.reset(seed=seed)
+        while not game.finished:
+            player = game.current_leg.next_player
+            action_int = int(rng.choice(np.flatnonzero(game.get_action_mask(player))))
+            action = Action.from_int(action_int, player)
+            if action_int == 0:
+                action.dice_rolled = game.roll_dice()
+            game.play_action(action)
+            leg = game.current_leg
+            expected = sorted(
+                GameConfig.CAMEL_COLORS,
+                key=lambda c: (leg.camel_states[c].track_pos, leg.camel_states[c].stack_pos),
+                reverse=True,
+            )
+            assert list(leg.ranking) == expected
+            assert [leg.rank(c) for c in expected] == [1, 2, 3, 4, 5]
+            assert game.first_camel().color == expected[0] and game.last_camel().color == expected[-1]
+    assert game.model_copy(deep=True).current_leg.ranking == game.current_leg.ranking
@@ -0,0 +1,38 @@
+import numpy as np
+
+from camelgo.domain.environment.action import Action
+from camelgo.domain.environment.dice import Dice, DiceRoller
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.game_config import Color
+from camelgo.domain.environment.observation import OBSERVATION_DIM, build_observation
+
+
+def test_build_observation():
+    game = Game.start_game(player_names=["Alice", "Bob"], dice_roller=DiceRoller(seed=5))
+    game.play_action(Action(player="Alice", leg_bet=Color.YELLOW))
+    dice = game.dice_roller.deterministic_roll_dice(Dice(base_color=Color.RED, number=1))
+    game.play_action(Action(player="Bob", dice_rolled=dice))
+    game.play_action(Action(player="Alice", game_winner_bet=Color.GREEN))
+    obs = build_observation(game, "Alice")
+    assert obs.shape == (OBSERVATION_DIM,) and obs.dtype == np.float32
+
+    camels = obs[:161].reshape(7, 23)
+    np.testing.assert_array_equal(camels.sum(axis=1), 2)
+    blue = game.current_leg.camel_states[Color.BLUE]
+    assert camels[0, blue.track_pos - 1] == 1 and camels[0, 16 + blue.stack_pos] == 1
+    # every dice but the red one is in the pyramid
+    np.testing.assert_array_equal(obs[161:167], [0, 1, 1, 1, 1, 1])
+    # the next yellow ticket is worth 3, the next blue one 5
+    tickets = obs[167:187].reshape(5, 4)
+    np.testing.assert_array_equal(tickets[0], [0, 0, 0, 1])
+    np.testing.assert_array_equal(tickets[1], [0, 0, 1, 0])
+    np.testing.assert_array_equal(obs[187:235].reshape(16, 3)[:, 0], 1)
+    assert obs[236 + 1] == 5 / 12.0
+    assert obs[241 + 2] == 1 and obs[251] == 0.5
+
+    # a buffer is overwritten completely
+    out = np.full(OBSERVATION_DIM, 7, dtype=np.float32)
+    assert build_observation(game, "Alice", out) is out
+    np.testing.assert_array_equal(out, obs)
+    bob = build_observation(game, "Bob", out)
+    assert bob[241 + 2] == 0 and bob[251] == 0.5
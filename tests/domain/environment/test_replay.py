@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from camelgo.domain.environment.replay import load_corpus, record_game, replay
+
+
+CORPUS_PATH = Path(__file__).parents[2] / "data" / "replay_corpus.jsonl"
+
+
+def test_corpus_replays_without_divergence():
+    corpus = load_corpus(CORPUS_PATH)
+    report = replay(corpus)
+    assert report.divergence is None
+    assert report.num_games == len(corpus)
+    assert report.num_turns == sum(len(game.turns) for game in corpus)
+    assert replay(corpus, check_turns=False).divergence is None
+
+
+def test_replay_reports_the_first_diverging_turn():
+    recorded = record_game(seed=7, num_players=3)
+    turn = next(i for i, (_, action, dice, _) in enumerate(recorded.turns) if dice is not None and dice[1] != 3)
+    seat, action, dice, digest = recorded.turns[turn]
+    recorded.turns[turn] = (seat, action, [dice[0], dice[1] + 1, *dice[2:]], digest)
+
+    divergence = replay([recorded, recorded]).divergence
+    assert divergence.game == 0 and divergence.seed == 7
+    assert divergence.turn == turn + 1
+    assert "ROLL_DICE" in divergence.message
@@ -0,0 +1,38 @@
+import random
+
+import numpy as np
+
+from camelgo.domain.environment.game_config import GameConfig
+from camelgo.domain.environment.start_positions import start_position_table
+
+
+def test_table_size_and_probabilities():
+    table = start_position_table()
+    # 3^5 tile assignments with all stacking orders for the racing camels, 12 crazy camel layouts
+    assert len(table) == 2520 * 12
+    assert np.isclose(table.probabilities.sum(), 1.0)
+    assert len({layout.tobytes() for layout in table.layouts}) == len(table)
+
+
+def test_exact_expectations():
+    table = start_position_table()
+    blue = GameConfig.ALL_CAMEL_COLORS.index("blue")
+    white = GameConfig.ALL_CAMEL_COLORS.index("white")
+    black = GameConfig.ALL_CAMEL_COLORS.index("black")
+    # every racing camel starts on tile 1, 2 or 3 with equal probability
+    assert np.isclose(table.expectation(lambda layout: layout[blue][0] == 1), 1 / 3)
+    assert np.isclose(table.expectation(lambda layout: layout[blue][0]), 2.0)
+    # both crazy camels share a tile with probability 1/3
+    assert np.isclose(table.expectation(lambda layout: layout[white][0] == layout[black][0]), 1 / 3)
+    assert np.isclose(table.expectation(lambda layout: 14 <= layout[white][0] <= 16), 1.0)
+
+
+def test_sampled_camels_form_valid_stacks():
+    table = start_position_table()
+    rng = random.Random(7)
+    for _ in range(100):
+        camels = table.camels(table.sample_index(rng))
+        assert {c.color for c in camels} == set(GameConfig.ALL_CAMEL_COLORS)
+        for track_pos in {c.track_pos for c in camels}:
+            stack = sorted(c.stack_pos for c in camels if c.track_pos == track_pos)
+            assert stack == list(range(len(stack)))
@@ -0,0 +1,89 @@
+import random
+
+from camelgo.domain.environment.dice import DiceRoller
+from camelgo.domain.environment.game import Game
+from camelgo.domain.environment.game_config import GameConfig
+from camelgo.domain.environment.start_positions import start_position_table
+from camelgo.domain.environment.symmetry import CanonicalCache, Symmetry, canonicalize
+from camelgo.domain.environment.transitions import (
+    LegState, RACING_INDICES, TILE_BOO, TILE_CHEER, apply_roll, board_from_camels
+)
+
+
+def mid_race_state():
+    # one racing dice left: no camel can get further than 4 tiles from where it is
+    board = ((9, 1), (6, 0), (11, 0), (6, 1), (7, 0), (11, 1), (9, 0))
+    return LegState(
+        board=board,
+        racing_dice=(False, False, True, False, False),
+        grey_dice=False,
+        bets_taken=(1, 0, 2, 0, 0),
+        tiles=((5, TILE_BOO), (8, TILE_CHEER)),
+    )
+
+
+def random_symmetry(rng):
+    racing = list(RACING_INDICES)
+    rng.shuffle(racing)
+    crazy = [5, 6] if rng.random() < 0.5 else [6, 5]
+    return Symmetry(rng.randint(-4, 1), tuple(racing + crazy))
+
+
+def test_round_trip():
+    state = mid_race_state()
+    canonical, symmetry = canonicalize(state)
+    assert canonical != state
+    assert symmetry.invert(canonical) == state
+
+
+def test_equivalent_states_share_a_representative():
+    rng = random.Random(0)
+    state = mid_race_state()
+    canonical, _ = canonicalize(state)
+    for _ in range(20):
+        assert canonicalize(random_symmetry(rng).apply(state))[0] == canonical
+
+
+def test_rolls_commute_with_symmetry():
+    rng = random.Random(1)
+    state = mid_race_state()
+    canonical, symmetry = canonicalize(state)
+    for camel in range(GameConfig.NUM_CAMELS):
+        for value in GameConfig.DICE_VALUES:
+            board, _ = apply_roll(state.board, camel, value, state.tiles)
+            canonical_board, _ = apply_roll(canonical.board, symmetry.camel(camel), value, canonical.tiles)
+            assert symmetry.apply_board(board) == canonical_board
+
+
+def test_no_translation_near_the_finish_line():
+    state = mid_race_state()._replace(board=((9, 1), (6, 0), (14, 0), (6, 1), (7, 0), (11, 0), (9, 0)))
+    _, symmetry = canonicalize(state)
+    assert symmetry.shift == 0
+
+
+def test_start_positions_shrink_to_shapes():
+    table = start_position_table()
+    cache = CanonicalCache(lambda state: None)
+    for i in range(len(table)):
+        camels = {c.color: c for c in table.camels(i)}
+        cache.lookup(LegState(board_from_camels(camels), (True,) * 5, True, (0,) * 5))
+    # 21 ways to spread identical racing camels on 3 tiles x 6 crazy camel layouts
+    assert len(cache) == 126
+    assert cache.hit_rate() > 0.99
+
+
+def test_game_states_shrink():
+    seen, canonical = set(), set()
+    for seed in range(20):
+        game = Game.start_game(["Alice", "Bob"], dice_roller=DiceRoller(seed=seed))
+        while not game.finished:
+            state = LegState.from_game(game)
+            seen.add(state)
+            canonical.add(canonicalize(state)[0])
+            game.play_action(_roll(game))
+    assert len(canonical) < len(seen)
+
+
+def _roll(game):
+    from camelgo.domain.environment.action import Action
+    return Action(player=game.current_leg.next_player, dice_rolled=game.roll_dice())
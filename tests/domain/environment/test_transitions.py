@@ -0,0 +1,58 @@
+import random
+
+import numpy as np
+
+from camelgo.domain.environment.game_config import GameConfig
+from camelgo.domain.environment.transitions import (
+    CAMEL_INDEX, TILE_BOO, TILE_CHEER, _reference_roll, _verification_cases, apply_roll, apply_roll_batch,
+    decode_board, decode_boards, encode_board, encode_boards, is_finished, tile_effects, verify_transition_tables
+)
+
+
+def test_tables_match_move_camel():
+    assert verify_transition_tables() == []
+
+
+def test_random_rolls_match_move_camel():
+    rng = random.Random(3)
+    board = (
+        (1, 0), (1, 1), (2, 0), (3, 0), (3, 1),  # racing camels
+        (16, 0), (15, 0),  # crazy camels
+    )
+    tiles = ((6, TILE_CHEER), (9, TILE_BOO), (13, TILE_BOO))
+    for _ in range(500):
+        camel = rng.randrange(GameConfig.NUM_CAMELS)
+        value = rng.choice(GameConfig.DICE_VALUES)
+        expected = _reference_roll(board, camel, value, tiles)
+        board, _ = apply_roll(board, camel, value, tiles)
+        assert board == expected
+        if is_finished(board):
+            break
+
+
+def test_apply_roll_reports_tile():
+    board = tuple((i + 1, 0) for i in range(GameConfig.NUM_CAMELS))
+    blue = CAMEL_INDEX["blue"]
+    new_board, tile = apply_roll(board, blue, 2, ((3, TILE_BOO),))
+    # blue lands on the booing tile at 3 and goes back under the camel on tile 2
+    assert tile == 3
+    assert new_board[blue] == (2, 0)
+    assert new_board[CAMEL_INDEX["yellow"]] == (2, 1)
+
+
+def test_batched_rolls_match_apply_roll():
+    for board, camel, value, tiles in _verification_cases():
+        expected, _ = apply_roll(board, camel, value, tiles)
+        tracks, stacks = np.array([board], dtype=np.int8).transpose(2, 0, 1)
+        effects = tile_effects(tiles) if tiles else None
+        new_tracks, new_stacks, _ = apply_roll_batch(tracks, stacks, camel, value, effects)
+        assert tuple(zip(new_tracks[0].tolist(), new_stacks[0].tolist())) == expected
+
+
+def test_board_codes_round_trip():
+    boards = [tuple((i + 1, 0) for i in range(GameConfig.NUM_CAMELS)), ((20, 4), (16, 0), (16, 1), (2, 0), (2, 1), (1, 0), (16, 2))]
+    for board in boards:
+        assert decode_board(encode_board(board)) == board
+    tracks, stacks = np.array(boards, dtype=np.int8).transpose(2, 0, 1)
+    decoded_tracks, decoded_stacks = decode_boards(encode_boards(tracks, stacks))
+    assert (decoded_tracks == tracks).all() and (decoded_stacks == stacks).all()
@@ -0,0 +1,32 @@
+import random
+
+import numpy as np
+import torch
+
+from camelgo.domain.training.checkpoint import (
+    CheckpointWriter, capture_rng_state, latest_checkpoint, list_checkpoints, load_checkpoint, restore_rng_state
+)
+
+
+def test_checkpoint_writer_round_trip(tmp_path):
+    weights = torch.ones(3)
+    writer = CheckpointWriter(str(tmp_path), keep_last=2)
+    for frames in (100, 200, 300):
+        writer.save({"weights": weights, "frames_collected": frames}, frames=frames)
+        # the snapshot is taken at save time, later in-place updates must not leak into it
+        weights.add_(1.0)
+    writer.close()
+
+    checkpoints = list_checkpoints(str(tmp_path))
+    assert len(checkpoints) == 2
+    assert latest_checkpoint(str(tmp_path)) == checkpoints[-1]
+    state = load_checkpoint(str(tmp_path))
+    assert state["frames_collected"] == 300
+    assert torch.equal(state["weights"], torch.full((3,), 3.0))
+
+
+def test_rng_state_round_trip():
+    state = capture_rng_state()
+    expected = (random.random(), np.random.rand(), torch.rand(1).item())
+    restore_rng_state(state)
+    assert (random.random(), np.random.rand(), torch.rand(1).item()) == expected
@@ -0,0 +1,49 @@
+import pytest
+import torch
+from tensordict import TensorDict
+from torchrl.envs.utils import ExplorationType, set_exploration_type
+
+from camelgo.domain.environment.gym_env import CamelGoEnv
+from camelgo.domain.training.export import build_inference_policy, export_actor, load_inference_policy
+from camelgo.domain.training.single_agent_ppo import create_ppo_modules
+
+
+@pytest.fixture
+def actor_path(tmp_path):
+    torch.manual_seed(0)
+    actor, _ = create_ppo_modules()
+    path = tmp_path / "actor.pt"
+    torch.save(actor.state_dict(), path)
+    return actor, str(path)
+
+
+@pytest.fixture
+def batch():
+    torch.manual_seed(1)
+    observation = torch.rand(32, CamelGoEnv.OBSERVATION_DIM)
+    mask = torch.rand(32, CamelGoEnv.ACTION_DIM) > 0.5
+    mask[:, 0] = True  # rolling the dice is always legal
+    return observation, mask
+
+
+@pytest.mark.parametrize("method", ["script", "eager"])
+def test_inference_policy_matches_actor(actor_path, batch, method):
+    actor, path = actor_path
+    observation, mask = batch
+    policy = build_inference_policy(path, method=method)
+    with torch.no_grad(), set_exploration_type(ExplorationType.DETERMINISTIC):
+        expected = actor(TensorDict({"observation": observation, "mask": mask}, batch_size=[32]))["action"]
+        actions = policy(observation, mask)
+        single = policy(observation[0], mask[0])
+    assert torch.equal(actions, expected)
+    assert single.item() == expected[0].item()
+
+
+def test_exported_quantized_policy_picks_legal_actions(actor_path, batch, tmp_path):
+    _, path = actor_path
+    observation, mask = batch
+    output = export_actor(path, str(tmp_path / "actor_inference.pt"), quantize=True)
+    policy = load_inference_policy(output)
+    with torch.no_grad():
+        actions = policy(observation, mask)
+    assert mask.gather(1, actions.unsqueeze(1)).all()
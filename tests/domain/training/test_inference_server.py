@@ -0,0 +1,92 @@
+import pickle
+import threading
+
+import numpy as np
+import pytest
+import torch
+
+from camelgo.domain.agents.agent_types import AgentType
+from camelgo.domain.environment.gym_env import CamelGoEnv
+from camelgo.domain.training.export import InferencePolicy
+from camelgo.domain.training.inference_server import InferenceClient, InferenceServer
+from camelgo.domain.training.single_agent_ppo import create_ppo_modules
+
+
+@pytest.fixture
+def policy():
+    torch.manual_seed(0)
+    return InferencePolicy().eval()
+
+
+@pytest.fixture
+def server(policy, tmp_path):
+    with InferenceServer(policy, str(tmp_path / "inference.sock"), max_delay=0.005) as server:
+        yield server
+
+
+def random_batch(seed, rows):
+    rng = np.random.default_rng(seed)
+    observations = rng.random((rows, CamelGoEnv.OBSERVATION_DIM), dtype=np.float32)
+    masks = rng.random((rows, CamelGoEnv.ACTION_DIM)) > 0.5
+    masks[:, 0] = True
+    return observations, masks
+
+
+def test_workers_share_batches(policy, server):
+    results = {}
+
+    def worker(seed):
+        client = InferenceClient(server.socket_path)
+        observations, masks = random_batch(seed, 20)
+        results[seed] = [int(client(o, m)) for o, m in zip(observations, masks)]
+        client.close()
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for seed, actions in results.items():
+        observations, masks = random_batch(seed, 20)
+        with torch.no_grad():
+            expected = policy(torch.from_numpy(observations), torch.from_numpy(masks))
+        assert actions == expected.tolist()
+    metrics = InferenceClient(server.socket_path).metrics()
+    assert metrics.requests == 80
+    # requests of different workers were answered by the same forward pass
+    assert metrics.batches < 80
+    assert metrics.throughput > 0 and 0 < metrics.latency_p50_ms <= metrics.latency_p99_ms
+
+
+def test_weight_updates(policy, server):
+    client = InferenceClient(server.socket_path)
+    observations, masks = random_batch(0, 64)
+    before = client.decide(observations, masks)
+
+    torch.manual_seed(1)
+    actor, _ = create_ppo_modules()
+    assert client.update_weights(actor.state_dict()) == 1
+    after = client.decide(observations, masks)
+    assert not np.array_equal(before, after)
+    assert np.array_equal(after, policy(torch.from_numpy(observations), torch.from_numpy(masks)).numpy())
+    assert client.update_weights(policy.state_dict()) == 2
+    assert client.metrics().weight_version == 2
+
+
+def test_errors_keep_the_connection(server):
+    client = InferenceClient(server.socket_path)
+    with pytest.raises(RuntimeError, match="does not hold"):
+        client._request(1, b"\x00\x00\x00\x02")
+    observations, masks = random_batch(0, 1)
+    assert client.decide(observations, masks).shape == (1,)
+
+
+def test_opponents_play_through_the_server(server):
+    client = pickle.loads(pickle.dumps(InferenceClient(server.socket_path)))
+    env = CamelGoEnv(opponent_type=AgentType.PPO, num_opponents=2, opponent_kwargs={"policy": client})
+    env.reset(seed=0)
+    terminated = False
+    while not terminated:
+        _, _, terminated, _, _ = env.step(0)
+    assert client.metrics().requests > 0
@@ -0,0 +1,47 @@
+import pytest
+import torch
+
+from camelgo.domain.training.checkpoint import checkpoint_path, list_checkpoints, load_checkpoint
+from camelgo.domain.training.single_agent_ppo import PolicyVersion, create_collector, create_ppo_modules, train
+
+
+@pytest.mark.parametrize("num_collectors", [1, 2])
+def test_collected_frames_carry_the_policy_version(num_collectors):
+    torch.manual_seed(0)
+    actor, _ = create_ppo_modules(hidden_dim=16)
+    policy_version = PolicyVersion()
+    collector = create_collector(
+        actor, frames_per_batch=8, total_frames=16, device="cpu",
+        num_collectors=num_collectors, policy_version=policy_version,
+    )
+    try:
+        versions = []
+        for batch in collector:
+            assert batch.numel() == 8
+            versions.append(batch["policy_version"].unique().tolist())
+            policy_version.bump()
+            collector.update_policy_weights_()
+    finally:
+        collector.shutdown()
+    # the second batch is collected with the bumped weights
+    assert versions == [[0], [1]]
+
+
+def test_train_resumes_from_its_checkpoints(tmp_path, monkeypatch):
+    # the trained models are saved in the working directory
+    monkeypatch.chdir(tmp_path)
+    checkpoint_dir = str(tmp_path / "checkpoints")
+    torch.manual_seed(0)
+    train(total_frames=40, frames_per_batch=20, num_epochs=2, checkpoint_dir=checkpoint_dir, checkpoint_every=1)
+    first = load_checkpoint(checkpoint_dir)
+    assert first["batches_done"] == 2 and first["frames_collected"] == 40
+
+    logs = train(
+        total_frames=80, frames_per_batch=20, num_epochs=2, checkpoint_dir=checkpoint_dir, checkpoint_every=1,
+        resume_from=checkpoint_dir,
+    )
+    resumed = load_checkpoint(checkpoint_dir)
+    assert resumed["batches_done"] == 4 and resumed["frames_collected"] == 80
+    assert resumed["scheduler"]["last_epoch"] == 4
+    assert len(logs["reward"]) == 4
+    assert list_checkpoints(checkpoint_dir) == [checkpoint_path(checkpoint_dir, frames) for frames in (40, 60, 80)]
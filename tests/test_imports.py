@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import camelgo
+
+
+LIGHT_MODULES = [
+    "camelgo.domain.environment.game",
+    "camelgo.domain.environment.leg",
+    "camelgo.domain.environment.dice",
+    "camelgo.application.simulate",
+    "camelgo.application.dash_app",
+    "camelgo.domain.analysis.best_response",
+    "camelgo.run_agent",
+]
+
+
+@pytest.mark.parametrize("module", LIGHT_MODULES)
+def test_module_does_not_import_torch_nor_gymnasium(module):
+    if module == "camelgo.application.dash_app":
+        pytest.importorskip("dash")
+    src = os.path.dirname(os.path.dirname(camelgo.__file__))
+    probe = f"import sys, {module}; print([p for p in ('torch', 'gymnasium') if p in sys.modules])"
+    completed = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, check=True, env=dict(os.environ, PYTHONPATH=src)
+    )
+    assert completed.stdout.strip() == "[]"
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "camelgo.domain.agents.policy_agent",
+        "camelgo.domain.training.export",
+        "camelgo.domain.training.inference_server",
+    ],
+)
+def test_inference_modules_do_not_import_gymnasium(module):
+    pytest.importorskip("torch")
+    src = os.path.dirname(os.path.dirname(camelgo.__file__))
+    probe = f"import sys, {module}; print('gymnasium' in sys.modules)"
+    completed = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, check=True, env=dict(os.environ, PYTHONPATH=src)
+    )
+    assert completed.stdout.strip() == "False"
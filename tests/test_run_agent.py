@@ -0,0 +1,64 @@
+import os
+
+import pytest
+import torch
+
+from camelgo import run_agent
+from camelgo.domain.agents.agent_types import AgentType
+from camelgo.domain.training.single_agent_ppo import create_ppo_modules
+from camelgo.run_agent import Estimate, evaluate
+
+
+@pytest.fixture
+def actor_path(tmp_path):
+    torch.manual_seed(0)
+    actor, _ = create_ppo_modules()
+    path = tmp_path / "actor.pt"
+    torch.save(actor.state_dict(), path)
+    return str(path)
+
+
+def test_evaluate_is_cached(actor_path, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    report = evaluate(actor_path, AgentType.RANDOM_PLAYER, seeds=range(3), num_processes=1, cache_dir=cache_dir)
+    assert report.num_games == 3 and report.opponent_type == AgentType.RANDOM_PLAYER.value
+    assert 0 <= report.win_rate.low <= report.win_rate.mean <= report.win_rate.high <= 1
+    assert report.leg_rewards and all(estimate.n <= 3 for estimate in report.leg_rewards.values())
+    assert len(os.listdir(cache_dir)) == 1
+
+    def fail(*args):
+        raise AssertionError("the cached report should be returned")
+
+    monkeypatch.setattr(run_agent, "_init_evaluation_worker", fail)
+    again = evaluate(actor_path, AgentType.RANDOM_PLAYER, seeds=range(3), num_processes=1, cache_dir=cache_dir)
+    assert again == report
+    # other seeds are another evaluation
+    with pytest.raises(AssertionError):
+        evaluate(actor_path, AgentType.RANDOM_PLAYER, seeds=range(4), num_processes=1, cache_dir=cache_dir)
+
+
+def test_estimates():
+    assert Estimate.from_proportion(0, 0) == Estimate(mean=0.0, low=0.0, high=1.0, n=0)
+    for successes in (0, 3, 10):
+        estimate = Estimate.from_proportion(successes, 10)
+        assert 0 <= estimate.low <= estimate.mean <= estimate.high <= 1
+    estimate = Estimate.from_samples([1.0, 2.0, 3.0])
+    assert estimate.mean == 2.0 and estimate.low < 2.0 < estimate.high
+    assert Estimate.from_samples([5.0]) == Estimate(mean=5.0, low=5.0, high=5.0, n=1)
+
+
+def test_evaluate_against_ppo_opponents_caches_per_opponent_weights(actor_path, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    with pytest.raises(ValueError):
+        evaluate(actor_path, AgentType.PPO, seeds=range(1), num_processes=1, cache_dir=cache_dir)
+
+    opponent_path = str(tmp_path / "opponent.pt")
+    torch.manual_seed(1)
+    torch.save(create_ppo_modules()[0].state_dict(), opponent_path)
+    evaluate(actor_path, AgentType.PPO, seeds=range(1), num_processes=1, cache_dir=cache_dir, opponent_actor=opponent_path)
+    assert len(os.listdir(cache_dir)) == 1
+    # new opponent weights are another evaluation
+    torch.manual_seed(2)
+    torch.save(create_ppo_modules()[0].state_dict(), opponent_path)
+    evaluate(actor_path, AgentType.PPO, seeds=range(1), num_processes=1, cache_dir=cache_dir, opponent_actor=opponent_path)
+    assert len(os.listdir(cache_dir)) == 2